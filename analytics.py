@@ -0,0 +1,117 @@
+"""Nutrition aggregates over served menus, computed by MongoDB aggregation pipelines.
+
+Both pipelines match menu entries by date (a $in over the requested days, so the menus
+indexes apply), group them down to one row per food before joining foods with $lookup on
+rec_num, and aggregate the parsed numeric nutrients stored at ingest (see nutrition.py).
+Nothing is parsed or looped over in Python, so a semester costs one round trip per query.
+
+Only foods whose nutrition has been fetched are counted.
+"""
+
+import os
+from datetime import datetime, timedelta
+
+ANALYTICS_MAX_DAYS = int(os.getenv('ANALYTICS_MAX_DAYS', '366'))
+
+# Nutrients summed by totals(), as stored in foods.nutrients
+TOTAL_NUTRIENTS = (
+    'calories', 'protein', 'total_fat', 'saturated_fat', 'total_carbohydrate', 'dietary_fiber',
+    'total_sugars', 'sodium', 'cholesterol',
+)
+
+GROUP_FIELDS = ('date', 'dining_hall_id', 'meal_period')
+
+
+def parse_date(text):
+    return datetime.strptime(text, '%m/%d/%Y')
+
+
+def date_range(start, end):
+    """Menu date strings ('1/5/2026') from start to end inclusive. Raises ValueError on bad input."""
+    first, last = parse_date(start), parse_date(end)
+    if last < first:
+        raise ValueError("end is before start")
+    days = (last - first).days + 1
+    if days > ANALYTICS_MAX_DAYS:
+        raise ValueError(f"Date range is limited to {ANALYTICS_MAX_DAYS} days")
+    return [f"{day.month}/{day.day}/{day.year}" for day in (first + timedelta(days=i) for i in range(days))]
+
+
+def _menu_match(dates, dining_hall_id=None, meal_period=None):
+    match = {'date': {'$in': dates}}
+    if dining_hall_id:
+        match['dining_hall_id'] = dining_hall_id
+    if meal_period:
+        match['meal_period'] = meal_period
+    return {'$match': match}
+
+
+def _join_foods(local_field):
+    return [
+        {'$lookup': {'from': 'foods', 'localField': local_field, 'foreignField': 'rec_num', 'as': 'food'}},
+        {'$unwind': '$food'},
+        {'$match': {'food.nutrition_fetched': True}},
+    ]
+
+
+def totals(db, dates, group_by=GROUP_FIELDS, dining_hall_id=None, meal_period=None):
+    """Summed nutrients of everything served, one row per combination of group_by fields.
+
+    Each row has the group fields, 'items' (menu entries counted) and one total per
+    TOTAL_NUTRIENTS. An empty group_by gives a single row for the whole range.
+    """
+    unknown = set(group_by) - set(GROUP_FIELDS)
+    if unknown:
+        raise ValueError(f"Cannot group by {', '.join(sorted(unknown))}")
+
+    # One lookup per distinct food within each group rather than per menu entry
+    servings = {'$group': {'_id': {**{field: f'${field}' for field in group_by}, 'rec_num': '$rec_num'},
+                           'servings': {'$sum': 1}}}
+    group = {'_id': {field: f'$_id.{field}' for field in group_by}, 'items': {'$sum': '$servings'}}
+    for nutrient in TOTAL_NUTRIENTS:
+        group[nutrient] = {'$sum': {'$multiply': ['$servings', {'$ifNull': [f'$food.nutrients.{nutrient}', 0]}]}}
+
+    pipeline = [_menu_match(dates, dining_hall_id, meal_period), servings, *_join_foods('_id.rec_num'), {'$group': group}]
+
+    rows = [{**(row.pop('_id') or {}), **row} for row in db.menus.aggregate(pipeline)]
+    rows.sort(key=lambda row: _group_sort_key(row, group_by))
+    return rows
+
+
+def _group_sort_key(row, group_by):
+    # Menu entries missing a group field give rows with None there, sorted after the rest
+    key = []
+    for field in group_by:
+        value = row.get(field)
+        if value is None:
+            key.append((True, 0))
+        else:
+            key.append((False, parse_date(value) if field == 'date' else value))
+    return tuple(key)
+
+
+def protein_per_calorie(db, dates, dining_hall_id=None, meal_period=None, min_calories=50, limit=20):
+    """Foods served in the range ranked by grams of protein per 100 kcal, best first.
+
+    Foods under min_calories are skipped so condiments and drinks don't dominate the ranking.
+    """
+    pipeline = [
+        _menu_match(dates, dining_hall_id, meal_period),
+        {'$group': {'_id': '$rec_num', 'dining_hall_ids': {'$addToSet': '$dining_hall_id'},
+                    'dates': {'$addToSet': '$date'}}},
+        *_join_foods('_id'),
+        {'$match': {'food.nutrients.calories': {'$gte': max(min_calories, 1)}, 'food.nutrients.protein': {'$gt': 0}}},
+        {'$project': {
+            '_id': 0,
+            'rec_num': '$_id',
+            'name': '$food.name',
+            'calories': '$food.nutrients.calories',
+            'protein': '$food.nutrients.protein',
+            'protein_per_100_kcal': {'$multiply': [{'$divide': ['$food.nutrients.protein', '$food.nutrients.calories']}, 100]},
+            'dining_hall_ids': 1,
+            'days_served': {'$size': '$dates'},
+        }},
+        {'$sort': {'protein_per_100_kcal': -1, 'rec_num': 1}},
+        {'$limit': limit},
+    ]
+    return list(db.menus.aggregate(pipeline))
@@ -1,6 +1,6 @@
-from app import app as application
-import routes # noqa: F401
+from app import create_app
+
+application = create_app()
 
 if __name__ == '__main__':
     application.run()
-    
\ No newline at end of file
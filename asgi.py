@@ -0,0 +1,458 @@
+"""Async serving mode: the read API on Starlette with pymongo's AsyncMongoClient and httpx.
+
+    uvicorn asgi:app --host 0.0.0.0 --port 8000 --workers 3
+
+/api/dining-halls, /api/menu, /api/nutrition, /api/search and /api/search/autocomplete run
+as coroutines, so one worker keeps serving while its requests wait on MongoDB, and a
+pending /api/nutrition label is fetched with httpx on the event loop instead of a thread.
+/api/menu/events pushes menu changes over Server-Sent Events (feed.py); it only exists in
+this mode, where an idle subscriber holds no thread. Every other endpoint (scrape jobs,
+analytics, metrics, health) is the Flask app mounted through a2wsgi. Responses are byte-for-byte those of the Flask routes, with the same ETags,
+Cache-Control, 304s, gzip and /api/menu response cache.
+
+The search index and the write after a label fetch are synchronous and run on a worker
+thread (asyncio.to_thread) with the shared sync client.
+"""
+
+import asyncio
+import contextlib
+import gzip
+import time
+
+import httpx
+import pymongo
+from a2wsgi import WSGIMiddleware
+from pymongo.errors import PyMongoError
+from starlette.applications import Starlette
+from starlette.responses import FileResponse, Response, StreamingResponse
+from starlette.routing import Mount, Route
+from werkzeug.http import generate_etag, parse_etags
+
+import scraper
+from app import create_app
+from cache import menu_cache, get_version_async
+from catalog import get_catalog
+from database import db, get_async_db, close_async_client
+from feed import menu_feed
+from filters import parse_menu_filters, food_projection, menu_item, menu_items
+from http_cache import GZIP_MIN_SIZE
+from metrics import HTTP_REQUESTS, HTTP_LATENCY, UPSTREAM_REQUESTS, UPSTREAM_LATENCY, UPSTREAM_BYTES, UPSTREAM_RETRIES
+from models import MenuEntry
+from nutrition_worker import NUTRITION_WORKERS
+from pagination import (
+    DEFAULT_PAGE_SIZE, MAX_SEARCH_PAGE_SIZE, MAX_SUGGESTIONS, NDJSON_MIMETYPE, SEARCH_PAGE_SIZE, STREAM_BATCH_SIZE,
+    SUGGESTIONS, encode_cursor, ndjson_line, page_size, wants_ndjson,
+)
+from routes import menu_cursor, nutrition_data, search_cursor, search_filters
+from search import get_index
+from snapshots import SNAPSHOT_DB_TIMEOUT_SECONDS, canonical_date, render_json, snapshot_key, snapshots
+from upstream import RETRY_STATUSES, UpstreamUnavailable, backoff, upstream
+
+# Same bytes as Flask's jsonify, so both modes produce the same ETags
+dumps = render_json
+
+
+def respond(request, payload=None, status=200, max_age=None, body=None, etag=None):
+    """A JSON response with the headers the Flask app adds (see http_cache.py).
+
+    With max_age, a 200 gets a weak ETag and Cache-Control, and a matching If-None-Match
+    gets a bodiless 304. Large bodies are gzipped for clients that accept it.
+    """
+    if body is None:
+        body = dumps(payload)
+    headers = {'Vary': 'Accept-Encoding'}
+    if status == 200 and max_age is not None:
+        etag = etag or generate_etag(body)
+        headers['ETag'] = f'W/"{etag}"'
+        headers['Cache-Control'] = f'public, max-age={max_age}'
+        if parse_etags(request.headers.get('if-none-match')).contains_weak(etag):
+            return Response(status_code=304, headers=headers)
+    if status == 200 and len(body) >= GZIP_MIN_SIZE and 'gzip' in request.headers.get('accept-encoding', '').lower():
+        body = gzip.compress(body, compresslevel=6)
+        headers['Content-Encoding'] = 'gzip'
+    return Response(body, status_code=status, headers=headers, media_type='application/json')
+
+
+def snapshot_response(request, snapshot, stale=False):
+    """routes.snapshot_response: the snapshot file, gzipped on disk if the client accepts it."""
+    headers = {'Vary': 'Accept-Encoding', 'ETag': f'W/"{snapshot.etag}"', 'Cache-Control': 'public, max-age=60'}
+    if stale:
+        headers['Warning'] = '110 - "Response is Stale"'
+    if parse_etags(request.headers.get('if-none-match')).contains_weak(snapshot.etag):
+        return Response(status_code=304, headers=headers)
+    if 'gzip' in request.headers.get('accept-encoding', '').lower():
+        return FileResponse(snapshot.gzip_path, headers={**headers, 'Content-Encoding': 'gzip'},
+                            media_type='application/json')
+    return FileResponse(snapshot.path, headers=headers, media_type='application/json')
+
+
+def read_route(path):
+    """Route for an async GET view, with the Flask app's request metrics and 500 handling."""
+    def decorator(view):
+        async def endpoint(request):
+            start = time.perf_counter()
+            try:
+                response = await view(request)
+            except Exception as e:
+                response = respond(request, {'success': False, 'error': str(e)}, 500)
+            HTTP_REQUESTS.inc(route=path, method=request.method, status=response.status_code)
+            HTTP_LATENCY.observe(time.perf_counter() - start, route=path, method=request.method)
+            return response
+        return Route(path, endpoint, methods=['GET'])
+    return decorator
+
+
+class LabelFetcher:
+    """Fetches pending labels on the event loop; the async counterpart of NutritionBackfill.submit.
+
+    Concurrent submissions for the same rec_num share one task. Attempts draw on the
+    backfill's rate limiter, so the two together stay within NUTRITION_RATE_PER_SEC, and
+    follow the shared upstream client's token bucket, circuit breaker, timeouts, retries
+    and deadline (see upstream.py).
+    """
+
+    def __init__(self, limiter, client=upstream, max_concurrency=NUTRITION_WORKERS):
+        self.limiter = limiter
+        self.upstream = client
+        self.max_concurrency = max_concurrency
+        self.in_flight = {}
+        self.semaphore = None
+        self.http = None
+
+    async def start(self):
+        self.semaphore = asyncio.Semaphore(self.max_concurrency)
+        self.http = httpx.AsyncClient(limits=httpx.Limits(max_connections=self.max_concurrency))
+
+    async def close(self):
+        for task in list(self.in_flight.values()):
+            task.cancel()
+        await self.http.aclose()
+
+    def submit(self, rec_num):
+        """Queue a label fetch. Returns the task, shared with any fetch already running for rec_num."""
+        task = self.in_flight.get(rec_num)
+        if task is None:
+            task = asyncio.create_task(self._fetch(rec_num))
+            self.in_flight[rec_num] = task
+            task.add_done_callback(lambda _: self.in_flight.pop(rec_num, None))
+        return task
+
+    async def _fetch(self, rec_num):
+        url = scraper.label_url(rec_num)
+        async with self.semaphore:
+            await asyncio.sleep(self.limiter.reserve())
+            try:
+                response = await self._get(url)
+            except UpstreamUnavailable:
+                return None
+            except httpx.HTTPError as e:
+                print(f"Nutrition fetch for {rec_num} failed: {e}")
+                return None
+
+        scraper.fetch_cache.is_changed(url, response)
+        nutrition = await asyncio.to_thread(scraper.parse_label, response.text)
+        return await asyncio.to_thread(scraper.store_nutrition, rec_num, nutrition)
+
+    async def _get(self, url):
+        """UpstreamClient.get() on httpx. Returns a successful response.
+
+        Raises UpstreamUnavailable while the breaker is open, else the last attempt's httpx error.
+        """
+        policy = self.upstream
+        deadline_at = time.monotonic() + policy.deadline
+        for attempt in range(policy.retries + 1):
+            delay = policy.bucket.reserve()
+            if time.monotonic() + delay >= deadline_at:
+                raise httpx.TimeoutException(f"GET {url} didn't start within its deadline")
+            await asyncio.sleep(delay)
+            if not policy.breaker.allow():
+                UPSTREAM_REQUESTS.inc(kind='label', status='breaker_open')
+                raise UpstreamUnavailable(f"{url} not fetched: circuit breaker open")
+
+            remaining = deadline_at - time.monotonic()
+            timeout = httpx.Timeout(min(policy.read_timeout, remaining), connect=min(policy.connect_timeout, remaining))
+            retry_after = None
+            try:
+                with UPSTREAM_LATENCY.time(kind='label'):
+                    response = await self.http.get(url, timeout=timeout)
+            except httpx.TransportError as e:
+                UPSTREAM_REQUESTS.inc(kind='label', status='error')
+                policy.breaker.record_failure()
+                error, reason = e, type(e).__name__
+            else:
+                UPSTREAM_REQUESTS.inc(kind='label', status=response.status_code)
+                UPSTREAM_BYTES.inc(len(response.content), kind='label')
+                if response.status_code not in RETRY_STATUSES:
+                    policy.breaker.record_success()
+                    return response.raise_for_status()
+                policy.breaker.record_failure()
+                error = httpx.HTTPStatusError(f"{response.status_code} from {url}", request=response.request,
+                                              response=response)
+                reason, retry_after = response.status_code, response.headers.get('retry-after')
+
+            pause = backoff(attempt, retry_after)
+            if attempt == policy.retries or time.monotonic() + pause >= deadline_at:
+                raise error
+            UPSTREAM_RETRIES.inc(kind='label', reason=reason)
+            await asyncio.sleep(pause)
+
+
+label_fetcher = LabelFetcher(scraper.nutrition_backfill.limiter)
+
+
+@read_route('/api/dining-halls')
+async def get_dining_halls(request):
+    halls = await get_async_db().dining_halls.find({}, {'_id': 0}).to_list(None)
+    return respond(request, {'success': True, 'count': len(halls), 'data': halls}, max_age=3600)
+
+
+async def menu_foods(adb, catalog, rec_nums, food_query, fields):
+    """Async routes.menu_foods: the catalog's foods, or a foods query with food filters."""
+    if catalog is not None and not food_query:
+        return catalog.lookup(rec_nums)
+    return {f['rec_num']: f async for f in adb.foods.find({'rec_num': {'$in': list(rec_nums)}, **food_query},
+                                                          food_projection(fields))}
+
+
+async def iter_menu_items(adb, query, food_query, fields, after=None):
+    """Async routes.iter_menu_items: (entry _id, item) in _id order, joined a batch at a time."""
+    if after is not None:
+        query = {**query, '_id': {'$gt': after}}
+    catalog = None if food_query else await asyncio.to_thread(get_catalog, db)
+
+    async def join(entries):
+        foods = await menu_foods(adb, catalog, {entry['rec_num'] for entry in entries}, food_query, fields)
+        return [(entry['_id'], menu_item(entry, foods.get(entry['rec_num'], {}), fields)) for entry in entries
+                if not food_query or entry['rec_num'] in foods]
+
+    entries = []
+    async for entry in adb.menus.find(query).sort('_id', 1).batch_size(STREAM_BATCH_SIZE):
+        entries.append(entry)
+        if len(entries) == STREAM_BATCH_SIZE:
+            for pair in await join(entries):
+                yield pair
+            entries = []
+    if entries:
+        for pair in await join(entries):
+            yield pair
+
+
+async def iter_foods(adb, rec_nums):
+    """Async routes.iter_foods: food documents for rec_nums in that order."""
+    for i in range(0, len(rec_nums), STREAM_BATCH_SIZE):
+        batch = rec_nums[i:i + STREAM_BATCH_SIZE]
+        foods = {f['rec_num']: f async for f in adb.foods.find({'rec_num': {'$in': batch}}, food_projection(None))}
+        for rec_num in batch:
+            if rec_num in foods:
+                yield foods[rec_num]
+
+
+async def ndjson_stream(items, limit=None):
+    count = 0
+    async with contextlib.aclosing(items):
+        async for item in items:
+            if limit is not None and count == limit:
+                break
+            yield ndjson_line(item)
+            count += 1
+
+
+@read_route('/api/menu')
+async def get_menu(request):
+    args = request.query_params
+    try:
+        query, food_query, fields = parse_menu_filters(args)
+        params = args.multi_items()
+        limit = page_size(args.get('limit'))
+        after = menu_cursor(args['cursor'], params) if args.get('cursor') else None
+        stream = wants_ndjson(args.get('format'))
+    except ValueError as e:
+        return respond(request, {'success': False, 'error': str(e)}, 400)
+
+    adb = get_async_db()
+    if stream:
+        items = (item async for _, item in iter_menu_items(adb, query, food_query, fields, after))
+        return StreamingResponse(ndjson_stream(items, limit), media_type=NDJSON_MIMETYPE)
+
+    date = query.get('date')
+    # Same snapshots, key and version-before-data ordering as routes.get_menu, sharing its cache
+    snapshot_at = snapshot_key(args, scraper.DINING_HALLS)
+    last_good = snapshots.get(*snapshot_at) if snapshot_at else None
+    try:
+        with pymongo.timeout(SNAPSHOT_DB_TIMEOUT_SECONDS) if last_good else contextlib.nullcontext():
+            version = await get_version_async(adb, date)
+    except PyMongoError:
+        if not last_good:
+            raise
+        return snapshot_response(request, last_good, stale=True)
+    current = snapshots.get(*snapshot_at, version=version) if snapshot_at else None
+    if current:
+        return snapshot_response(request, current)
+
+    cache_key = (date, tuple(sorted(params)))
+    cached = menu_cache.get(cache_key, version)
+    if cached is not None:
+        body, etag = cached
+        return respond(request, body=body, etag=etag, max_age=60)
+
+    payload = {'success': True}
+    if limit or after:
+        limit = limit or DEFAULT_PAGE_SIZE
+        page = []
+        async with contextlib.aclosing(iter_menu_items(adb, query, food_query, fields, after)) as pairs:
+            async for pair in pairs:
+                page.append(pair)
+                if len(page) > limit:
+                    break
+        items = [item for _, item in page[:limit]]
+        payload['next_cursor'] = encode_cursor(str(page[limit - 1][0]), params) if len(page) > limit else None
+    else:
+        menu_entries = [MenuEntry.from_doc(doc) async for doc in adb.menus.find(query, {'_id': 0})]
+        # The catalog catches up with a sync query, off the event loop
+        catalog = None if food_query else await asyncio.to_thread(get_catalog, db)
+        foods = await menu_foods(adb, catalog, {entry['rec_num'] for entry in menu_entries}, food_query, fields)
+        items = menu_items(menu_entries, foods, food_query, fields)
+
+    body = dumps({**payload, 'count': len(items), 'filters': {**query, **food_query}, 'data': items})
+    etag = generate_etag(body)
+    if snapshot_at:
+        try:
+            await asyncio.to_thread(snapshots.write, *snapshot_at, version, body, menu_entries, foods)
+        except OSError as e:
+            print(f"Writing the menu snapshot for {snapshot_at} failed: {e}")
+    menu_cache.set(cache_key, version, (body, etag))
+    return respond(request, body=body, etag=etag, max_age=60)
+
+
+@read_route('/api/menu/events')
+async def menu_events(request):
+    # Topics and menu versions are keyed by the date as stored, so '01/05/2026' would never see an update
+    date = canonical_date(request.query_params.get('date'))
+    if date is None:
+        return respond(request, {'success': False, 'error': 'date parameter required (M/D/YYYY, e.g. 1/5/2026)'}, 400)
+
+    topic, queue = await menu_feed.subscribe(date, request.query_params.get('dining_hall_id'),
+                                             request.headers.get('last-event-id'))
+    # Not cached, and not buffered by nginx-style proxies
+    headers = {'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    return StreamingResponse(menu_feed.stream(topic, queue), media_type='text/event-stream', headers=headers)
+
+
+@read_route('/api/nutrition')
+async def get_nutrition(request):
+    rec_num = request.query_params.get('rec_num')
+    if not rec_num:
+        return respond(request, {'success': False, 'error': 'rec_num parameter required'}, 400)
+
+    adb = get_async_db()
+    canonical = rec_num
+    food = await adb.foods.find_one({'rec_num': rec_num}, {'_id': 0})
+    if not food:
+        # A rec_num merged into another food is answered with that food (see identity.py)
+        alias = await adb.food_aliases.find_one({'rec_num': rec_num}, {'_id': 0, 'canonical': 1})
+        if alias:
+            canonical = alias['canonical']
+            food = await adb.foods.find_one({'rec_num': canonical}, {'_id': 0})
+
+    # Not fetched yet: fetch it in the background (unless the thread backfill already is)
+    if not food or not food.get('nutrition_fetched'):
+        if not scraper.nutrition_backfill.is_pending(canonical):
+            label_fetcher.submit(canonical)
+        return respond(request, {
+            'success': True,
+            'status': 'pending',
+            'data': {'rec_num': rec_num, 'name': food.get('name', '') if food else ''}
+        }, 202)
+
+    return respond(request, {'success': True, 'status': 'ready', 'data': nutrition_data(food, rec_num)}, max_age=3600)
+
+
+@read_route('/api/search')
+async def search_menu(request):
+    args = request.query_params
+    search_query = args.get('q', '')
+    if not search_query:
+        return respond(request, {'success': False, 'error': 'Search query required'}, 400)
+
+    try:
+        params = args.multi_items()
+        offset = search_cursor(args['cursor'], params) if args.get('cursor') else 0
+        stream = wants_ndjson(args.get('format'))
+        limit = page_size(args.get('limit'), MAX_SEARCH_PAGE_SIZE)
+    except ValueError as e:
+        return respond(request, {'success': False, 'error': str(e)}, 400)
+
+    filters = search_filters(args)
+
+    ranked = await asyncio.to_thread(lambda: get_index(db).search(search_query))
+
+    adb = get_async_db()
+    if filters:
+        served = set(await adb.menus.distinct('rec_num', {'rec_num': {'$in': ranked}, **filters}))
+        ranked = [rec_num for rec_num in ranked if rec_num in served]
+
+    if stream:
+        end = offset + limit if limit else None
+        return StreamingResponse(ndjson_stream(iter_foods(adb, ranked[offset:end])), media_type=NDJSON_MIMETYPE)
+
+    limit = limit or SEARCH_PAGE_SIZE
+    page = ranked[offset:offset + limit]
+    foods = {f['rec_num']: f async for f in adb.foods.find({'rec_num': {'$in': page}}, food_projection(None))}
+    data = [foods[rec_num] for rec_num in page if rec_num in foods]
+
+    return respond(request, {
+        'success': True,
+        'query': search_query,
+        'filters': filters,
+        'count': len(data),
+        'next_cursor': encode_cursor(offset + limit, params) if len(ranked) > offset + limit else None,
+        'data': data
+    }, max_age=60)
+
+
+@read_route('/api/search/autocomplete')
+async def autocomplete(request):
+    prefix = request.query_params.get('q', '')
+    if not prefix:
+        return respond(request, {'success': False, 'error': 'Search query required'}, 400)
+
+    try:
+        limit = page_size(request.query_params.get('limit'), MAX_SUGGESTIONS) or SUGGESTIONS
+    except ValueError as e:
+        return respond(request, {'success': False, 'error': str(e)}, 400)
+
+    def suggest():
+        index = get_index(db)
+        return [{'rec_num': rec_num, 'name': index.names[rec_num]} for rec_num in index.search(prefix)[:limit]]
+
+    suggestions = await asyncio.to_thread(suggest)
+    return respond(request, {
+        'success': True,
+        'query': prefix,
+        'count': len(suggestions),
+        'data': suggestions
+    }, max_age=300)
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    await label_fetcher.start()
+    await menu_feed.start(get_async_db())
+    scraper.nutrition_backfill.start()
+    yield
+    await asyncio.to_thread(scraper.nutrition_backfill.stop)
+    await menu_feed.close()
+    await label_fetcher.close()
+    await close_async_client()
+
+
+def create_asgi_app():
+    """The async read routes in front of the Flask app, which serves everything else."""
+    return Starlette(
+        routes=[get_dining_halls, get_menu, menu_events, get_nutrition, search_menu, autocomplete,
+                Mount('/', app=WSGIMiddleware(create_app()))],
+        lifespan=lifespan,
+    )
+
+
+app = create_asgi_app()
@@ -0,0 +1,216 @@
+"""Scrape a range of dates across all dining halls.
+
+    python backfill.py 1/20/2026 1/26/2026              # a week of menus
+    python backfill.py 1/20/2026 --days 7               # the same week
+    python backfill.py 1/20/2026 --days 7 --prefetch    # and fetch nutrition for new foods
+    python backfill.py 1/20/2026 --days 7 --restart     # ignore checkpoints from an earlier run
+
+Each (date, hall) pair is a work item. Pages are fetched and parsed on a bounded thread
+pool, with requests to each host spaced by a rate limiter, and written from the calling
+thread as they complete so food stub upserts never race each other. Every finished item
+is checkpointed in the scrape_checkpoints collection under the run's id, so rerunning an
+interrupted range only scrapes what is left. Checkpoints expire after
+BACKFILL_CHECKPOINT_TTL_HOURS, so a later run of the same range scrapes it again. Dates are
+locked like any other scrape (see locks.py), from when the date's first page is fetched
+until its last is written; dates another process is scraping are skipped and left for the
+next run.
+"""
+
+import argparse
+import os
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta, timezone
+from urllib.parse import urlsplit
+
+from analytics import date_range, parse_date
+from locks import MongoLock, scrape_lock_name
+from nutrition_worker import RateLimiter
+from scraper import (
+    db, fetch_cache, DINING_HALLS, SCRAPE_MAX_WORKERS, menu_url, get_menu_page, ingest_items,
+    apply_retention, prefetch_nutrition, parse_menu,
+)
+
+BACKFILL_WORKERS = int(os.getenv('BACKFILL_WORKERS', str(SCRAPE_MAX_WORKERS)))
+BACKFILL_RATE_PER_SEC = float(os.getenv('BACKFILL_RATE_PER_SEC', '5'))
+
+# How long a finished item stays checkpointed; a rerun within this window resumes instead of rescraping
+BACKFILL_CHECKPOINT_TTL_HOURS = float(os.getenv('BACKFILL_CHECKPOINT_TTL_HOURS', '24'))
+
+# What a work item's fetch returns when another scrape holds its date
+_LOCKED = object()
+
+
+class HostRateLimiter:
+    """A RateLimiter per URL host."""
+
+    def __init__(self, rate):
+        self.rate = rate
+        self.limiters = {}
+        self.lock = threading.Lock()
+
+    def wait(self, url):
+        host = urlsplit(url).netloc
+        with self.lock:
+            limiter = self.limiters.get(host)
+            if limiter is None:
+                limiter = self.limiters[host] = RateLimiter(self.rate)
+        limiter.wait()
+
+
+def scrape_range(dates, max_workers=BACKFILL_WORKERS, rate=BACKFILL_RATE_PER_SEC, force=False, run_id=None,
+                 restart=False, prefetch=False, checkpoint_ttl_hours=BACKFILL_CHECKPOINT_TTL_HOURS):
+    """Scrape every hall for every date. Returns a summary of the run.
+
+    Work items checkpointed as done under run_id (default: the first and last date) within
+    the last checkpoint_ttl_hours are skipped unless restart is set. Failed items are
+    recorded and retried on the next run.
+    """
+    run_id = run_id or f"{dates[0]}-{dates[-1]}"
+    checkpoints = db.scrape_checkpoints
+    if restart:
+        checkpoints.delete_many({"run_id": run_id})
+    # Expired checkpoints are deleted by a TTL index (see indexes.py), but the monitor runs only once a minute
+    current = {"run_id": run_id, "status": "done", "expires_at": {"$gt": datetime.now(timezone.utc)}}
+    done = {(c["date"], c["dining_hall_id"]) for c in checkpoints.find(current, {"date": 1, "dining_hall_id": 1})}
+
+    work = [(date, hall) for date in dates for hall in DINING_HALLS if (date, hall) not in done]
+    remaining = Counter(date for date, _ in work)
+
+    # A date is locked from its first work item starting until its last is written, so the
+    # lease covers only that date's scrape, and other scrapes of later dates aren't held up
+    held = {}
+    tried = set()
+    locked_dates = set()
+    held_lock = threading.Lock()
+
+    def lock_date(date):
+        """Take date's scrape lock when its first item starts. False if another scrape holds it."""
+        with held_lock:
+            if date not in tried:
+                tried.add(date)
+                lock = MongoLock(db.scrape_locks, scrape_lock_name(date))
+                if lock.acquire():
+                    held[date] = lock
+                else:
+                    locked_dates.add(date)
+            return date in held
+
+    def renew_held():
+        # Dates whose items are still queued behind the rate limiter keep their lease too
+        with held_lock:
+            locks = list(held.values())
+        for lock in locks:
+            lock.renew()
+
+    def release_date(date):
+        with held_lock:
+            lock = held.pop(date, None)
+        if lock is not None:
+            lock.release()
+
+    summary = {
+        "run_id": run_id,
+        "work_items": len(dates) * len(DINING_HALLS),
+        "checkpointed": len(done),
+        "locked_dates": [],
+        "scraped": 0,
+        "unchanged": 0,
+        "failed": 0,
+        "items": 0,
+        "menus": {"inserted": 0, "updated": 0, "deleted": 0, "unchanged": 0},
+        "foods_inserted": 0,
+        "expired_dates": apply_retention(),
+    }
+    limiter = HostRateLimiter(rate)
+    rec_nums = set()
+
+    def fetch(date, hall):
+        if not lock_date(date):
+            return _LOCKED
+        limiter.wait(menu_url(hall, date))
+        html = get_menu_page(hall, date, fetch_cache, force)
+        return None if html is None else parse_menu(html, hall, date)
+
+    started = time.monotonic()
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(work) or 1))) as executor:
+            futures = {executor.submit(fetch, date, hall): (date, hall) for date, hall in work}
+            for future in as_completed(futures):
+                date, hall = futures[future]
+                remaining[date] -= 1
+                if future.exception() is None and future.result() is _LOCKED:
+                    continue
+                finished_at = datetime.now(timezone.utc)
+                checkpoint = {"status": "done", "items": 0, "finished_at": finished_at,
+                              "expires_at": finished_at + timedelta(hours=checkpoint_ttl_hours)}
+                try:
+                    items = future.result()
+                    if items is None:
+                        summary["unchanged"] += 1
+                    else:
+                        stats = ingest_items(date, {hall: items})
+                        fetch_cache.commit([menu_url(hall, date)])
+                        for key, count in stats["menus"].items():
+                            summary["menus"][key] += count
+                        summary["foods_inserted"] += stats["foods"]["inserted"]
+                        summary["scraped"] += 1
+                        summary["items"] += len(items)
+                        checkpoint["items"] = len(items)
+                        rec_nums.update(item["rec_num"] for item in items)
+                except Exception as e:
+                    print(f"Scrape of hall {hall} on {date} failed: {e}")
+                    summary["failed"] += 1
+                    checkpoint.update(status="failed", error=str(e))
+                checkpoints.update_one(
+                    {"run_id": run_id, "date": date, "dining_hall_id": hall},
+                    {"$set": checkpoint},
+                    upsert=True
+                )
+                if remaining[date]:
+                    renew_held()
+                else:
+                    release_date(date)
+    finally:
+        for date in list(held):
+            release_date(date)
+    summary["locked_dates"] = [date for date in dates if date in locked_dates]
+
+    elapsed = time.monotonic() - started
+    summary["elapsed_seconds"] = round(elapsed, 2)
+    summary["pages_per_second"] = round(len(work) / elapsed, 2) if elapsed and work else 0.0
+
+    if prefetch:
+        summary["nutrition_fetched"] = prefetch_nutrition(rec_nums, max_workers)
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scrape menus for a range of dates across all dining halls.")
+    parser.add_argument('start', help="first date, M/D/YYYY")
+    parser.add_argument('end', nargs='?', help="last date, M/D/YYYY (default: start)")
+    parser.add_argument('--days', type=int, help="number of days from start, instead of end")
+    parser.add_argument('--workers', type=int, default=BACKFILL_WORKERS)
+    parser.add_argument('--rate', type=float, default=BACKFILL_RATE_PER_SEC, help="max requests per second per host")
+    parser.add_argument('--force', action='store_true', help="ignore the fetch cache")
+    parser.add_argument('--restart', action='store_true', help="ignore checkpoints from an earlier run of this range")
+    parser.add_argument('--prefetch', action='store_true', help="fetch nutrition for the scraped foods")
+    args = parser.parse_args()
+
+    end = args.end or args.start
+    if args.days:
+        last = parse_date(args.start) + timedelta(days=args.days - 1)
+        end = f"{last.month}/{last.day}/{last.year}"
+
+    summary = scrape_range(date_range(args.start, end), args.workers, args.rate, args.force,
+                           restart=args.restart, prefetch=args.prefetch)
+    for key, value in summary.items():
+        print(f"{key:<18} {value}")
+    if summary["failed"]:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,205 @@
+"""Fan-out of /api/menu/events (feed.py) to many idle subscribers.
+
+Runs asgi.py on uvicorn in this process, opens --subscribers Server-Sent Events streams
+to one date and hall from an asyncio client (no thread per connection on either side),
+then changes a menu entry --rounds times and times how long each subscriber takes to get
+the diff. Each change is made two ways:
+
+    in_process   the write plus scraper.bump_menu_versions, as a scrape job in the same
+                 worker does; the feed hears of it on events.menu_changes
+    external     the write plus a bare menu_versions bump, as another worker, backfill.py
+                 or the Lambda does; the feed notices from its change stream or poll
+
+Also reports the server's thread count before and after the subscribers connect, which
+should not grow with them.
+
+Uses mongomock through mongomock-motor unless BENCH_MONGO_URI is set:
+
+    python benchmarks/bench_feed.py [--subscribers 2000 --rounds 5] [--json results.json]
+"""
+
+import argparse
+import asyncio
+import os
+import socket
+import statistics
+import sys
+import threading
+import time
+
+import httpx
+import uvicorn
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, ".."))
+
+from bench_routes import DATES, seed  # noqa: E402
+from mongo_standin import load_app  # noqa: E402
+from report import add_json_arg, write_json  # noqa: E402
+import database  # noqa: E402
+import scraper  # noqa: E402
+
+HALL = "19"
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(port):
+    import asgi
+
+    if not os.getenv("BENCH_MONGO_URI"):
+        from mongomock_motor import AsyncMongoMockClient
+
+        # The async side of the same in-memory database; nothing to close at shutdown
+        database._async_client = AsyncMongoMockClient(mock_mongo_client=database._client)
+        database._async_client.close = _noop
+    server = uvicorn.Server(uvicorn.Config(asgi.app, host="127.0.0.1", port=port, log_level="warning",
+                                           backlog=4096, timeout_keep_alive=60))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    return server, thread
+
+
+async def _noop():
+    pass
+
+
+class Subscribers:
+    """Arrival times of each event id, across all subscriber streams."""
+
+    def __init__(self):
+        self.arrivals = {}
+        self.changed = asyncio.Event()
+
+    async def listen(self, client, url):
+        async with client.stream("GET", url) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if line.startswith("id: "):
+                    self.arrivals.setdefault(line[4:], []).append(time.perf_counter())
+                    self.changed.set()
+
+    async def wait_for(self, event_id, count, timeout):
+        deadline = time.perf_counter() + timeout
+        while len(self.arrivals.get(event_id, ())) < count:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            self.changed.clear()
+            try:
+                await asyncio.wait_for(self.changed.wait(), remaining)
+            except asyncio.TimeoutError:
+                break
+        return self.arrivals.get(event_id, [])
+
+
+def change_menu(db, date, round_, in_process):
+    """Edit one of the hall's entries and bump the date's version. Returns the new version."""
+    entry = db.menus.find_one({"date": date, "dining_hall_id": HALL}, sort=[("rec_num", 1)])
+    db.menus.update_one({"_id": entry["_id"]}, {"$set": {"station": f"Special {round_}"}})
+    if in_process:
+        scraper.bump_menu_versions([date])
+    else:
+        db.menu_versions.update_one({"date": date}, {"$inc": {"version": 1}})
+    return db.menu_versions.find_one({"date": date})["version"]
+
+
+def latency_stats(samples, count):
+    samples = sorted(samples)
+    return {
+        "received": len(samples),
+        "missed": count - len(samples),
+        "p50_ms": round(statistics.median(samples) * 1000, 2) if samples else None,
+        "p99_ms": round(samples[int(len(samples) * 0.99) - 1] * 1000, 2) if samples else None,
+        "max_ms": round(samples[-1] * 1000, 2) if samples else None,
+    }
+
+
+async def drive(db, args, base_url):
+    import feed
+
+    date = DATES[0]
+    url = f"{base_url}/api/menu/events?date={date}&dining_hall_id={HALL}"
+    subscribers = Subscribers()
+    limits = httpx.Limits(max_connections=args.subscribers, max_keepalive_connections=args.subscribers)
+    async with httpx.AsyncClient(limits=limits, timeout=httpx.Timeout(args.timeout, read=None)) as client:
+        threads_before = threading.active_count()
+        start = time.perf_counter()
+        tasks = [asyncio.create_task(subscribers.listen(client, url)) for _ in range(args.subscribers)]
+        snapshot_id = str(db.menu_versions.find_one({"date": date})["version"])
+        connected = await subscribers.wait_for(snapshot_id, args.subscribers, args.timeout)
+        results = {
+            "subscribers": args.subscribers,
+            "connected": len(connected),
+            "connect_seconds": round(time.perf_counter() - start, 3),
+            "threads_before": threads_before,
+            "threads_connected": threading.active_count(),
+            "topics": len(feed.menu_feed.topics),
+        }
+
+        for mode in ("in_process", "external"):
+            samples = []
+            for round_ in range(args.rounds):
+                sent = time.perf_counter()
+                version = await asyncio.to_thread(change_menu, db, date, f"{mode}-{round_}", mode == "in_process")
+                arrivals = await subscribers.wait_for(str(version), args.subscribers, args.timeout)
+                samples += [arrival - sent for arrival in arrivals]
+            results[mode] = latency_stats(samples, args.subscribers * args.rounds)
+
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    return results
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--subscribers", type=int, default=2000)
+    parser.add_argument("--rounds", type=int, default=5, help="menu changes per write mode")
+    parser.add_argument("--poll-seconds", type=float, default=0.5, help="FEED_POLL_SECONDS for the run")
+    parser.add_argument("--timeout", type=float, default=30.0, help="seconds to wait for all subscribers")
+    parser.add_argument("--items-per-station", type=int, default=2)
+    add_json_arg(parser)
+    return parser
+
+
+def run(args):
+    import feed
+
+    _, db = load_app("bench_feed")
+    seed(db, args.items_per_station)
+    feed.FEED_POLL_SECONDS = args.poll_seconds
+    port = free_port()
+    server, thread = start_server(port)
+    try:
+        return asyncio.run(drive(db, args, f"http://127.0.0.1:{port}"))
+    finally:
+        server.should_exit = True
+        thread.join(10)
+
+
+def report(args, results):
+    print(f"{results['connected']}/{results['subscribers']} subscribers connected in {results['connect_seconds']:.2f}s, "
+          f"threads {results['threads_before']} -> {results['threads_connected']}, {results['topics']} topic(s)")
+    print(f"{'write':<12}{'received':>10}{'missed':>8}{'p50 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for mode in ("in_process", "external"):
+        r = results[mode]
+        print(f"{mode:<12}{r['received']:>10}{r['missed']:>8}{r['p50_ms']!s:>10}{r['p99_ms']!s:>10}{r['max_ms']!s:>10}")
+
+
+def main():
+    args = build_parser().parse_args()
+    results = run(args)
+    report(args, results)
+    if args.json:
+        write_json(args.json, {"bench_feed": (args, results)})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+"""Label fetches and stored foods under rec_num churn, with and without identity.py.
+
+Simulates --weeks of menus for every hall, drawn from --dishes dishes with unique names.
+Each week a --churn fraction of the dishes is served under a new rec_num (new number and
+port), as the upstream site does when recipes are re-keyed. A --relabel fraction of those
+also changes its label under the new rec_num (a changed recipe), and must not be merged
+with the old one. Each day is ingested with scraper.ingest_items and its pending labels are
+stored with scraper.store_nutrition (generated labels, no HTTP), in three modes:
+
+    legacy      no merging, as before identity.py; then compacted with identity.compact()
+    labels      the default: a new rec_num is merged once its label matches a food's
+    by_name     FOOD_ALIAS_BY_NAME=1: new rec_nums of a known name are aliased at ingest
+
+and reports the label fetches, foods, search index entries and foods storage of each, how
+many labels served in a meal differ from the dishes' own, and how many relabelled rec_nums
+were merged into another food. Exits non-zero if legacy, labels or compacted serve a wrong
+label or merge a relabelled rec_num (by_name is expected to, and is only reported).
+
+    python benchmarks/bench_identity.py [--weeks 8 --dishes 300 --churn 0.2 --relabel 0.25] [--json results.json]
+"""
+
+import argparse
+import os
+import random
+import sys
+from datetime import date, timedelta
+from unittest import mock
+
+import bson
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from bench_search import ADJECTIVES, EXTRAS  # noqa: E402
+from fake_upstream import DISHES, MEAL_PERIODS, STATIONS, generate_label_html  # noqa: E402
+from mongo_standin import load_app  # noqa: E402
+from nutrition import label_hash  # noqa: E402
+from parsers import parse_nutrition_label  # noqa: E402
+from report import add_json_arg, write_json  # noqa: E402
+from search import SearchIndex  # noqa: E402
+import identity  # noqa: E402
+import ingest  # noqa: E402
+import scraper  # noqa: E402
+
+MODES = ("legacy", "labels", "by_name")
+
+
+def dish_names(count, rng):
+    names = {f"{a} {d} {e}" for a in ADJECTIVES for d in DISHES for e in EXTRAS}
+    return rng.sample(sorted(names), count)
+
+
+def label(seed):
+    """A parsed label; rec_nums with the same seed have the same label."""
+    return parse_nutrition_label(generate_label_html(f"{seed:06d}*1"))
+
+
+def schedule(args):
+    """([(date, {hall: items})] for every day, rec_num -> label seed, relabelled rec_nums)."""
+    rng = random.Random(args.seed)
+    names = dish_names(args.dishes, rng)
+    current = {dish: f"{dish:06d}*{rng.randint(1, 4)}" for dish in range(args.dishes)}
+    label_of = {rec_num: dish for dish, rec_num in current.items()}
+    relabelled = set()
+    next_number = args.dishes
+    start = date(2026, 1, 20)
+    days = []
+    for day in range(args.weeks * 7):
+        if day and day % 7 == 0:
+            for dish in rng.sample(range(args.dishes), int(args.dishes * args.churn)):
+                rec_num = f"{next_number:06d}*{rng.randint(1, 4)}"
+                if rng.random() < args.relabel:
+                    # A changed recipe: a label no other rec_num has
+                    label_of[rec_num] = next_number
+                    relabelled.add(rec_num)
+                else:
+                    label_of[rec_num] = label_of[current[dish]]
+                current[dish] = rec_num
+                next_number += 1
+        items_by_hall = {}
+        for hall in scraper.DINING_HALLS:
+            items_by_hall[hall] = [
+                {"rec_num": current[dish], "name": names[dish], "meal_period": meal, "station": station,
+                 "dietary_icons": []}
+                for meal in MEAL_PERIODS
+                for station in STATIONS
+                for dish in rng.sample(range(args.dishes), args.items_per_station)
+            ]
+        days.append((f"{(start + timedelta(days=day)):%-m/%-d/%Y}", items_by_hall))
+    return days, label_of, relabelled
+
+
+def measure(db, expected, relabelled):
+    index = SearchIndex()
+    index.load(db)
+    foods = {doc["rec_num"]: doc for doc in db.foods.find({}, {"_id": 0})}
+    served = {}
+    for entry in db.menus.find({}, {"_id": 0}):
+        key = entry["date"], entry["dining_hall_id"], entry["meal_period"]
+        served.setdefault(key, set()).add(foods.get(entry["rec_num"], {}).get("label_hash"))
+    wrong = sum(len(labels ^ served.get(key, set())) for key, labels in expected.items())
+    return {
+        "foods": len(foods),
+        "foods_kb": round(sum(len(bson.encode(doc)) for doc in foods.values()) / 1024, 1),
+        "index_entries": len(index.names),
+        "index_postings": sum(len(rec_nums) for rec_nums in index.postings.values()),
+        "wrong_labels": wrong,
+        "relabelled_merged": db.food_aliases.count_documents({"rec_num": {"$in": sorted(relabelled)}}),
+    }
+
+
+def simulate(name, days, label_of, relabelled, mode):
+    _, db = load_app(name)
+    labels = {}
+
+    def stored_label(rec_num):
+        seed = label_of[rec_num]
+        if seed not in labels:
+            labels[seed] = label(seed)
+        return labels[seed]
+
+    # (date, hall, meal) -> label_hashes of the dishes served
+    expected = {}
+    fetches = 0
+    merging = (mock.patch.object(ingest, "merge_fetched", lambda db, rec_num: None) if mode == "legacy"
+               else mock.patch.object(identity, "FOOD_ALIAS_BY_NAME", mode == "by_name"))
+    with merging:
+        for day, items_by_hall in days:
+            # ingest_items rewrites rec_nums in place, so each mode gets its own copies
+            fresh = {hall: [dict(item) for item in items] for hall, items in items_by_hall.items()}
+            scraper.ingest_items(day, fresh)
+            for hall, items in items_by_hall.items():
+                for item in items:
+                    data = stored_label(item["rec_num"])
+                    nutrition = {k: v for k, v in data.items() if k not in ("ingredients", "allergens")}
+                    digest = label_hash(nutrition, data.get("allergens", ""), data.get("ingredients", ""))
+                    expected.setdefault((day, hall, item["meal_period"]), set()).add(digest)
+            for rec_num in scraper.find_pending_nutrition({item["rec_num"] for items in fresh.values() for item in items}):
+                scraper.store_nutrition(rec_num, stored_label(rec_num))
+                fetches += 1
+        results = {"label_fetches": fetches, **measure(db, expected, relabelled)}
+        if mode == "legacy":
+            compacted = identity.compact(db)
+            results["compacted"] = {"merged": compacted["merged"], "dates": len(compacted["dates"]),
+                                    **measure(db, expected, relabelled)}
+    return results
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--weeks", type=int, default=8)
+    parser.add_argument("--dishes", type=int, default=300)
+    parser.add_argument("--churn", type=float, default=0.2, help="fraction of dishes re-keyed each week")
+    parser.add_argument("--relabel", type=float, default=0.25, help="fraction of re-keyed dishes whose label changes")
+    parser.add_argument("--items-per-station", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=7)
+    add_json_arg(parser)
+    return parser
+
+
+def run(args):
+    days, label_of, relabelled = schedule(args)
+    results = {"rec_nums": len(label_of), "relabelled": len(relabelled)}
+    for mode in MODES:
+        results[mode] = simulate(f"bench_identity_{mode}", days, label_of, relabelled, mode)
+    return results
+
+
+def failures(results):
+    """Rows of the label-checked modes that served a wrong label or merged a relabelled rec_num."""
+    rows = {"legacy": results["legacy"], "labels": results["labels"], "compacted": results["legacy"]["compacted"]}
+    return [name for name, row in rows.items() if row["wrong_labels"] or row["relabelled_merged"]]
+
+
+def report(args, results):
+    print(f"{args.dishes} dishes under {results['rec_nums']} rec_nums over {args.weeks} weeks, "
+          f"{results['relabelled']} relabelled")
+    print(f"{'mode':<12}{'fetches':>9}{'foods':>8}{'foods KB':>10}{'index':>8}{'postings':>10}{'wrong':>7}"
+          f"{'relabelled merged':>19}")
+    rows = [(mode, results[mode]) for mode in MODES] + [("compacted", results["legacy"]["compacted"])]
+    for name, row in rows:
+        print(f"{name:<12}{row.get('label_fetches', ''):>9}{row['foods']:>8}{row['foods_kb']:>10}"
+              f"{row['index_entries']:>8}{row['index_postings']:>10}{row['wrong_labels']:>7}"
+              f"{row['relabelled_merged']:>19}")
+    compacted = results["legacy"]["compacted"]
+    print(f"compaction merged {compacted['merged']} foods, rewrote menus on {compacted['dates']} dates")
+
+
+def main():
+    args = build_parser().parse_args()
+    results = run(args)
+    report(args, results)
+    if args.json:
+        write_json(args.json, {"bench_identity": (args, results)})
+    failed = failures(results)
+    if failed:
+        sys.exit(f"wrong labels or merged relabelled dishes in: {', '.join(failed)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""Memory held by a semester of menus: driver dicts vs the slotted records in models.py.
+
+Generates a semester of menu entries (every hall, every day) and the foods they serve,
+with labels parsed the way the scraper stores them, and round-trips each document through
+BSON so the dicts are shaped like the ones pymongo returns. Then measures the Python heap
+held by:
+
+    dicts     the decoded documents as they are
+    records   the same documents as MenuEntry / Food records, as the /api/menu joins load
+              menus (models.menu_records) and catalog.py holds foods
+
+with tracemalloc, plus the time to convert, and checks the records convert back to the
+same documents (less the food fields the catalog doesn't keep).
+
+    python benchmarks/bench_memory.py [--days 120 --foods 1500] [--json results.json]
+"""
+
+import argparse
+import gc
+import os
+import random
+import sys
+import time
+import tracemalloc
+from datetime import date, datetime, timedelta, timezone
+
+import bson
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from fake_upstream import DISHES, ICONS, MEAL_PERIODS, STATIONS, generate_label_html  # noqa: E402
+from models import Food, menu_records  # noqa: E402
+from nutrition import parsed_fields  # noqa: E402
+from parsers import parse_nutrition_label  # noqa: E402
+from report import add_json_arg, write_json  # noqa: E402
+from scraper import DINING_HALLS  # noqa: E402
+
+
+def food_doc(rec_num, rng):
+    """A foods document as store_nutrition writes it."""
+    label = parse_nutrition_label(generate_label_html(rec_num))
+    nutrition = {k: v for k, v in label.items() if k not in ("ingredients", "allergens")}
+    doc = {
+        "rec_num": rec_num,
+        "name": f"{rng.choice(DISHES)} {rng.choice(DISHES)} {rec_num[:-2]}",
+        "nutrition_fetched": True,
+        "nutrition": nutrition,
+        "allergens": label.get("allergens", ""),
+        "ingredients": label.get("ingredients", ""),
+        "updated_at": datetime.now(timezone.utc),
+    }
+    doc.update(parsed_fields(nutrition, doc["allergens"], doc["ingredients"]))
+    return doc
+
+
+def semester(args):
+    """(menu entries, foods) documents for args.days days of every hall's menus."""
+    rng = random.Random(args.seed)
+    rec_nums = [f"{i:06d}*{rng.randint(1, 4)}" for i in range(args.foods)]
+    foods = [food_doc(rec_num, rng) for rec_num in rec_nums]
+    start = date(2026, 1, 20)
+    entries = []
+    for day in range(args.days):
+        day_str = f"{(start + timedelta(days=day)):%-m/%-d/%Y}"
+        for hall in DINING_HALLS:
+            for meal in MEAL_PERIODS:
+                for station in STATIONS:
+                    for rec_num in rng.sample(rec_nums, args.items_per_station):
+                        entries.append({
+                            "rec_num": rec_num, "dining_hall_id": hall, "date": day_str, "meal_period": meal,
+                            "station": station, "dietary_icons": rng.sample(ICONS, rng.randint(0, 3)),
+                        })
+    return entries, foods
+
+
+def measure(build):
+    """(value build() returns, Python heap bytes it holds, seconds it took)."""
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    value = build()
+    seconds = time.perf_counter() - start
+    gc.collect()
+    held, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return value, held, seconds
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--days", type=int, default=120, help="days of menus (a semester by default)")
+    parser.add_argument("--foods", type=int, default=1500, help="distinct foods served over the semester")
+    parser.add_argument("--items-per-station", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=7)
+    add_json_arg(parser)
+    return parser
+
+
+def run(args):
+    entry_docs, food_docs = semester(args)
+    entry_bytes = [bson.encode(doc) for doc in entry_docs]
+    food_bytes = [bson.encode(doc) for doc in food_docs]
+    del entry_docs, food_docs
+
+    def as_dicts():
+        # What pymongo returns: every string and container decoded separately
+        return [bson.decode(raw) for raw in entry_bytes], [bson.decode(raw) for raw in food_bytes]
+
+    def as_records():
+        # One document decoded at a time, as models.menu_records() and catalog.load() read a cursor
+        return (menu_records(bson.decode(raw) for raw in entry_bytes),
+                [Food.from_doc(bson.decode(raw)) for raw in food_bytes])
+
+    (dict_entries, dict_foods), dict_held, dict_seconds = measure(as_dicts)
+    (record_entries, record_foods), record_held, record_seconds = measure(as_records)
+
+    # Foods keep only the fields /api/menu joins (Food.__slots__)
+    same = (all(record.to_dict() == doc for record, doc in zip(record_entries, dict_entries))
+            and all(record.to_dict() == {k: v for k, v in doc.items() if k in Food.__slots__}
+                    for record, doc in zip(record_foods, dict_foods)))
+    mb = 1024 * 1024
+    return {
+        "menu_entries": len(dict_entries),
+        "foods": len(dict_foods),
+        "dicts": {"held_mb": round(dict_held / mb, 2), "bytes_per_entry": round(dict_held / len(dict_entries)),
+                  "build_seconds": round(dict_seconds, 3)},
+        "records": {"held_mb": round(record_held / mb, 2), "bytes_per_entry": round(record_held / len(dict_entries)),
+                    "build_seconds": round(record_seconds, 3)},
+        "reduction": round(1 - record_held / dict_held, 3),
+        "round_trip_ok": same,
+    }
+
+
+def report(args, results):
+    print(f"{results['menu_entries']} menu entries over {args.days} days, {results['foods']} foods")
+    print(f"{'form':<10}{'held MB':>10}{'B/entry':>10}{'build s':>10}")
+    for name in ("dicts", "records"):
+        row = results[name]
+        print(f"{name:<10}{row['held_mb']:>10.2f}{row['bytes_per_entry']:>10}{row['build_seconds']:>10.2f}")
+    print(f"records hold {results['reduction']:.0%} less; round trip {'ok' if results['round_trip_ok'] else 'MISMATCH'}")
+
+
+def main():
+    args = build_parser().parse_args()
+    results = run(args)
+    report(args, results)
+    if args.json:
+        write_json(args.json, {"bench_memory": (args, results)})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""Parity check and micro-benchmark for the parser engines in parsers.py.
+
+Every engine must return exactly the same items (compared as serialized JSON, so key
+order counts) as html.parser on each saved fixture and on generated pages, including
+the no-tab-pane fallback. Then each engine parses the same workload in a fresh process
+and reports pages/sec and peak memory.
+
+    pip install -r benchmarks/requirements.txt
+    python benchmarks/bench_parsers.py --pages 200 [--json results.json]
+"""
+
+import argparse
+import glob
+import json
+import multiprocessing
+import os
+import resource
+import sys
+import time
+import tracemalloc
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, ".."))
+
+import parsers  # noqa: E402
+from fake_upstream import generate_label_html, generate_menu_html, menu_rec_nums  # noqa: E402
+from report import add_json_arg, write_json  # noqa: E402
+
+
+def fixtures():
+    """(kind, name, html) for saved fixtures plus a few generated pages."""
+    pages = []
+    for path in sorted(glob.glob(os.path.join(HERE, "fixtures", "*.html"))):
+        with open(path, encoding="utf-8") as f:
+            kind = "label" if os.path.basename(path).startswith("label") else "menu"
+            pages.append((kind, os.path.basename(path), f.read()))
+    pages.append(("menu", "generated menu", generate_menu_html("19", "1/15/2026")))
+    pages.append(("label", "generated label", generate_label_html("190001*3")))
+    return pages
+
+
+def parse(kind, html, engine):
+    if kind == "menu":
+        return parsers.parse_menu_page(html, "19", "1/15/2026", engine)
+    return parsers.parse_nutrition_label(html, engine)
+
+
+def check_parity(engines):
+    failures = 0
+    for kind, name, html in fixtures():
+        expected = json.dumps(parse(kind, html, "html.parser"))
+        for engine in engines:
+            if json.dumps(parse(kind, html, engine)) != expected:
+                print(f"MISMATCH {engine}: {name}")
+                failures += 1
+    return failures
+
+
+def workload(pages):
+    menus = [generate_menu_html(str(i % 3), f"1/{i % 28 + 1}/2026") for i in range(pages)]
+    labels = [generate_label_html(rec_num) for rec_num in menu_rec_nums("19")[:pages]]
+    return menus, labels
+
+
+def measure(engine, pages, queue):
+    # Runs in a fresh process so peak RSS belongs to this engine alone
+    menus, labels = workload(pages)
+    baseline_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    start = time.perf_counter()
+    for html in menus:
+        parsers.parse_menu_page(html, "19", "1/15/2026", engine)
+    menu_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for html in labels:
+        parsers.parse_nutrition_label(html, engine)
+    label_seconds = time.perf_counter() - start
+
+    rss_growth = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - baseline_rss
+
+    # Python-heap peak for a single menu page (tracemalloc would skew the timings above)
+    tracemalloc.start()
+    parsers.parse_menu_page(menus[0], "19", "1/15/2026", engine)
+    _, python_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    if sys.platform != "darwin":
+        rss_growth *= 1024  # Linux reports KB
+    queue.put({
+        "menu_pages_per_sec": round(len(menus) / menu_seconds, 1),
+        "label_pages_per_sec": round(len(labels) / label_seconds, 1),
+        "python_peak_mb": round(python_peak / 2**20, 2),
+        "rss_growth_mb": round(rss_growth / 2**20, 2),
+    })
+
+
+def available_engines():
+    engines = list(parsers.ENGINES)
+    try:
+        import lxml  # noqa: F401
+    except ImportError:
+        engines.remove("lxml")
+        print("lxml not installed, skipping the lxml engine")
+    return engines
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, default=100, help="menu and label pages parsed per engine")
+    add_json_arg(parser)
+    return parser
+
+
+def run(args):
+    engines = available_engines()
+    failures = check_parity(engines)
+    if failures:
+        sys.exit(f"{failures} parity failure(s)")
+    print(f"parity OK for {', '.join(engines)}")
+
+    ctx = multiprocessing.get_context("spawn")
+    results = {}
+    for engine in engines:
+        queue = ctx.Queue()
+        proc = ctx.Process(target=measure, args=(engine, args.pages, queue))
+        proc.start()
+        results[engine] = queue.get()
+        proc.join()
+    return results
+
+
+def report(args, results):
+    print(f"{'engine':<14}{'menus/s':>10}{'labels/s':>10}{'page py MB':>12}{'rss MB':>9}")
+    for engine, result in results.items():
+        print(f"{engine:<14}{result['menu_pages_per_sec']:>10}{result['label_pages_per_sec']:>10}"
+              f"{result['python_peak_mb']:>12}{result['rss_growth_mb']:>9}")
+
+
+def main():
+    args = build_parser().parse_args()
+    results = run(args)
+    report(args, results)
+    if args.json:
+        write_json(args.json, {"bench_parsers": (args, results)})
+
+
+if __name__ == "__main__":
+    main()
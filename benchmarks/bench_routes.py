@@ -0,0 +1,158 @@
+"""Route throughput and latency for /api/menu, /api/search and /api/nutrition under concurrent load.
+
+Seeds the database by scraping a few dates (with nutrition) from the local fake
+nutrition.umd.edu, serves the Flask app from a threaded WSGI server on 127.0.0.1 and
+drives each route from --concurrency client threads, each with its own keep-alive session.
+Reports requests/sec and p50/p95/p99 latency per route.
+
+Server and clients share one process (and, with mongomock, the database too), so the
+numbers are for comparing runs on the same machine, not for capacity planning.
+
+    pip install -r benchmarks/requirements.txt
+    python benchmarks/bench_routes.py --concurrency 8 --requests 500 [--no-cache] [--json results.json]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+
+import requests
+from werkzeug.serving import WSGIRequestHandler, make_server
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import ingest  # noqa: E402
+import scraper  # noqa: E402
+from cache import menu_cache  # noqa: E402
+from fake_upstream import FakeUpstream  # noqa: E402
+from mongo_standin import load_app  # noqa: E402
+from report import add_json_arg, write_json  # noqa: E402
+from snapshots import snapshots  # noqa: E402
+
+DATES = ["1/15/2026", "1/16/2026", "1/17/2026"]
+SEARCH_QUERIES = ["chicken", "rice", "pasta cur", "tofu", "beef soup", "cooki", "pancakes", "curyr"]
+
+
+def seed(db, items_per_station):
+    rate = ingest.upstream.bucket.rate
+    # Seeding from the local fake upstream needn't wait on the production rate limit
+    ingest.upstream.bucket.rate = 0
+    try:
+        with FakeUpstream(0, 0, items_per_station) as upstream:
+            ingest.BASE_URL = upstream.base_url
+            for date in DATES:
+                scraper.scrape_all_dining_halls(date, prefetch=True)
+    finally:
+        ingest.upstream.bucket.rate = rate
+    return db.foods.distinct("rec_num")
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_request(self, *args):
+        pass
+
+
+def route_paths(halls, rec_nums):
+    return {
+        "menu": [f"/api/menu?date={d}&dining_hall_id={h}" for d in DATES for h in halls] + [f"/api/menu?date={d}" for d in DATES],
+        "search": [f"/api/search?q={q}" for q in SEARCH_QUERIES],
+        "nutrition": [f"/api/nutrition?rec_num={r}" for r in rec_nums[:50]],
+    }
+
+
+def load(base_url, paths, total, concurrency):
+    """Issue total requests cycling through paths from concurrency threads."""
+    latencies = []
+    errors = 0
+    counter = iter(range(total))
+    lock = threading.Lock()
+
+    def worker():
+        nonlocal errors
+        session = requests.Session()
+        while True:
+            with lock:
+                i = next(counter, None)
+            if i is None:
+                return
+            start = time.perf_counter()
+            try:
+                ok = session.get(base_url + paths[i % len(paths)], timeout=30).status_code == 200
+            except requests.RequestException:
+                ok = False
+            elapsed = (time.perf_counter() - start) * 1000
+            with lock:
+                latencies.append(elapsed)
+                errors += not ok
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    quantiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+    return {
+        "requests": total,
+        "errors": errors,
+        "rps": round(total / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies), 2),
+        "p95_ms": round(quantiles[94], 2),
+        "p99_ms": round(quantiles[98], 2),
+    }
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concurrency", type=int, default=8, help="client threads per route")
+    parser.add_argument("--requests", type=int, default=500, help="requests per route")
+    parser.add_argument("--items-per-station", type=int, default=4)
+    parser.add_argument("--no-cache", action="store_true", help="disable the /api/menu response cache and snapshots")
+    add_json_arg(parser)
+    return parser
+
+
+def run(args):
+    app, db = load_app()
+    rec_nums = seed(db, args.items_per_station)
+    if args.no_cache:
+        menu_cache.max_entries = 0
+        snapshots.enabled = False
+
+    server = make_server("127.0.0.1", 0, app, threaded=True, request_handler=QuietHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    base_url = f"http://127.0.0.1:{server.server_port}"
+    try:
+        paths = route_paths(list(scraper.DINING_HALLS), rec_nums)
+        results = {route: load(base_url, route_paths_, args.requests, args.concurrency)
+                   for route, route_paths_ in paths.items()}
+    finally:
+        server.shutdown()
+    results["foods"] = len(rec_nums)
+    return results
+
+
+def report(args, results):
+    print(f"{results['foods']} foods, {args.concurrency} clients, {args.requests} requests per route")
+    print(f"{'route':<11}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'errors':>8}")
+    for route in ("menu", "search", "nutrition"):
+        r = results[route]
+        print(f"{route:<11}{r['rps']:>9}{r['p50_ms']:>9}{r['p95_ms']:>9}{r['p99_ms']:>9}{r['errors']:>8}")
+
+
+def main():
+    args = build_parser().parse_args()
+    results = run(args)
+    report(args, results)
+    if args.json:
+        write_json(args.json, {"bench_routes": (args, results)})
+
+
+if __name__ == "__main__":
+    main()
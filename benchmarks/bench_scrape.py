@@ -0,0 +1,99 @@
+"""Offline benchmark: serial vs concurrent scrape + nutrition backfill.
+
+Runs scrape_all_dining_halls(prefetch=True) against a local fake nutrition.umd.edu
+with an in-memory Mongo (see mongo_standin.py). The baseline mode mirrors the old behavior:
+one hall at a time with a fresh connection per request. A final run re-scrapes the
+same date with the fetch cache warm, where unchanged pages should cost one 304 each.
+
+    pip install -r benchmarks/requirements.txt
+    python benchmarks/bench_scrape.py --latency 0.05 --workers 8 [--json results.json]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import ingest  # noqa: E402
+import scraper  # noqa: E402
+from fake_upstream import FakeUpstream  # noqa: E402
+from mongo_standin import make_db  # noqa: E402
+from report import add_json_arg, write_json  # noqa: E402
+from snapshots import snapshots  # noqa: E402
+
+
+def scrape_once(upstream, date, workers, pooled, fresh=True):
+    if fresh:
+        scraper.db = make_db()
+        scraper.fetch_cache = scraper.FetchCache(scraper.db.fetch_cache)
+    # Baseline uses bare requests.get, which opens a new connection every call
+    ingest.upstream.session = pooled if pooled else requests
+    upstream.requests = upstream.connections = 0
+
+    start = time.perf_counter()
+    items, _ = scraper.scrape_all_dining_halls(date, max_workers=workers, prefetch=True)
+    elapsed = time.perf_counter() - start
+
+    return {
+        "items": len(items),
+        "labels": scraper.db.foods.count_documents({"nutrition_fetched": True}),
+        "requests": upstream.requests,
+        "connections": upstream.connections,
+        "seconds": round(elapsed, 3),
+    }
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--latency", type=float, default=0.05, help="per-request server latency (s)")
+    parser.add_argument("--connect-latency", type=float, default=0.03, help="per-connection setup latency (s)")
+    parser.add_argument("--items-per-station", type=int, default=4)
+    parser.add_argument("--workers", type=int, default=scraper.SCRAPE_MAX_WORKERS)
+    add_json_arg(parser)
+    return parser
+
+
+def run(args):
+    with FakeUpstream(args.latency, args.connect_latency, args.items_per_station) as upstream:
+        ingest.BASE_URL = upstream.base_url
+        pooled, rate, enabled = ingest.upstream.session, ingest.upstream.bucket.rate, snapshots.enabled
+        # The fake upstream is local: measure the scraper, not the production rate limit. Snapshots
+        # are keyed by the app's database, which scrape_once's bare databases bypass.
+        ingest.upstream.bucket.rate, snapshots.enabled = 0, False
+        try:
+            serial = scrape_once(upstream, "1/15/2026", 1, None)
+            concurrent = scrape_once(upstream, "1/15/2026", args.workers, pooled)
+            rescrape = scrape_once(upstream, "1/15/2026", args.workers, pooled, fresh=False)
+        finally:
+            ingest.upstream.session, ingest.upstream.bucket.rate, snapshots.enabled = pooled, rate, enabled
+    return {
+        "serial": serial,
+        "concurrent": concurrent,
+        "rescrape": rescrape,
+        "speedup": round(serial["seconds"] / concurrent["seconds"], 2),
+    }
+
+
+def report(args, results):
+    print(f"{'mode':<12}{'items':>8}{'labels':>8}{'requests':>10}{'conns':>8}{'seconds':>10}")
+    for name, key in (("serial", "serial"), (f"pooled x{args.workers}", "concurrent"), ("re-scrape", "rescrape")):
+        result = results[key]
+        print(f"{name:<12}{result['items']:>8}{result['labels']:>8}{result['requests']:>10}"
+              f"{result['connections']:>8}{result['seconds']:>10}")
+    print(f"speedup: {results['speedup']:.1f}x")
+
+
+def main():
+    args = build_parser().parse_args()
+    results = run(args)
+    report(args, results)
+    if args.json:
+        write_json(args.json, {"bench_scrape": (args, results)})
+
+
+if __name__ == "__main__":
+    main()
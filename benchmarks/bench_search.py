@@ -0,0 +1,103 @@
+"""Search latency: the old unanchored $regex scan vs the in-memory token index.
+
+Loads a synthetic foods collection, then times the same queries through both paths,
+each including the foods fetch for the top 50 results, and reports p50/p99. The
+"lookup" row is the index alone, without the fetch.
+
+With mongomock the regex path is a Python scan rather than the server's, so absolute
+numbers are only meaningful against a real mongod:
+
+    BENCH_MONGO_URI=mongodb://localhost:27017 python benchmarks/bench_search.py --foods 50000 [--json results.json]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from search import SearchIndex  # noqa: E402
+from fake_upstream import DISHES  # noqa: E402
+from mongo_standin import make_db  # noqa: E402
+from report import add_json_arg, write_json  # noqa: E402
+
+ADJECTIVES = ["Grilled", "Roasted", "Spicy", "Garlic", "Lemon", "Honey", "Baked", "Crispy", "Creamy", "Smoked"]
+EXTRAS = ["Bowl", "Wrap", "Sandwich", "Platter", "Skewer", "Stir Fry", "Casserole", "Bites", "Melt", "Pie"]
+QUERIES = ["chicken", "rice bowl", "spicy", "grilled chick", "pasta", "lemn", "tofu stir", "cookie", "beef wrap", "soup"]
+
+
+def synthetic_foods(count, seed=7):
+    rng = random.Random(seed)
+    # A few thousand made-up words stand in for the long tail of real dish names
+    vocabulary = ["".join(rng.choice("aeioubcdfghlmnprst") for _ in range(rng.randint(4, 9))) for _ in range(3000)]
+    for i in range(count):
+        name = f"{rng.choice(ADJECTIVES)} {rng.choice(vocabulary).title()} {rng.choice(DISHES)} {rng.choice(EXTRAS)}"
+        yield {"rec_num": f"{i:06d}*1", "name": name, "nutrition": {}, "nutrition_fetched": False}
+
+
+def percentile(samples, pct):
+    return statistics.quantiles(samples, n=100)[pct - 1] if len(samples) > 1 else samples[0]
+
+
+def time_queries(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        for query in QUERIES:
+            start = time.perf_counter()
+            fn(query)
+            samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--foods", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    add_json_arg(parser)
+    return parser
+
+
+def run(args):
+    db = make_db("bench_search")
+    db.foods.insert_many(list(synthetic_foods(args.foods)))
+    db.foods.create_index("rec_num", unique=True)
+
+    def regex_search(query):
+        return list(db.foods.find({"name": {"$regex": query, "$options": "i"}}, {"_id": 0}).limit(50))
+
+    start = time.perf_counter()
+    index = SearchIndex()
+    index.load(db)
+    build_seconds = time.perf_counter() - start
+
+    def index_search(query):
+        ranked = index.search(query)[:50]
+        return list(db.foods.find({"rec_num": {"$in": ranked}}, {"_id": 0}))
+
+    results = {"foods": args.foods, "tokens": len(index.postings), "build_seconds": round(build_seconds, 3)}
+    for name, fn in (("regex", regex_search), ("index", index_search), ("lookup", index.search)):
+        samples = time_queries(fn, args.repeat)
+        results[name] = {"p50_ms": round(statistics.median(samples), 3), "p99_ms": round(percentile(samples, 99), 3)}
+    return results
+
+
+def report(args, results):
+    print(f"{results['foods']} foods, index built in {results['build_seconds']:.2f}s, {results['tokens']} tokens")
+    print(f"{'path':<8}{'p50 ms':>10}{'p99 ms':>10}")
+    for name in ("regex", "index", "lookup"):
+        print(f"{name:<8}{results[name]['p50_ms']:>10.2f}{results[name]['p99_ms']:>10.2f}")
+
+
+def main():
+    args = build_parser().parse_args()
+    results = run(args)
+    report(args, results)
+    if args.json:
+        write_json(args.json, {"bench_search": (args, results)})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""Load-test comparison of the two serving modes: Flask on gunicorn vs asgi.py on uvicorn.
+
+Seeds a real MongoDB (the async driver and the multi-process servers can't share
+mongomock) by scraping a few dates from the local fake nutrition.umd.edu, then starts
+each server as it runs in production, with the same number of worker processes, and
+drives /api/menu, /api/search and /api/nutrition at each --concurrency level with the
+client from bench_routes.py. --no-cache turns off the /api/menu response cache and
+snapshots so every menu request reaches MongoDB.
+
+The load generator is one Python process; at high concurrency check that it isn't the
+bottleneck (its CPU at 100%) before reading much into the ceiling.
+
+    pip install -r benchmarks/requirements.txt
+    BENCH_MONGO_URI=mongodb://localhost:27017 python benchmarks/bench_serving.py --workers 3 --concurrency 8 64 [--json results.json]
+"""
+
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import time
+
+import requests
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.join(HERE, "..")
+sys.path.insert(0, ROOT)
+
+from bench_routes import load, route_paths, seed  # noqa: E402
+from mongo_standin import load_app  # noqa: E402
+from report import add_json_arg, write_json  # noqa: E402
+import scraper  # noqa: E402
+
+SERVERS = {
+    # The Procfile's setup, with --threads added so both modes can take concurrent requests per worker
+    "flask": lambda port, args: ["gunicorn", "application:application", "--bind", f"127.0.0.1:{port}",
+                                 "--workers", str(args.workers), "--threads", str(args.threads)],
+    "asgi": lambda port, args: ["uvicorn", "asgi:app", "--host", "127.0.0.1", "--port", str(port),
+                                "--workers", str(args.workers), "--no-access-log"],
+}
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(name, args):
+    port = free_port()
+    env = dict(os.environ, MENU_CACHE_SIZE="0" if args.no_cache else os.getenv("MENU_CACHE_SIZE", "256"),
+               MENU_SNAPSHOTS="0" if args.no_cache else os.getenv("MENU_SNAPSHOTS", "1"),
+               NUTRITION_SWEEP_SECONDS="0")
+    proc = subprocess.Popen(SERVERS[name](port, args), cwd=ROOT, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            if requests.get(base_url + "/ready", timeout=1).status_code == 200:
+                return proc, base_url
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+    proc.kill()
+    sys.exit(f"{name} server didn't become ready on port {port}")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--servers", nargs="+", choices=SERVERS, default=list(SERVERS))
+    parser.add_argument("--workers", type=int, default=3, help="server processes (the Procfile runs 3)")
+    parser.add_argument("--threads", type=int, default=4, help="threads per gunicorn worker")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[8, 64], help="client threads per route")
+    parser.add_argument("--requests", type=int, default=1000, help="requests per route and concurrency level")
+    parser.add_argument("--items-per-station", type=int, default=4)
+    parser.add_argument("--no-cache", action="store_true", help="disable the /api/menu response cache and snapshots")
+    add_json_arg(parser)
+    return parser
+
+
+def run(args):
+    if not os.getenv("BENCH_MONGO_URI"):
+        sys.exit("bench_serving.py needs a real MongoDB: set BENCH_MONGO_URI")
+
+    _, db = load_app("bench_serving")
+    rec_nums = seed(db, args.items_per_station)
+    paths = route_paths(list(scraper.DINING_HALLS), rec_nums)
+
+    results = {"foods": len(rec_nums)}
+    for name in args.servers:
+        proc, base_url = start_server(name, args)
+        try:
+            results[name] = {
+                f"c{concurrency}": {route: load(base_url, route_paths_, args.requests, concurrency)
+                                    for route, route_paths_ in paths.items()}
+                for concurrency in args.concurrency
+            }
+        finally:
+            proc.terminate()
+            proc.wait()
+    return results
+
+
+def report(args, results):
+    print(f"{results['foods']} foods, {args.workers} workers, {args.requests} requests per route")
+    print(f"{'server':<8}{'clients':>8}  {'route':<11}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'errors':>8}")
+    for name in args.servers:
+        for concurrency in args.concurrency:
+            for route, r in results[name][f"c{concurrency}"].items():
+                print(f"{name:<8}{concurrency:>8}  {route:<11}{r['rps']:>9}{r['p50_ms']:>9}{r['p95_ms']:>9}"
+                      f"{r['p99_ms']:>9}{r['errors']:>8}")
+
+
+def main():
+    args = build_parser().parse_args()
+    results = run(args)
+    report(args, results)
+    if args.json:
+        write_json(args.json, {"bench_serving": (args, results)})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Diff two benchmark JSON files and fail on regressions.
+
+    python benchmarks/compare.py baseline.json results.json [--threshold 0.15]
+
+Every numeric result present in both files is compared. Names ending in per_sec, rps or
+speedup are better when higher; names ending in seconds, _ms or _mb, and request, connection
+or error counts, are better when lower; anything else is printed for information only.
+Exits 1 if any metric got worse by more than the threshold (a fraction of the baseline).
+"""
+
+import argparse
+import json
+import sys
+
+HIGHER_IS_BETTER = ("per_sec", "rps", "speedup")
+LOWER_IS_BETTER = ("seconds", "_ms", "_mb", "requests", "connections", "errors")
+
+
+def flatten(results, prefix=""):
+    """{"a": {"b": 1}} -> {"a.b": 1}, numeric leaves only."""
+    flat = {}
+    for key, value in results.items():
+        path = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, path + "."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[path] = value
+    return flat
+
+
+def direction(path):
+    name = path.rsplit(".", 1)[-1]
+    if name.endswith(HIGHER_IS_BETTER):
+        return 1
+    if name.endswith(LOWER_IS_BETTER):
+        return -1
+    return 0
+
+
+def load(path):
+    with open(path, encoding="utf-8") as f:
+        document = json.load(f)
+    return document.get("meta", {}), {name: bench["results"] for name, bench in document["benchmarks"].items()}
+
+
+def compare(base, new, threshold):
+    """Rows of (path, base, new, relative change, verdict)."""
+    base_flat, new_flat = flatten(base), flatten(new)
+    rows = []
+    for path in sorted(base_flat.keys() & new_flat.keys()):
+        old, value = base_flat[path], new_flat[path]
+        if old:
+            change = (value - old) / old
+        else:
+            change = float("inf") if value else 0.0  # e.g. errors going from 0 to some
+        better = direction(path)
+        if not better:
+            verdict = ""
+        elif change * better < -threshold:
+            verdict = "REGRESSION"
+        elif change * better > threshold:
+            verdict = "improved"
+        else:
+            verdict = "ok"
+        rows.append((path, old, value, change, verdict))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("base")
+    parser.add_argument("new")
+    parser.add_argument("--threshold", type=float, default=0.15, help="allowed relative slowdown (default 0.15)")
+    args = parser.parse_args()
+
+    base_meta, base = load(args.base)
+    new_meta, new = load(args.new)
+    for key in ("commit", "mongo", "cpus"):
+        if base_meta.get(key) != new_meta.get(key):
+            print(f"note: {key} differs ({base_meta.get(key)} -> {new_meta.get(key)})")
+
+    rows = compare(base, new, args.threshold)
+    print(f"{'metric':<48}{'base':>12}{'new':>12}{'change':>9}  verdict")
+    for path, old, value, change, verdict in rows:
+        print(f"{path:<48}{old:>12g}{value:>12g}{change:>+9.1%}  {verdict}")
+
+    regressions = [row for row in rows if row[4] == "REGRESSION"]
+    if regressions:
+        print(f"{len(regressions)} regression(s) beyond {args.threshold:.0%}")
+        sys.exit(1)
+    print("no regressions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+"""Local stand-in for nutrition.umd.edu used by the benchmarks.
+
+Serves generated menu pages (/?locationNum=..&dtdate=..) and nutrition labels
+(/label.aspx?RecNumAndPort=..) with configurable per-request latency. A separate
+connection latency is charged once per new TCP connection to mimic the TLS
+handshake cost that keep-alive sessions avoid. Responses carry an ETag and honor
+If-None-Match with a 304.
+
+fault(path, query) may return a Fault to serve instead of (or before) the page, to
+inject errors, stalls and dropped connections (see fault_injection.py).
+"""
+
+import hashlib
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+MEAL_PERIODS = ["Breakfast", "Lunch", "Dinner"]
+STATIONS = ["Grill", "Pizza", "Deli", "Salad Bar", "Vegan Station", "Dessert"]
+DISHES = ["Chicken", "Rice", "Pasta", "Tofu", "Beef", "Soup", "Salad", "Cookie", "Pancakes", "Curry"]
+ICONS = ["vegan", "vegetarian", "Contains dairy", "Contains gluten", "Contains egg", "Contains soy"]
+
+
+def menu_rec_nums(location_num, items_per_station=8):
+    """Rec nums served on a hall's generated menu, in page order."""
+    count = len(MEAL_PERIODS) * len(STATIONS) * items_per_station
+    return [f"{location_num}{i:04d}*3" for i in range(count)]
+
+
+def generate_menu_html(location_num, date, items_per_station=8):
+    rng = random.Random(f"{location_num}-{date}")
+    rec_nums = iter(menu_rec_nums(location_num, items_per_station))
+
+    tabs = "".join(
+        f'<li class="nav-item"><a class="nav-link" role="tab" aria-controls="pane-{i}" href="#pane-{i}">{meal}</a></li>'
+        for i, meal in enumerate(MEAL_PERIODS)
+    )
+    panes = []
+    for i, _ in enumerate(MEAL_PERIODS):
+        cards = []
+        for station in STATIONS:
+            rows = []
+            for _ in range(items_per_station):
+                rec_num = next(rec_nums)
+                name = f"{rng.choice(DISHES)} {rng.choice(DISHES)} {rec_num[:-2]}"
+                icons = "".join(
+                    f'<img class="nutri-icon" alt="{icon}" src="icons/{j}.gif">'
+                    for j, icon in enumerate(rng.sample(ICONS, rng.randint(0, 3)))
+                )
+                rows.append(
+                    f'<div class="row menu-item-row"><div class="col">'
+                    f'<a class="menu-item-name" href="label.aspx?RecNumAndPort={rec_num}">{name}</a>'
+                    f'</div><div class="col">{icons}</div></div>'
+                )
+            cards.append(
+                f'<div class="card"><div class="card-body"><h5 class="card-title">{station}</h5>'
+                f'{"".join(rows)}</div></div>'
+            )
+        panes.append(f'<div class="tab-pane fade" id="pane-{i}" role="tabpanel">{"".join(cards)}</div>')
+
+    return (
+        f"<html><head><title>Menu {location_num} {date}</title></head><body>"
+        f'<ul class="nav nav-tabs" role="tablist">{tabs}</ul>'
+        f'<div class="tab-content">{"".join(panes)}</div></body></html>'
+    )
+
+
+def generate_label_html(rec_num):
+    rng = random.Random(rec_num)
+    nutrients = [
+        ("Total Fat", f"{rng.randint(0, 30)}g"),
+        ("Saturated Fat", f"{rng.randint(0, 10)}g"),
+        ("Cholesterol", f"{rng.randint(0, 120)}mg"),
+        ("Sodium", f"{rng.randint(0, 1200)}mg"),
+        ("Total Carbohydrate", f"{rng.randint(0, 80)}g"),
+        ("Dietary Fiber", f"{rng.randint(0, 12)}g"),
+        ("Total Sugars", f"{rng.randint(0, 40)}g"),
+        ("Protein", f"{rng.randint(0, 45)}g"),
+    ]
+    spans = "".join(f'<span class="nutfactstopnutrient"><b>{name}</b> {value}</span>' for name, value in nutrients)
+    return (
+        f"<html><body><div class=\"nutfactsservsize\">Serving Size 1 each</div>"
+        f'<p class="strong">Calories per serving</p><p class="strong">{rng.randint(40, 900)}</p>{spans}'
+        f'<span class="labelingredientsvalue">Water, Salt, {rng.choice(DISHES)}</span>'
+        f'<span class="labelallergensvalue">Contains: {rng.choice(["milk", "wheat", "soy", "egg"])}</span>'
+        "</body></html>"
+    )
+
+
+class Fault:
+    """What FakeUpstream does with a request instead of answering normally.
+
+    Waits delay seconds, then drops the connection without a response (drop), answers
+    with an empty status response (status, plus Retry-After if given), or else serves
+    the page late.
+    """
+
+    def __init__(self, status=None, delay=0.0, drop=False, retry_after=None):
+        self.status = status
+        self.delay = delay
+        self.drop = drop
+        self.retry_after = retry_after
+
+    def inject(self, handler):
+        """Apply the fault to a request. Returns True if it answered (or dropped) the request."""
+        time.sleep(self.delay)
+        if self.drop:
+            handler.close_connection = True
+            return True
+        if self.status is None:
+            return False
+        handler.send_response(self.status)
+        if self.retry_after is not None:
+            handler.send_header("Retry-After", str(self.retry_after))
+        handler.send_header("Content-Length", "0")
+        handler.end_headers()
+        return True
+
+
+class QuietServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Clients hang up on stalled responses when their timeout fires; that's expected
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+class FakeUpstream:
+    """Threaded HTTP server on 127.0.0.1 serving generated pages."""
+
+    def __init__(self, latency=0.05, connect_latency=0.03, items_per_station=8, fault=None):
+        self.latency = latency
+        self.connect_latency = connect_latency
+        self.items_per_station = items_per_station
+        self.fault = fault
+        self.requests = 0
+        self.connections = 0
+        self._lock = threading.Lock()
+        self._server = QuietServer(("127.0.0.1", 0), self._handler())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def render(self, path, query):
+        if path == "/label.aspx":
+            return generate_label_html(query["RecNumAndPort"][0])
+        if path == "/":
+            return generate_menu_html(query["locationNum"][0], query["dtdate"][0], self.items_per_station)
+        return None
+
+    def _handler(self):
+        upstream = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                super().setup()
+                with upstream._lock:
+                    upstream.connections += 1
+                time.sleep(upstream.connect_latency)
+
+            def do_GET(self):
+                with upstream._lock:
+                    upstream.requests += 1
+                time.sleep(upstream.latency)
+                url = urlparse(self.path)
+                query = parse_qs(url.query)
+                fault = upstream.fault(url.path, query) if upstream.fault else None
+                if fault is not None and fault.inject(self):
+                    return
+                body = upstream.render(url.path, query)
+                if body is None:
+                    self.send_error(404)
+                    return
+                payload = body.encode("utf-8")
+                etag = '"%s"' % hashlib.md5(payload).hexdigest()
+                if self.headers.get("If-None-Match") == etag:
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(payload)))
+                self.send_header("ETag", etag)
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
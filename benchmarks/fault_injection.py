@@ -0,0 +1,205 @@
+"""Fault-injection run of the upstream client (upstream.py) against the local fake nutrition.umd.edu.
+
+Each scenario scrapes through a fresh UpstreamClient with short timeouts while the fake
+server injects faults (see fake_upstream.Fault), then checks what the scrape did:
+
+    flaky        a share of all requests answer 503: retries get every page and label
+    stalled      one hall's menu page hangs past the read timeout: that hall fails within
+                 the deadline and the other halls are still written
+    rate_limited every URL answers 429 with Retry-After once: the retry waits it out
+    outage       every request answers 503: the breaker opens, later requests fail without
+                 reaching the server, stored menus are still served by /api/menu, and the
+                 breaker closes again once the upstream recovers
+
+Exits 1 if any scenario's check fails.
+
+    python benchmarks/fault_injection.py [--scenarios flaky outage] [--json results.json]
+"""
+
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, ".."))
+
+import ingest  # noqa: E402
+import scraper  # noqa: E402
+from fake_upstream import Fault, FakeUpstream  # noqa: E402
+from mongo_standin import load_app  # noqa: E402
+from report import add_json_arg, write_json  # noqa: E402
+from upstream import CircuitBreaker, UpstreamClient, UpstreamUnavailable  # noqa: E402
+
+
+def use_client(args, breaker_failures=None):
+    ingest.upstream = UpstreamClient(
+        rate=0, retries=args.retries, deadline=args.deadline, connect_timeout=args.read_timeout,
+        read_timeout=args.read_timeout,
+        breaker=CircuitBreaker(breaker_failures or args.breaker_failures, args.breaker_reset),
+    )
+    return ingest.upstream
+
+
+def scrape(date, force=False):
+    """scrape_all_dining_halls with prefetch. Returns (stats or the error raised, seconds)."""
+    start = time.perf_counter()
+    try:
+        _, stats = scraper.scrape_all_dining_halls(date, prefetch=True, force=force)
+    except Exception as e:
+        stats = e
+    return stats, round(time.perf_counter() - start, 3)
+
+
+def labels_missing(db):
+    return db.foods.count_documents({"nutrition_fetched": False})
+
+
+def flaky(args, db, upstream, app):
+    rng, lock, injected = random.Random(0), threading.Lock(), [0]
+
+    def fault(path, query):
+        with lock:
+            if rng.random() < args.error_rate:
+                injected[0] += 1
+                return Fault(status=503)
+        return None
+
+    # Retries are under test here, not the breaker, which a streak of 503s could open
+    use_client(args, breaker_failures=1000)
+    upstream.fault, upstream.requests = fault, 0
+    stats, seconds = scrape("1/20/2026")
+    failed = stats.get("failed_halls") if isinstance(stats, dict) else str(stats)
+    return {
+        "check": "every hall written and every label fetched despite injected 503s",
+        "ok": not failed and labels_missing(db) == 0,
+        "seconds": seconds, "requests": upstream.requests, "faults": injected[0], "failed_halls": failed,
+    }
+
+
+def stalled(args, db, upstream, app):
+    def fault(path, query):
+        if path == "/" and query["locationNum"][0] == args.stalled_hall:
+            return Fault(delay=args.read_timeout * 3)
+        return None
+
+    use_client(args)
+    upstream.fault, upstream.requests = fault, 0
+    stats, seconds = scrape("1/21/2026")
+    failed = list(stats["failed_halls"]) if isinstance(stats, dict) else str(stats)
+    written = db.menus.distinct("dining_hall_id", {"date": "1/21/2026"})
+    return {
+        "check": f"hall {args.stalled_hall} fails within the deadline, the other halls are written",
+        "ok": failed == [args.stalled_hall] and sorted(written) == sorted(set(scraper.DINING_HALLS) - set(failed))
+              and seconds < args.deadline + 2,
+        "seconds": seconds, "requests": upstream.requests, "failed_halls": failed, "halls_written": sorted(written),
+    }
+
+
+def rate_limited(args, db, upstream, app):
+    lock, seen = threading.Lock(), set()
+
+    def fault(path, query):
+        key = (path, tuple(sorted((k, v[0]) for k, v in query.items())))
+        with lock:
+            if key in seen:
+                return None
+            seen.add(key)
+        return Fault(status=429, retry_after=1)
+
+    use_client(args, breaker_failures=1000)
+    upstream.fault, upstream.requests = fault, 0
+    stats, seconds = scrape("1/22/2026")
+    failed = stats.get("failed_halls") if isinstance(stats, dict) else str(stats)
+    return {
+        "check": "429 + Retry-After is waited out and retried",
+        "ok": not failed and labels_missing(db) == 0 and seconds >= 1,
+        "seconds": seconds, "requests": upstream.requests, "failed_halls": failed,
+    }
+
+
+def outage(args, db, upstream, app):
+    date = "1/23/2026"
+    client = use_client(args)
+    upstream.fault = None
+    scrape(date)
+    stored = db.menus.count_documents({"date": date})
+
+    upstream.fault, upstream.requests = (lambda path, query: Fault(status=503)), 0
+    error, seconds = scrape(date, force=True)
+    opened = client.breaker.state == CircuitBreaker.OPEN
+    requests_during_outage = upstream.requests
+
+    # While open, fetches fail without a request
+    try:
+        scraper.fetch_page(scraper.menu_url("19", date))
+        rejected = False
+    except UpstreamUnavailable:
+        rejected = upstream.requests == requests_during_outage
+    served = app.test_client().get(f"/api/menu?date={date}").get_json()
+
+    time.sleep(args.breaker_reset)
+    upstream.fault = None
+    recovered, _ = scrape(date, force=True)
+    return {
+        "check": "breaker opens, fails fast, stored menus still served, then closes on recovery",
+        "ok": (isinstance(error, Exception) and opened and rejected and served["count"] == stored
+               and isinstance(recovered, dict) and client.breaker.state == CircuitBreaker.CLOSED),
+        "seconds": seconds, "requests": requests_during_outage, "error": str(error),
+        "menu_entries_served": served["count"], "breaker_after_recovery": client.breaker.state,
+    }
+
+
+SCENARIOS = {"flaky": flaky, "stalled": stalled, "rate_limited": rate_limited, "outage": outage}
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--error-rate", type=float, default=0.1, help="share of requests answering 503 (flaky)")
+    parser.add_argument("--stalled-hall", default="51")
+    parser.add_argument("--retries", type=int, default=3)
+    parser.add_argument("--read-timeout", type=float, default=0.5)
+    parser.add_argument("--deadline", type=float, default=3.0)
+    parser.add_argument("--breaker-failures", type=int, default=5)
+    parser.add_argument("--breaker-reset", type=float, default=1.0)
+    parser.add_argument("--items-per-station", type=int, default=2)
+    add_json_arg(parser)
+    return parser
+
+
+def run(args):
+    app, db = load_app("fault_injection")
+    production_client = ingest.upstream
+    results = {}
+    try:
+        with FakeUpstream(0, 0, args.items_per_station) as upstream:
+            ingest.BASE_URL = upstream.base_url
+            for name in args.scenarios:
+                results[name] = SCENARIOS[name](args, db, upstream, app)
+    finally:
+        ingest.upstream = production_client
+    return results
+
+
+def report(args, results):
+    for name, result in results.items():
+        details = ", ".join(f"{key}={value}" for key, value in result.items() if key not in ("check", "ok"))
+        print(f"{'PASS' if result['ok'] else 'FAIL'}  {name:<13}{result['check']}")
+        print(f"      {details}")
+
+
+def main():
+    args = build_parser().parse_args()
+    results = run(args)
+    report(args, results)
+    if args.json:
+        write_json(args.json, {"fault_injection": (args, results)})
+    if not all(result["ok"] for result in results.values()):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""Database used by the benchmarks: a real local mongod if BENCH_MONGO_URI is set, else mongomock."""
+
+import os
+import tempfile
+
+import mongomock
+from mongomock.collection import BulkOperationBuilder
+from mongomock.database import Database
+from pymongo import MongoClient
+
+# pymongo >= 4.11 passes sort= to bulk update builders, which mongomock doesn't accept yet
+_add_update = BulkOperationBuilder.add_update
+BulkOperationBuilder.add_update = lambda self, *args, sort=None, **kwargs: _add_update(self, *args, **kwargs)
+
+# Answer the topology handshake like a standalone server (so no transactions)
+_command = Database.command
+Database.command = lambda self, command, *args, **kwargs: (
+    {"ok": 1.0, "isWritablePrimary": True} if command == "hello" else _command(self, command, *args, **kwargs)
+)
+
+
+def make_db(name="bench"):
+    """Fresh, empty database for one benchmark run."""
+    uri = os.getenv("BENCH_MONGO_URI")
+    if uri:
+        client = MongoClient(uri)
+        client.drop_database(name)
+        return client[name]
+    return mongomock.MongoClient()[name]
+
+
+def load_app(name="bench_routes"):
+    """Build the Flask app against a fresh, migrated benchmark database. Returns (app, db).
+
+    Other benchmarks may have pointed the scraper at their own database, so its globals are
+    set back to the shared client's, and the food catalog starts empty. Menu snapshots go to a fresh directory (inherited by
+    servers started from here), since the new database's menu versions start over.
+    """
+    import catalog
+    import database
+    import migrate
+    import scraper
+    from app import create_app
+    from snapshots import snapshots
+
+    uri = os.getenv("BENCH_MONGO_URI")
+    if uri:
+        MongoClient(uri).drop_database(name)
+        os.environ["MONGO_URI"] = f"{uri.rstrip('/')}/{name}"
+        database._client = None
+    else:
+        os.environ["MONGO_URI"] = f"mongodb://127.0.0.1:27017/{name}"
+        database._client = mongomock.MongoClient(os.environ["MONGO_URI"])
+    db = database.get_db()
+
+    scraper.db = database.db
+    scraper.fetch_cache = scraper.FetchCache(db.fetch_cache)
+    scraper.scrape_jobs.collection, scraper.scrape_jobs.locks = db.scrape_jobs, db.scrape_locks
+    scraper.nutrition_backfill.locks = db.scrape_locks
+    snapshots.root = os.environ["SNAPSHOT_DIR"] = tempfile.mkdtemp(prefix=f"{name}-snapshots-")
+    snapshots.index.clear()
+    catalog._catalog = catalog.FoodCatalog()
+    migrate.migrate(db)
+    return create_app(), db
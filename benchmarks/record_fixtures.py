@@ -0,0 +1,62 @@
+"""Record live upstream pages as parser fixtures.
+
+Saves each hall's menu page for --date, and the labels of the first --labels items on
+it, to benchmarks/fixtures as menu_recorded_<hall>_<date>.html and
+label_recorded_<rec_num>.html, next to the hand-written fixtures. Each page's parse with
+html.parser is saved beside it as .json (for a menu, with the hall and date it was parsed
+for); tests/test_parsers.py checks every engine against those files, so review them
+before committing.
+
+    python benchmarks/record_fixtures.py --date 10/15/2026 [--labels 5]
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, ".."))
+
+import parsers  # noqa: E402
+from scraper import DINING_HALLS, label_url, menu_url  # noqa: E402
+from upstream import upstream  # noqa: E402
+
+FIXTURES = os.path.join(HERE, "fixtures")
+
+
+def slug(value):
+    """A file-name-safe spelling of a date or rec_num: '10/15/2026' -> '10-15-2026'."""
+    return re.sub(r"[^A-Za-z0-9]+", "-", value).strip("-")
+
+
+def save(name, html, parsed):
+    with open(os.path.join(FIXTURES, f"{name}.html"), "w", encoding="utf-8") as f:
+        f.write(html)
+    with open(os.path.join(FIXTURES, f"{name}.json"), "w", encoding="utf-8") as f:
+        json.dump(parsed, f, indent=1)
+        f.write("\n")
+    print(f"Recorded {name}")
+
+
+def record(date, labels):
+    for hall in DINING_HALLS:
+        html = upstream.get(menu_url(hall, date), kind="menu").text
+        items = parsers.parse_menu_page(html, hall, date, "html.parser")
+        save(f"menu_recorded_{hall}_{slug(date)}", html, {"dining_hall_id": hall, "date": date, "items": items})
+        for item in items[:labels]:
+            html = upstream.get(label_url(item["rec_num"]), kind="label").text
+            save(f"label_recorded_{slug(item['rec_num'])}", html, parsers.parse_nutrition_label(html, "html.parser"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--date", required=True, help="menu date, e.g. 10/15/2026")
+    parser.add_argument("--labels", type=int, default=3, help="labels recorded per hall")
+    args = parser.parse_args()
+    record(args.date, args.labels)
+
+
+if __name__ == "__main__":
+    main()
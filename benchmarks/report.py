@@ -0,0 +1,51 @@
+"""JSON results shared by the benchmarks.
+
+Every benchmark's run(args) returns a dict of results. Written files look like
+
+    {"meta": {...}, "benchmarks": {"bench_scrape": {"args": {...}, "results": {...}}}}
+
+whether they come from one benchmark's --json or from run_all.py, so compare.py can diff
+any two of them.
+"""
+
+import json
+import os
+import platform
+import subprocess
+import sys
+from datetime import datetime, timezone
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+
+def add_json_arg(parser):
+    parser.add_argument("--json", metavar="PATH", help="also write the results to PATH as JSON")
+
+
+def metadata():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "mongo": "mongod" if os.getenv("BENCH_MONGO_URI") else "mongomock",
+        "argv": sys.argv,
+    }
+
+
+def write_json(path, benchmarks):
+    """Write {name: (args, results)} with run metadata to path."""
+    document = {
+        "meta": metadata(),
+        "benchmarks": {name: {"args": vars(args), "results": results} for name, (args, results) in benchmarks.items()},
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(document, f, indent=2, sort_keys=True)
+        f.write("\n")
+    print(f"wrote {path}")
@@ -0,0 +1,58 @@
+"""Run every benchmark and write one combined JSON file.
+
+    python benchmarks/run_all.py --json results.json [--quick]
+    python benchmarks/compare.py baseline.json results.json
+
+--quick shrinks each workload so the whole suite finishes in well under a minute; only
+compare quick runs with quick runs.
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import bench_feed  # noqa: E402
+import bench_identity  # noqa: E402
+import bench_memory  # noqa: E402
+import bench_parsers  # noqa: E402
+import bench_routes  # noqa: E402
+import bench_scrape  # noqa: E402
+import bench_search  # noqa: E402
+from report import add_json_arg, write_json  # noqa: E402
+
+BENCHMARKS = {
+    "bench_parsers": (bench_parsers, ["--pages", "30"]),
+    "bench_scrape": (bench_scrape, ["--latency", "0.01", "--connect-latency", "0.01", "--items-per-station", "2"]),
+    "bench_search": (bench_search, ["--foods", "2000", "--repeat", "2"]),
+    "bench_routes": (bench_routes, ["--requests", "100", "--concurrency", "4", "--items-per-station", "2"]),
+    "bench_memory": (bench_memory, ["--days", "14"]),
+    "bench_feed": (bench_feed, ["--subscribers", "200", "--rounds", "2"]),
+    "bench_identity": (bench_identity, ["--weeks", "2", "--dishes", "60", "--items-per-station", "1"]),
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--quick", action="store_true", help="smaller workloads for a fast smoke run")
+    parser.add_argument("--only", nargs="+", choices=BENCHMARKS, help="run just these benchmarks")
+    add_json_arg(parser)
+    args = parser.parse_args()
+
+    collected = {}
+    for name, (module, quick_argv) in BENCHMARKS.items():
+        if args.only and name not in args.only:
+            continue
+        print(f"== {name}")
+        bench_args = module.build_parser().parse_args(quick_argv if args.quick else [])
+        results = module.run(bench_args)
+        module.report(bench_args, results)
+        collected[name] = (bench_args, results)
+
+    if args.json:
+        write_json(args.json, collected)
+
+
+if __name__ == "__main__":
+    main()
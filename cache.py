@@ -0,0 +1,75 @@
+"""In-process cache of serialized API responses.
+
+Each entry is tagged with the data version it was built from. Versions live in the
+menu_versions collection, one counter per menu date plus "*" for queries that span all
+dates, and the scraper bumps them whenever it writes menus or nutrition for a date. A
+cached response is served only while its version is still current (and its TTL hasn't
+expired), so writes from any process, including the Lambda scraper, invalidate exactly
+the affected dates.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from metrics import CACHE_REQUESTS
+
+ALL_DATES = "*"
+
+
+class ResponseCache:
+    """Thread-safe LRU of serialized responses with a TTL."""
+
+    def __init__(self, max_entries=256, ttl=300, name='response'):
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, version):
+        """Cached body for key if it was built from this version and hasn't expired, else None."""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or entry[0] != version or entry[1] < time.monotonic():
+                self.entries.pop(key, None)
+                self.misses += 1
+                CACHE_REQUESTS.inc(cache=self.name, result='miss')
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            CACHE_REQUESTS.inc(cache=self.name, result='hit')
+            return entry[2]
+
+    def set(self, key, version, body):
+        with self.lock:
+            self.entries[key] = (version, time.monotonic() + self.ttl, body)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+def get_version(db, date):
+    """Current data version for a menu date (or ALL_DATES)."""
+    doc = db.menu_versions.find_one({"date": date or ALL_DATES}, {"_id": 0, "version": 1})
+    return doc["version"] if doc else 0
+
+
+async def get_version_async(db, date):
+    """get_version through the async client (asgi.py)."""
+    doc = await db.menu_versions.find_one({"date": date or ALL_DATES}, {"_id": 0, "version": 1})
+    return doc["version"] if doc else 0
+
+
+menu_cache = ResponseCache(
+    max_entries=int(os.getenv('MENU_CACHE_SIZE', '256')),
+    ttl=float(os.getenv('MENU_CACHE_TTL', '300')),
+    name='menu',
+)
@@ -0,0 +1,69 @@
+"""In-memory catalog of foods by rec_num, for joining menus without a foods query.
+
+Foods are held as models.Food records. The first load reads the whole collection; after
+that each load() reads only foods whose updated_at (stamped on every foods write) is at or
+after the time the previous load started, less CATALOG_REFRESH_OVERLAP_SECONDS for
+writers whose clocks or commits lag. So a write is re-read for at most that long, and the
+indexed query is usually empty: /api/menu can call it on every cache miss, after reading
+the menu version, and join with data at least as new as that version. A full rebuild
+every CATALOG_REBUILD_SECONDS picks up deletions.
+
+A change stream would push updates instead, but needs a replica set, and deployments
+(and the benchmarks' mongomock) may be a standalone server.
+"""
+
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from models import Food
+
+CATALOG_REBUILD_SECONDS = float(os.getenv('CATALOG_REBUILD_SECONDS', '3600'))
+
+# Seconds of updates re-read on every refresh, for writes committed out of timestamp order
+CATALOG_REFRESH_OVERLAP_SECONDS = float(os.getenv('CATALOG_REFRESH_OVERLAP_SECONDS', '60'))
+
+
+class FoodCatalog:
+    def __init__(self):
+        self.foods = {}
+        self.loaded_at = None
+        self.built_at = 0.0
+        self.lock = threading.Lock()
+
+    def load(self, db):
+        """Load foods written since the last load (every food on the first)."""
+        with self.lock:
+            query = {}
+            if self.loaded_at is not None:
+                query = {'updated_at': {'$gte': self.loaded_at - timedelta(seconds=CATALOG_REFRESH_OVERLAP_SECONDS)}}
+            # Taken before the query, so a write that commits during it is read again next time
+            started = datetime.now(timezone.utc)
+            for doc in db.foods.find(query, {'_id': 0, **{field: 1 for field in Food.__slots__}}):
+                self.foods[doc['rec_num']] = Food.from_doc(doc)
+            self.loaded_at = started
+
+    def lookup(self, rec_nums):
+        """rec_num -> Food for the rec_nums in the catalog."""
+        foods = self.foods
+        return {rec_num: foods[rec_num] for rec_num in rec_nums if rec_num in foods}
+
+    def __len__(self):
+        return len(self.foods)
+
+
+_catalog = FoodCatalog()
+_catalog_lock = threading.Lock()
+
+
+def get_catalog(db):
+    """The process-wide catalog, caught up with the foods collection."""
+    global _catalog
+    with _catalog_lock:
+        if time.monotonic() - _catalog.built_at > CATALOG_REBUILD_SECONDS:
+            _catalog = FoodCatalog()
+            _catalog.built_at = time.monotonic()
+        catalog = _catalog
+    catalog.load(db)
+    return catalog
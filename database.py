@@ -0,0 +1,114 @@
+"""The MongoDB client shared by the app, the scraper and the CLIs.
+
+Nothing here touches the network at import. The client is built on first use with
+connect=False, so pymongo only opens connections (in the worker that uses them, after any
+fork) when the first operation runs. app.py and scraper.py used to each open their own
+client and ping it while importing, which made every worker boot wait on MongoDB.
+"""
+
+import os
+import threading
+import time
+
+import pymongo
+from dotenv import load_dotenv
+from pymongo import AsyncMongoClient, MongoClient
+from pymongo.database import Database
+
+from metrics import db_listener
+
+load_dotenv()
+
+# How long an operation waits to find a usable server before failing
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv('MONGO_SERVER_SELECTION_TIMEOUT_MS', '5000'))
+
+# Seconds the readiness check waits on MongoDB before reporting it unavailable
+READY_TIMEOUT_SECONDS = float(os.getenv('READY_TIMEOUT_SECONDS', '2'))
+
+_client = None
+_async_client = None
+_lock = threading.Lock()
+
+
+def _mongo_uri():
+    mongo_uri = os.getenv('MONGO_URI')
+    if not mongo_uri:
+        raise ValueError("MONGO_URI environment variable required")
+    return mongo_uri
+
+
+def get_client():
+    """The shared MongoClient, created on first call."""
+    global _client
+    if _client is None:
+        with _lock:
+            if _client is None:
+                _client = MongoClient(_mongo_uri(), connect=False, event_listeners=[db_listener],
+                                      serverSelectionTimeoutMS=MONGO_SERVER_SELECTION_TIMEOUT_MS)
+    return _client
+
+
+def get_db():
+    """The database named in MONGO_URI."""
+    return get_client().get_database()
+
+
+def get_async_db():
+    """The same database through the AsyncMongoClient used by asgi.py, created on first call.
+
+    Call it from the event loop that will use it; the async client belongs to that loop.
+    """
+    global _async_client
+    if _async_client is None:
+        _async_client = AsyncMongoClient(_mongo_uri(), event_listeners=[db_listener],
+                                         serverSelectionTimeoutMS=MONGO_SERVER_SELECTION_TIMEOUT_MS)
+    return _async_client.get_database()
+
+
+async def close_async_client():
+    global _async_client
+    if _async_client is not None:
+        await _async_client.close()
+        _async_client = None
+
+
+class LazyCollection:
+    """Stands in for a pymongo Collection, resolving it on each use."""
+
+    def __init__(self, name):
+        self.name = name
+
+    def __getattr__(self, attr):
+        return getattr(get_db()[self.name], attr)
+
+
+class LazyDatabase:
+    """Stands in for the pymongo Database, resolving it on first use.
+
+    Lets modules keep module-level handles (db.menus.find(...), FetchCache(db.fetch_cache))
+    without creating the client when they are imported. Database attributes such as client
+    or command resolve the real database; any other name is a collection.
+    """
+
+    def __getattr__(self, name):
+        if hasattr(Database, name):
+            return getattr(get_db(), name)
+        return LazyCollection(name)
+
+    def __getitem__(self, name):
+        return LazyCollection(name)
+
+
+db = LazyDatabase()
+
+
+def check_health(timeout=READY_TIMEOUT_SECONDS):
+    """Ping MongoDB within timeout seconds. Returns a dict for the readiness endpoint."""
+    start = time.perf_counter()
+    try:
+        with pymongo.timeout(timeout):
+            get_db().command('ping')
+            seeded = get_db().dining_halls.count_documents({}) > 0
+    except Exception as e:
+        return {'ok': False, 'error': str(e), 'latency_ms': round((time.perf_counter() - start) * 1000, 1)}
+    return {'ok': True, 'seeded': seeded, 'latency_ms': round((time.perf_counter() - start) * 1000, 1)}
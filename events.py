@@ -0,0 +1,39 @@
+"""In-process notifications of menu writes.
+
+ingest.bump_menu_versions publishes the dates whose menu version it bumped, from
+whichever thread did the write. Subscribers (feed.MenuFeed in async mode) are called on
+that thread, so they must return quickly and hand off anything slow.
+
+Only writes made by this process are published; the feed also watches menu_versions for
+writes from other workers, backfill.py and the Lambda.
+"""
+
+import threading
+
+
+class EventBus:
+    def __init__(self):
+        self.subscribers = []
+        self.lock = threading.Lock()
+
+    def subscribe(self, callback):
+        with self.lock:
+            self.subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        with self.lock:
+            if callback in self.subscribers:
+                self.subscribers.remove(callback)
+
+    def publish(self, *args):
+        """Call every subscriber with args. A failing subscriber doesn't stop the others or the caller."""
+        with self.lock:
+            subscribers = list(self.subscribers)
+        for callback in subscribers:
+            try:
+                callback(*args)
+            except Exception as e:
+                print(f"Event subscriber {callback!r} failed: {e}")
+
+
+menu_changes = EventBus()
@@ -0,0 +1,256 @@
+"""Push updates of a date's (or one hall's) menu to clients over Server-Sent Events.
+
+    GET /api/menu/events?date=1/15/2026[&dining_hall_id=19]     (async mode, asgi.py)
+
+A subscriber first gets the menu as it is now, then a diff each time a scrape or a label
+fetch changes it, instead of polling /api/menu:
+
+    id: 12
+    event: snapshot
+    data: {"version":12,"count":2,"data":[{...item...},{...}]}
+
+    id: 13
+    event: diff
+    data: {"version":13,"added":[{...}],"changed":[{...}],"removed":[{"dining_hall_id":"19","meal_period":"Lunch","rec_num":"123*1"}]}
+
+Items are /api/menu items; an item is identified by (dining_hall_id, meal_period, rec_num).
+The id is the date's menu version. A client reconnecting with Last-Event-ID equal to the
+current version skips the snapshot.
+
+Subscribers to the same date and hall share one Topic: its items are loaded and diffed
+once per change, and each event is encoded once and queued to every subscriber. Each
+subscriber is an asyncio.Queue on the event loop rather than a thread, so thousands of
+idle connections cost only their sockets and queues. A subscriber that falls
+FEED_QUEUE_SIZE events behind is disconnected and resyncs from a snapshot on reconnect.
+
+Changes are noticed from a change stream on menu_versions when MongoDB is a replica set,
+or else by polling the versions of subscribed dates every FEED_POLL_SECONDS. Writes made
+by this process are also published on events.menu_changes and picked up at once.
+"""
+
+import asyncio
+import os
+
+from pymongo.errors import PyMongoError
+
+from catalog import get_catalog
+from database import db
+from events import menu_changes
+from filters import menu_items
+from models import menu_records
+from snapshots import canonical_date, render_json
+
+# Seconds between menu_versions polls when change streams aren't available
+FEED_POLL_SECONDS = float(os.getenv('FEED_POLL_SECONDS', '2'))
+
+# Seconds between keep-alive comments on an idle stream, for proxies that close quiet connections
+FEED_HEARTBEAT_SECONDS = float(os.getenv('FEED_HEARTBEAT_SECONDS', '15'))
+
+# Events a subscriber may fall behind before it is disconnected
+FEED_QUEUE_SIZE = int(os.getenv('FEED_QUEUE_SIZE', '16'))
+
+# Milliseconds a disconnected EventSource waits before reconnecting
+FEED_RETRY_MS = int(os.getenv('FEED_RETRY_MS', '5000'))
+
+KEEPALIVE = b': keepalive\n\n'
+
+
+def item_key(item):
+    return item['dining_hall_id'], item['meal_period'], item['rec_num']
+
+
+def encode_event(event, version, payload):
+    """One SSE message. render_json's output is a single line, as a data field requires."""
+    return f'id: {version}\nevent: {event}\n'.encode() + b'data: ' + render_json(payload) + b'\n'
+
+
+def load_items(date, hall):
+    """The /api/menu items for date (and hall), keyed by item_key, joined from the catalog."""
+    query = {'date': date, **({'dining_hall_id': hall} if hall else {})}
+    entries = menu_records(db.menus.find(query, {'_id': 0}))
+    foods = get_catalog(db).lookup({entry['rec_num'] for entry in entries})
+    return {item_key(item): item for item in menu_items(entries, foods, {}, None)}
+
+
+def diff_items(old, new):
+    """(added, changed, removed keys) between two item_key -> item maps."""
+    added = [item for key, item in new.items() if key not in old]
+    changed = [item for key, item in new.items() if key in old and old[key] != item]
+    removed = [key for key in old if key not in new]
+    return added, changed, removed
+
+
+def end_stream(queue):
+    """Drop a subscriber's backlog and make its stream return."""
+    while not queue.empty():
+        queue.get_nowait()
+    queue.put_nowait(None)
+
+
+class Topic:
+    """The subscribers to one (date, hall), and the items they were last sent."""
+
+    def __init__(self, date, hall):
+        self.date = date
+        self.hall = hall
+        self.subscribers = set()
+        self.items = None
+        # Version the items were loaded at, and the version they last changed at (the event id)
+        self.seen_version = None
+        self.version = None
+        self.lock = asyncio.Lock()
+
+    def snapshot_event(self):
+        data = list(self.items.values())
+        return encode_event('snapshot', self.version, {'version': self.version, 'count': len(data), 'data': data})
+
+    async def refresh(self, version):
+        """Reload the items if version is new, and queue a diff to subscribers if they changed."""
+        async with self.lock:
+            if self.seen_version is not None and version <= self.seen_version:
+                return
+            items = await asyncio.to_thread(load_items, self.date, self.hall)
+            first = self.items is None
+            added, changed, removed = diff_items(self.items or {}, items)
+            self.items, self.seen_version = items, version
+            if first or added or changed or removed:
+                self.version = version
+            if first or not (added or changed or removed):
+                return
+            removed = [dict(zip(('dining_hall_id', 'meal_period', 'rec_num'), key)) for key in removed]
+            self.broadcast(encode_event('diff', version, {
+                'version': version, 'added': added, 'changed': changed, 'removed': removed,
+            }))
+
+    def broadcast(self, event):
+        for queue in list(self.subscribers):
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # Too far behind: end its stream; it resyncs from a snapshot on reconnect
+                end_stream(queue)
+                self.subscribers.discard(queue)
+
+
+class MenuFeed:
+    """The process's topics, and the task that notices menu changes for them. Lives on the event loop."""
+
+    def __init__(self):
+        self.topics = {}
+        self.loop = None
+        self.watcher = None
+
+    async def start(self, adb):
+        self.adb = adb
+        self.loop = asyncio.get_running_loop()
+        menu_changes.subscribe(self.on_publish)
+        self.watcher = asyncio.create_task(self.watch())
+
+    async def close(self):
+        menu_changes.unsubscribe(self.on_publish)
+        if self.watcher:
+            self.watcher.cancel()
+        for topic in self.topics.values():
+            for queue in topic.subscribers:
+                end_stream(queue)
+        self.topics.clear()
+
+    async def subscribe(self, date, hall, last_event_id=None):
+        """A queue of SSE messages for a new subscriber to date (and hall), starting with the
+        snapshot unless last_event_id is the current version. Raises ValueError unless date is
+        spelled as menus store it (see snapshots.canonical_date), or PyMongoError."""
+        if canonical_date(date) is None:
+            raise ValueError(f"Not a menu date: {date!r}")
+        topic = self.topics.get((date, hall))
+        if topic is None:
+            topic = self.topics[date, hall] = Topic(date, hall)
+        try:
+            if topic.items is None:
+                await topic.refresh(await self.version(date))
+        except Exception:
+            self.release(topic)
+            raise
+        # No await between the snapshot and joining, so no diff can fall in between
+        queue = asyncio.Queue(FEED_QUEUE_SIZE)
+        if last_event_id != str(topic.version):
+            queue.put_nowait(topic.snapshot_event())
+        topic.subscribers.add(queue)
+        return topic, queue
+
+    async def stream(self, topic, queue):
+        """SSE bytes for a subscriber, until it disconnects or falls behind."""
+        try:
+            yield f'retry: {FEED_RETRY_MS}\n\n'.encode()
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), FEED_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield KEEPALIVE
+                    continue
+                if event is None:
+                    return
+                yield event
+        finally:
+            topic.subscribers.discard(queue)
+            self.release(topic)
+
+    def release(self, topic):
+        """Forget topic once its last subscriber has gone."""
+        if not topic.subscribers and self.topics.get((topic.date, topic.hall)) is topic:
+            del self.topics[topic.date, topic.hall]
+
+    async def version(self, date):
+        doc = await self.adb.menu_versions.find_one({'date': date}, {'_id': 0, 'version': 1})
+        return doc['version'] if doc else 0
+
+    async def changed(self, date, version=None):
+        """Refresh the topics of date (at version, or the current one)."""
+        topics = [topic for topic in list(self.topics.values()) if topic.date == date]
+        if not topics:
+            return
+        try:
+            if version is None:
+                version = await self.version(date)
+            for topic in topics:
+                await topic.refresh(version)
+        except PyMongoError as e:
+            print(f"Menu feed refresh for {date} failed: {e}")
+
+    def on_publish(self, dates):
+        # Called on the writing thread (see events.py)
+        for date in dates:
+            asyncio.run_coroutine_threadsafe(self.changed(date), self.loop)
+
+    async def watch(self):
+        # Any failure to open or follow the change stream (standalone server, network error) falls back to polling
+        try:
+            await self.watch_changes()
+        except Exception as e:
+            print(f"Menu feed: no change stream ({e}); polling menu_versions every {FEED_POLL_SECONDS}s")
+        await self.poll()
+
+    async def watch_changes(self):
+        pipeline = [{'$match': {'operationType': {'$in': ['insert', 'update', 'replace']}}}]
+        async with await self.adb.menu_versions.watch(pipeline, full_document='updateLookup') as changes:
+            async for change in changes:
+                doc = change.get('fullDocument') or {}
+                if 'date' in doc:
+                    await self.changed(doc['date'], doc.get('version'))
+
+    async def poll(self):
+        seen = {}
+        while True:
+            await asyncio.sleep(FEED_POLL_SECONDS)
+            dates = {topic.date for topic in self.topics.values()}
+            if not dates:
+                continue
+            try:
+                async for doc in self.adb.menu_versions.find({'date': {'$in': list(dates)}}, {'_id': 0}):
+                    if seen.get(doc['date']) != doc['version']:
+                        seen[doc['date']] = doc['version']
+                        await self.changed(doc['date'], doc['version'])
+            except PyMongoError as e:
+                print(f"Menu feed poll failed: {e}")
+
+
+menu_feed = MenuFeed()
@@ -0,0 +1,77 @@
+"""Conditional-request cache for nutrition.umd.edu pages.
+
+Remembers, per URL, the ETag / Last-Modified validators and a hash of the body from the
+last time the page's data was written to the database. Scrapes send those validators
+back and skip parsing and writes when the server answers 304 or the body hash matches.
+
+New entries are held as pending until commit() is called, so a page whose data failed
+to be written is fetched and parsed again next time. Entries are persisted to a Mongo
+collection so the cache survives restarts and Lambda cold starts. Every app worker,
+backfill.py and the Lambda commit to that collection, so a page's entry is re-read from it
+(lookup) each time the page is fetched rather than trusted from this process's memory.
+"""
+
+import hashlib
+import threading
+from datetime import datetime, timezone
+
+from pymongo import UpdateOne
+
+
+class FetchCache:
+    def __init__(self, collection=None):
+        self.collection = collection
+        self.entries = {}
+        self.pending = {}
+        self.lock = threading.Lock()
+
+    def lookup(self, url):
+        """url's committed entry, re-read from the collection (if any). Returns it, or None."""
+        if self.collection is None:
+            return self.entries.get(url)
+        doc = self.collection.find_one({"url": url}, {"_id": 0})
+        with self.lock:
+            if doc is None:
+                self.entries.pop(url, None)
+            else:
+                self.entries[url] = doc
+        return doc
+
+    def conditional_headers(self, url):
+        entry = self.entries.get(url)
+        if not entry:
+            return {}
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def is_changed(self, url, response):
+        """Record response as pending for url. Returns False if its body matches the committed hash."""
+        digest = hashlib.sha256(response.content).hexdigest()
+        entry = self.entries.get(url)
+        if entry and entry["hash"] == digest:
+            return False
+        with self.lock:
+            self.pending[url] = {
+                "url": url,
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+                "hash": digest,
+                "fetched_at": datetime.now(timezone.utc),
+            }
+        return True
+
+    def commit(self, urls):
+        """Mark pending entries for urls as written, and persist them."""
+        with self.lock:
+            committed = [self.pending.pop(url) for url in urls if url in self.pending]
+            for entry in committed:
+                self.entries[entry["url"]] = entry
+        if committed and self.collection is not None:
+            self.collection.bulk_write(
+                [UpdateOne({"url": entry["url"]}, {"$set": entry}, upsert=True) for entry in committed],
+                ordered=False,
+            )
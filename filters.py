@@ -0,0 +1,107 @@
+"""Query-string filters for /api/menu, translated into MongoDB queries.
+
+    date, dining_hall_id, meal_period, station   exact matches on the menu entry
+    icons=vegan,vegetarian                       entry has every listed dietary icon
+    exclude_icons=Contains dairy                 entry has none of the listed icons
+    exclude_allergens=milk,soy                   food's parsed allergens include none of these
+    min_<nutrient>=N / max_<nutrient>=N          numeric range on a parsed nutrient, e.g. max_sodium=500
+    fields=name,rec_num,station                  return only these item fields
+
+Food-level filters (allergens, nutrient ranges) only match foods whose nutrition has been
+fetched. menu_items builds the response items from the matching entries and foods; the
+snapshots and the event feed build theirs with it too.
+"""
+
+import re
+
+MENU_FIELDS = (
+    'name', 'rec_num', 'dining_hall_id', 'date', 'meal_period', 'station', 'dietary_icons',
+    'nutrition_fetched', 'nutrition', 'allergens', 'ingredients',
+)
+
+NUTRIENT_RANGE = re.compile(r'^(min|max)_([a-z0-9_]+)$')
+
+
+def split_list(value):
+    return [part.strip() for part in value.split(',') if part.strip()]
+
+
+def parse_menu_filters(args):
+    """(menu query, food query, fields or None) for request args. Raises ValueError on bad input."""
+    menu_query = {}
+    for param in ('dining_hall_id', 'date', 'meal_period', 'station'):
+        if args.get(param):
+            menu_query[param] = args.get(param)
+
+    icons = {}
+    if args.get('icons'):
+        icons['$all'] = split_list(args.get('icons'))
+    if args.get('exclude_icons'):
+        icons['$nin'] = split_list(args.get('exclude_icons'))
+    if icons:
+        menu_query['dietary_icons'] = icons
+
+    food_query = {}
+    if args.get('exclude_allergens'):
+        food_query['allergen_list'] = {'$nin': [a.lower() for a in split_list(args.get('exclude_allergens'))]}
+
+    for param, value in args.items():
+        match = NUTRIENT_RANGE.match(param)
+        if not match:
+            continue
+        try:
+            bound = float(value)
+        except ValueError:
+            raise ValueError(f"{param} must be a number")
+        op = '$gte' if match.group(1) == 'min' else '$lte'
+        food_query.setdefault(f'nutrients.{match.group(2)}', {})[op] = bound
+
+    if food_query:
+        food_query['nutrition_fetched'] = True
+
+    fields = None
+    if args.get('fields'):
+        fields = split_list(args.get('fields'))
+        unknown = set(fields) - set(MENU_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+
+    return menu_query, food_query, fields
+
+
+def food_projection(fields):
+    """foods projection covering the requested item fields (None: whole documents, less bookkeeping fields)."""
+    if fields is None:
+        return {'_id': 0, 'updated_at': 0, 'name_key': 0, 'label_hash': 0}
+    needed = {'rec_num', 'nutrition_fetched'} | set(fields) & {'name', 'nutrition', 'allergens', 'ingredients'}
+    return {'_id': 0, **{field: 1 for field in needed}}
+
+
+def menu_item(entry, food, fields):
+    """One /api/menu item: a menu entry joined with its food document ({} if there is none)."""
+    item = {
+        'name': food.get('name', ''),
+        'rec_num': entry['rec_num'],
+        'dining_hall_id': entry['dining_hall_id'],
+        'date': entry['date'],
+        'meal_period': entry.get('meal_period', 'Unknown'),
+        'station': entry.get('station', 'Unknown'),
+        'dietary_icons': list(entry.get('dietary_icons', [])),
+        'nutrition_fetched': food.get('nutrition_fetched', False),
+    }
+    if food.get('nutrition_fetched'):
+        item['nutrition'] = food.get('nutrition', {})
+        item['allergens'] = food.get('allergens', '')
+        item['ingredients'] = food.get('ingredients', '')
+    if fields:
+        item = {field: item[field] for field in fields if field in item}
+    return item
+
+
+def menu_items(menu_entries, foods, food_query, fields):
+    """/api/menu items: menu entries joined with their foods (rec_num -> food).
+
+    With food filters, entries whose food didn't match are dropped.
+    """
+    return [menu_item(entry, foods.get(entry['rec_num'], {}), fields) for entry in menu_entries
+            if not food_query or entry['rec_num'] in foods]
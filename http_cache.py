@@ -0,0 +1,54 @@
+"""HTTP caching helpers for the read endpoints: ETags, 304s, Cache-Control and gzip."""
+
+import gzip
+from functools import wraps
+
+from flask import make_response, request
+
+# Responses smaller than this aren't worth compressing
+GZIP_MIN_SIZE = 500
+
+
+def cacheable(max_age):
+    """Mark a read endpoint's successful responses as cacheable for max_age seconds.
+
+    Adds a weak content ETag (unless the view already set one) and turns a matching
+    If-None-Match into a bodiless 304.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            response = make_response(view(*args, **kwargs))
+            # A streamed body can't be hashed without consuming it, so only one that already
+            # carries an ETag (a snapshot file) can be made conditional
+            if response.status_code != 200 or (response.is_streamed and not response.get_etag()[0]):
+                return response
+
+            response.cache_control.public = True
+            response.cache_control.max_age = max_age
+            if not response.get_etag()[0]:
+                response.add_etag(weak=True)
+            return response.make_conditional(request)
+        return wrapper
+    return decorator
+
+
+def gzip_response(response):
+    """after_request hook: gzip JSON bodies for clients that accept it."""
+    response.vary.add('Accept-Encoding')
+    if (
+        response.status_code != 200
+        or response.direct_passthrough
+        or 'Content-Encoding' in response.headers
+        or response.mimetype != 'application/json'
+        or 'gzip' not in request.headers.get('Accept-Encoding', '').lower()
+    ):
+        return response
+
+    data = response.get_data()
+    if len(data) < GZIP_MIN_SIZE:
+        return response
+
+    response.set_data(gzip.compress(data, compresslevel=6))
+    response.headers['Content-Encoding'] = 'gzip'
+    return response
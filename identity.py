@@ -0,0 +1,227 @@
+"""Canonical identities for foods served under more than one rec_num.
+
+rec_num is taken verbatim from a menu link's RecNumAndPort, and the same dish turns up
+under new rec_nums (a new recipe number, another port) from week to week. Each would be
+its own foods document, label fetch, search entry and catalog record. Instead a rec_num
+known to be the same food as another is mapped to that one in food_aliases:
+
+    {"rec_num": "204517*3", "canonical": "118200*2", "name_key": "grilled chicken breast"}
+
+and menus and foods only use the canonical rec_num, so its label is stored, refreshed and
+indexed once.
+
+A food's identity is its normalized name (name_key) plus its label (label_hash, see
+nutrition.py). When a new rec_num's label has been fetched, merge_fetched() merges it into
+an older food with the same name and label, if there is one; a re-keyed recipe whose label
+changed stays a food of its own. From then on canonicalize() rewrites the rec_num at
+ingest, so later scrapes neither add a stub for it nor fetch its label again. rec_num's own
+structure isn't relied on, since a port may be a different portion of the same recipe.
+
+FOOD_ALIAS_BY_NAME=1 also aliases a rec_num never seen before to the stored food of the
+same name at ingest, before its label is fetched, while every fetched food of the name has
+the same label. That saves the first fetch of a re-keyed dish, but a dish whose label
+changed with its rec_num then keeps serving the old label, so it is off by default.
+
+compact() merges foods already stored more than once: fetched foods with the same name_key
+and label_hash, and (with FOOD_ALIAS_BY_NAME) stubs of a name that has one label. Menus are
+pointed at the canonical rec_num before the duplicate food is deleted.
+
+    python identity.py      # merge duplicate foods, then invalidate the affected menus
+
+The API resolves aliases for /api/nutrition requests of a rec_num that was merged away.
+"""
+
+import os
+import re
+import unicodedata
+
+from pymongo import DeleteOne, UpdateOne
+
+from nutrition import label_hash
+
+# Set to 1 to alias new rec_nums to a food of the same name at ingest, without checking their labels
+FOOD_ALIAS_BY_NAME = os.getenv('FOOD_ALIAS_BY_NAME', '0') == '1'
+
+TOKEN = re.compile(r'[a-z0-9]+')
+
+
+def name_key(name):
+    """'Grilled Chicken  Breast (GF)' -> 'grilled chicken breast gf'; accents are dropped."""
+    text = unicodedata.normalize('NFKD', name or '').encode('ascii', 'ignore').decode().lower()
+    return ' '.join(TOKEN.findall(text))
+
+
+def resolve(db, rec_nums):
+    """rec_num -> canonical rec_num for those of rec_nums that are aliases."""
+    return {
+        doc['rec_num']: doc['canonical']
+        for doc in db.food_aliases.find({'rec_num': {'$in': list(rec_nums)}}, {'_id': 0, 'rec_num': 1, 'canonical': 1})
+    }
+
+
+def canonical_by_name(db, keys):
+    """name_key -> rec_num of the stored food to use for the name, or None when the name's
+    fetched foods have different labels. Names without stored foods are left out."""
+    groups = {}
+    projection = {'rec_num': 1, 'name_key': 1, 'nutrition_fetched': 1, 'label_hash': 1}
+    for doc in db.foods.find({'name_key': {'$in': list(keys)}}, projection).sort('_id', 1):
+        groups.setdefault(doc['name_key'], []).append(doc)
+    canonical = {}
+    for key, docs in groups.items():
+        fetched = [doc for doc in docs if doc.get('nutrition_fetched')]
+        # A label stored before label_hash existed can't be compared, so counts as different
+        if len({doc.get('label_hash') or doc['rec_num'] for doc in fetched}) > 1:
+            canonical[key] = None
+        else:
+            canonical[key] = (fetched or docs)[0]['rec_num']
+    return canonical
+
+
+def canonicalize(db, items):
+    """Rewrite items' rec_nums to their canonical rec_nums, first aliasing new rec_nums by name
+    with FOOD_ALIAS_BY_NAME (see the module docstring). Returns the number of items rewritten."""
+    rec_nums = {item['rec_num'] for item in items}
+    if not rec_nums:
+        return 0
+    canonical = resolve(db, rec_nums)
+
+    if FOOD_ALIAS_BY_NAME:
+        unknown = rec_nums - canonical.keys() - set(db.foods.distinct('rec_num', {'rec_num': {'$in': list(rec_nums)}}))
+        new_by_name = {}
+        for item in items:
+            key = name_key(item.get('name'))
+            if key and item['rec_num'] in unknown:
+                new_by_name.setdefault(key, {})[item['rec_num']] = None
+        stored = canonical_by_name(db, new_by_name) if new_by_name else {}
+        ops = []
+        for key, new in new_by_name.items():
+            # A name seen for the first time: its first rec_num in the scrape becomes the food
+            target = stored[key] if key in stored else next(iter(new))
+            if target is None:
+                continue
+            for rec_num in new:
+                if rec_num != target:
+                    canonical[rec_num] = target
+                    ops.append(UpdateOne(
+                        {'rec_num': rec_num},
+                        {'$setOnInsert': {'rec_num': rec_num, 'canonical': target, 'name_key': key}},
+                        upsert=True,
+                    ))
+        if ops:
+            db.food_aliases.bulk_write(ops, ordered=False)
+
+    rewritten = 0
+    for item in items:
+        if item['rec_num'] in canonical:
+            item['rec_num'] = canonical[item['rec_num']]
+            rewritten += 1
+    return rewritten
+
+
+def repoint_menus(db, rec_num, canonical):
+    """Point rec_num's menu entries at canonical, dropping entries canonical already has in the
+    same meal. Returns the dates changed."""
+    entries = list(db.menus.find({'rec_num': rec_num}, {'date': 1, 'dining_hall_id': 1, 'meal_period': 1}))
+    if not entries:
+        return set()
+    dates = {entry['date'] for entry in entries}
+    taken = {
+        (doc['date'], doc['dining_hall_id'], doc['meal_period'])
+        for doc in db.menus.find({'rec_num': canonical, 'date': {'$in': list(dates)}},
+                                 {'_id': 0, 'date': 1, 'dining_hall_id': 1, 'meal_period': 1})
+    }
+    ops = [
+        DeleteOne({'_id': entry['_id']})
+        if (entry['date'], entry['dining_hall_id'], entry['meal_period']) in taken
+        else UpdateOne({'_id': entry['_id']}, {'$set': {'rec_num': canonical}})
+        for entry in entries
+    ]
+    db.menus.bulk_write(ops, ordered=False)
+    return dates
+
+
+def merge(db, duplicate, canonical, key):
+    """Make duplicate an alias of canonical and delete its food. Returns the menu dates changed."""
+    # Aliases first, so a scrape running meanwhile maps the duplicate rather than re-adding it
+    db.food_aliases.update_one({'rec_num': duplicate}, {'$set': {'canonical': canonical, 'name_key': key}},
+                               upsert=True)
+    db.food_aliases.update_many({'canonical': duplicate}, {'$set': {'canonical': canonical}})
+    dates = repoint_menus(db, duplicate, canonical)
+    db.foods.delete_one({'rec_num': duplicate})
+    return dates
+
+
+def merge_fetched(db, rec_num):
+    """Merge a food whose label was just stored into the oldest food with the same name and
+    label. Returns the rec_num it was merged into, or None if it is a food of its own."""
+    food = db.foods.find_one({'rec_num': rec_num}, {'name': 1, 'name_key': 1, 'label_hash': 1, 'nutrition_fetched': 1})
+    if not food or not food.get('nutrition_fetched') or not food.get('label_hash'):
+        return None
+    key = food.get('name_key') or name_key(food.get('name'))
+    if not key:
+        return None
+    # Only older foods, so two labels of a dish stored at once merge one way, not into each other
+    twin = db.foods.find_one(
+        {'name_key': key, 'label_hash': food['label_hash'], 'nutrition_fetched': True, '_id': {'$lt': food['_id']}},
+        {'rec_num': 1}, sort=[('_id', 1)],
+    )
+    if twin is None:
+        return None
+    merge(db, rec_num, twin['rec_num'], key)
+    return twin['rec_num']
+
+
+def duplicates(db):
+    """(duplicate rec_num, canonical rec_num, name_key) for each stored food that should be merged.
+    The oldest food of a group is kept."""
+    groups = {}
+    for doc in db.foods.find({'name_key': {'$nin': ['', None]}}).sort('_id', 1):
+        groups.setdefault(doc['name_key'], []).append(doc)
+    merges = []
+    for key, docs in groups.items():
+        labels, stubs = {}, []
+        for doc in docs:
+            if doc.get('nutrition_fetched'):
+                digest = doc.get('label_hash') or label_hash(doc.get('nutrition') or {}, doc.get('allergens'),
+                                                             doc.get('ingredients'))
+                labels.setdefault(digest, []).append(doc['rec_num'])
+            else:
+                stubs.append(doc['rec_num'])
+        for rec_nums in labels.values():
+            merges += [(rec_num, rec_nums[0], key) for rec_num in rec_nums[1:]]
+        if FOOD_ALIAS_BY_NAME and stubs and len(labels) <= 1:
+            target = next(iter(labels.values()))[0] if labels else stubs[0]
+            merges += [(rec_num, target, key) for rec_num in stubs if rec_num != target]
+    return merges
+
+
+def compact(db):
+    """Merge foods stored under more than one rec_num into one, and point menus still using an
+    alias at its canonical rec_num. Returns {'merged': foods deleted, 'dates': menu dates changed}."""
+    # Foods stored before name_key was
+    ops = [
+        UpdateOne({'_id': doc['_id']}, {'$set': {'name_key': name_key(doc.get('name'))}})
+        for doc in db.foods.find({'name_key': {'$exists': False}}, {'name': 1})
+    ]
+    if ops:
+        db.foods.bulk_write(ops, ordered=False)
+
+    dates = set()
+    merges = duplicates(db)
+    for duplicate, canonical, key in merges:
+        dates |= merge(db, duplicate, canonical, key)
+
+    # Menus written under an alias by a scraper that didn't canonicalize
+    for rec_num, canonical in resolve(db, db.menus.distinct('rec_num')).items():
+        dates |= repoint_menus(db, rec_num, canonical)
+
+    return {'merged': len(merges), 'dates': sorted(dates)}
+
+
+if __name__ == '__main__':
+    from database import db
+    from ingest import bump_menu_versions
+
+    result = compact(db)
+    bump_menu_versions(db, result['dates'])
+    print(f"Merged {result['merged']} duplicate foods; rewrote menus on {len(result['dates'])} dates")
@@ -0,0 +1,170 @@
+"""MongoDB index bootstrap and query-plan diagnostics.
+
+    python indexes.py            # create any missing indexes
+    python indexes.py explain    # explain each route's query and flag collection scans
+
+ensure_indexes is idempotent and also runs as part of migrate.py.
+"""
+
+import sys
+from datetime import datetime, timezone
+
+from bson import ObjectId
+from pymongo import ASCENDING, IndexModel
+from pymongo.errors import OperationFailure
+
+DUPLICATE_KEY = 11000
+
+INDEXES = {
+    "menus": [
+        # Upsert key for scraped entries; unique so concurrent scrapes can't insert the same entry twice
+        IndexModel([("date", ASCENDING), ("dining_hall_id", ASCENDING), ("rec_num", ASCENDING), ("meal_period", ASCENDING)],
+                   name="menu_entry_unique", unique=True),
+        # /api/menu filtered by hall without a date
+        IndexModel([("dining_hall_id", ASCENDING), ("date", ASCENDING)], name="hall_date"),
+        # Dates a food appears on, for cache invalidation after a nutrition fetch
+        IndexModel([("rec_num", ASCENDING), ("date", ASCENDING)], name="rec_num_date"),
+        # Paginated and streamed /api/menu for a date, in _id order
+        IndexModel([("date", ASCENDING), ("_id", ASCENDING)], name="date_id"),
+    ],
+    "foods": [
+        IndexModel([("rec_num", ASCENDING)], name="rec_num_unique", unique=True),
+        # Stubs still waiting for a nutrition fetch
+        IndexModel([("nutrition_fetched", ASCENDING), ("rec_num", ASCENDING)], name="nutrition_fetched_rec_num"),
+        # Nutrient range and allergen filters on parsed label fields
+        IndexModel([("nutrients.$**", ASCENDING)], name="nutrients_wildcard"),
+        IndexModel([("allergen_list", ASCENDING)], name="allergen_list"),
+        # Food catalog catch-up (catalog.py)
+        IndexModel([("updated_at", ASCENDING)], name="updated_at"),
+        # Foods of a normalized name, for aliasing new rec_nums (identity.py)
+        IndexModel([("name_key", ASCENDING)], name="name_key"),
+    ],
+    "food_aliases": [
+        IndexModel([("rec_num", ASCENDING)], name="rec_num_unique", unique=True),
+        # Repointing a merged food's aliases at the food it was merged into
+        IndexModel([("canonical", ASCENDING)], name="canonical"),
+    ],
+    "dining_halls": [
+        IndexModel([("hall_id", ASCENDING)], name="hall_id_unique", unique=True),
+    ],
+    "menu_versions": [
+        IndexModel([("date", ASCENDING)], name="date_unique", unique=True),
+    ],
+    "scrape_checkpoints": [
+        IndexModel([("run_id", ASCENDING), ("date", ASCENDING), ("dining_hall_id", ASCENDING)], name="run_item_unique",
+                   unique=True),
+        # Checkpoints expire so a later backfill of the same range scrapes it again (backfill.py)
+        IndexModel([("expires_at", ASCENDING)], name="expires_at_ttl", expireAfterSeconds=0),
+    ],
+    "scrape_jobs": [
+        # Finding an active job for the same dates before queueing another
+        IndexModel([("dates", ASCENDING), ("status", ASCENDING)], name="dates_status"),
+        # Job history is kept for a week
+        IndexModel([("created_at", ASCENDING)], name="created_at_ttl", expireAfterSeconds=7 * 24 * 3600),
+    ],
+    "scrape_locks": [
+        # Expired leases are also cleaned up by the TTL monitor; acquire() doesn't depend on it
+        IndexModel([("expires_at", ASCENDING)], name="expires_at_ttl", expireAfterSeconds=0),
+    ],
+    "fetch_cache": [
+        IndexModel([("url", ASCENDING)], name="url_unique", unique=True),
+    ],
+}
+
+
+def remove_duplicates(collection, keys):
+    """Delete all but one document per combination of keys. Returns the number deleted.
+
+    Foods keep a document that already has nutrition, if there is one.
+    """
+    pipeline = [
+        {"$sort": {"nutrition_fetched": -1}},
+        {"$group": {"_id": {key: f"${key}" for key in keys}, "ids": {"$push": "$_id"}, "count": {"$sum": 1}}},
+        {"$match": {"count": {"$gt": 1}}},
+    ]
+    extra = [doc_id for group in collection.aggregate(pipeline) for doc_id in group["ids"][1:]]
+    if extra:
+        collection.delete_many({"_id": {"$in": extra}})
+    return len(extra)
+
+
+def ensure_indexes(db):
+    """Create the indexes in INDEXES. Existing duplicates blocking a unique index are removed first."""
+    for name, models in INDEXES.items():
+        collection = db[name]
+        for model in models:
+            spec = model.document
+            try:
+                collection.create_indexes([model])
+            except OperationFailure as e:
+                if e.code != DUPLICATE_KEY:
+                    raise
+                removed = remove_duplicates(collection, list(spec["key"]))
+                print(f"Removed {removed} duplicate {name} documents to build {spec['name']}")
+                collection.create_indexes([model])
+
+
+def route_queries(db):
+    """(label, collection, filter) for the queries the API and scraper run, using real sample values."""
+    entry = db.menus.find_one({}, {"_id": 0}) or {}
+    date = entry.get("date", "1/1/2026")
+    hall = entry.get("dining_hall_id", "19")
+    rec_num = entry.get("rec_num", "0*0")
+    name_key = (db.foods.find_one({}, {"_id": 0, "name_key": 1}) or {}).get("name_key", "")
+    return [
+        ("get_menu date+hall", db.menus, {"date": date, "dining_hall_id": hall}),
+        ("get_menu date", db.menus, {"date": date}),
+        ("get_menu hall", db.menus, {"dining_hall_id": hall}),
+        ("get_menu page date", db.menus, {"date": date, "_id": {"$gt": ObjectId()}}),
+        ("get_menu page", db.menus, {"_id": {"$gt": ObjectId()}}),
+        ("get_menu foods join", db.foods, {"rec_num": {"$in": [rec_num]}}),
+        ("get_menu filtered foods join", db.foods, {"rec_num": {"$in": [rec_num]}, "nutrition_fetched": True,
+                                                    "allergen_list": {"$nin": ["milk"]}, "nutrients.sodium": {"$lte": 500}}),
+        ("get_menu version", db.menu_versions, {"date": date}),
+        ("refresh_menu stored", db.menus, {"date": date, "dining_hall_id": hall}),
+        ("fetch_and_cache_nutrition", db.foods, {"rec_num": rec_num}),
+        ("nutrition cache invalidation", db.menus, {"rec_num": rec_num}),
+        ("prefetch_nutrition", db.foods, {"nutrition_fetched": False, "rec_num": {"$in": [rec_num]}}),
+        ("analytics date range", db.menus, {"date": {"$in": [date]}}),
+        ("analytics hall date range", db.menus, {"date": {"$in": [date]}, "dining_hall_id": hall}),
+        ("search index catch-up", db.foods, {"_id": {"$gt": ObjectId()}}),
+        ("food catalog catch-up", db.foods, {"updated_at": {"$gte": datetime.now(timezone.utc)}}),
+        ("ingest aliases", db.food_aliases, {"rec_num": {"$in": [rec_num]}}),
+        ("ingest foods by name", db.foods, {"name_key": {"$in": [name_key]}}),
+        ("search_menu filters", db.menus, {"rec_num": {"$in": [rec_num]}, "date": date, "dining_hall_id": hall}),
+    ]
+
+
+def plan_stages(plan):
+    """All stage names in an explain() plan tree."""
+    stages = [plan.get("stage")]
+    for key in ("inputStage", "queryPlan"):
+        if key in plan:
+            stages += plan_stages(plan[key])
+    for child in plan.get("inputStages", []):
+        stages += plan_stages(child)
+    return [stage for stage in stages if stage]
+
+
+def explain_queries(db):
+    """Print the winning plan for each route query. Returns the labels that use a collection scan."""
+    scans = []
+    for label, collection, query in route_queries(db):
+        plan = collection.find(query).explain()["queryPlanner"]["winningPlan"]
+        stages = plan_stages(plan)
+        flag = "COLLSCAN" in stages
+        if flag:
+            scans.append(label)
+        print(f"{'!!' if flag else 'ok'}  {label:<30} {collection.name:<14} {' <- '.join(stages)}")
+    return scans
+
+
+if __name__ == '__main__':
+    from database import db
+
+    ensure_indexes(db)
+    if sys.argv[1:] == ['explain']:
+        scans = explain_queries(db)
+        if scans:
+            print(f"{len(scans)} quer{'y uses' if len(scans) == 1 else 'ies use'} a collection scan")
+            sys.exit(1)
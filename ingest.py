@@ -0,0 +1,388 @@
+"""Scraping and menu/label writes, shared by the app (scraper.py) and the Lambda (lambda/scraper_core.py).
+
+Every function takes the database it writes to, and the FetchCache recording page
+validators where it fetches, so both deployments run the same code against their own
+client: scraper.py binds the app's shared database and fetch cache, the Lambda its own.
+Menu writes bump menu versions and publish them on events.menu_changes, and a scrape
+rebuilds the date's /api/menu snapshots (see snapshots.py), wherever it runs.
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+import requests
+from pymongo import UpdateOne, DeleteOne
+
+from parsers import parse_menu_page, parse_nutrition_label
+from cache import ALL_DATES
+from nutrition import parsed_fields
+from identity import canonicalize, merge_fetched, name_key
+from metrics import PARSE_LATENCY, ITEMS_PARSED, CACHE_REQUESTS
+from snapshots import build_snapshots, snapshots
+from upstream import upstream, UpstreamUnavailable
+from events import menu_changes
+
+# Base URL
+BASE_URL = "https://nutrition.umd.edu"
+
+# Known dining halls (locationNum -> name)
+DINING_HALLS = {
+    "19": {"name": "Yahentamitsi Dining Hall", "location": "South Campus"},
+    "51": {"name": "251 North", "location": "North Campus"},
+    "16": {"name": "South Campus Diner", "location": "South Campus"},
+}
+
+# Max concurrent requests to nutrition.umd.edu
+SCRAPE_MAX_WORKERS = int(os.getenv('SCRAPE_MAX_WORKERS', '8'))
+
+# Max operations sent to MongoDB per bulk_write call
+BULK_BATCH_SIZE = int(os.getenv('BULK_BATCH_SIZE', '500'))
+
+# Days of past menus to keep; unset keeps all history for analytics
+MENU_RETENTION_DAYS = int(os.environ['MENU_RETENTION_DAYS']) if os.getenv('MENU_RETENTION_DAYS') else None
+
+def run_concurrently(fn, args, max_workers=None):
+    """Call fn on each arg using at most max_workers threads. Results keep the order of args."""
+    args = list(args)
+    max_workers = max_workers or SCRAPE_MAX_WORKERS
+    if max_workers <= 1 or len(args) <= 1:
+        return [fn(arg) for arg in args]
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(args))) as executor:
+        return list(executor.map(fn, args))
+
+def menu_url(location_num, date):
+    return f"{BASE_URL}/?locationNum={location_num}&dtdate={date}"
+
+def label_url(rec_num):
+    return f"{BASE_URL}/label.aspx?RecNumAndPort={rec_num}"
+
+def fetch_page(url, cache=None, force=False):
+    """GET a page through the shared upstream client, recording its validators in cache if given.
+
+    Returns None when the cache shows the page unchanged (304, or same body hash) since it
+    was last committed, unless force is set. Raises a requests exception if the page can't
+    be fetched (see upstream.py for retries and the circuit breaker).
+    """
+    headers = {}
+    if cache is not None:
+        cache.lookup(url)
+        if not force:
+            headers = cache.conditional_headers(url)
+
+    response = upstream.get(url, headers=headers, kind='label' if 'label.aspx' in url else 'menu')
+    if response.status_code == 304:
+        CACHE_REQUESTS.inc(cache='fetch', result='not_modified')
+        return None
+    response.raise_for_status()
+
+    if cache is not None:
+        changed = cache.is_changed(url, response)
+        CACHE_REQUESTS.inc(cache='fetch', result='changed' if changed else 'unchanged')
+        if not changed and not force:
+            return None
+    return response.text
+
+def get_menu_page(location_num, date, cache=None, force=False):
+    return fetch_page(menu_url(location_num, date), cache, force)
+
+def get_nutrition_info(rec_num, cache=None, force=False):
+    html = fetch_page(label_url(rec_num), cache, force)
+    if html is None:
+        return None
+    return parse_label(html)
+
+def parse_label(html):
+    with PARSE_LATENCY.time(kind='label'):
+        return parse_nutrition_label(html)
+
+def parse_menu(html, location_num, date):
+    with PARSE_LATENCY.time(kind='menu'):
+        items = parse_menu_page(html, location_num, date)
+    ITEMS_PARSED.inc(len(items), dining_hall_id=location_num)
+    return items
+
+def bulk_write(collection, ops, ordered=False):
+    """Send ops in BULK_BATCH_SIZE batches. Returns inserted/updated/unchanged counts."""
+    counts = {"inserted": 0, "updated": 0, "unchanged": 0}
+    for i in range(0, len(ops), BULK_BATCH_SIZE):
+        result = collection.bulk_write(ops[i:i + BULK_BATCH_SIZE], ordered=ordered)
+        counts["inserted"] += result.upserted_count
+        counts["updated"] += result.modified_count
+        counts["unchanged"] += result.matched_count - result.modified_count
+    return counts
+
+_supports_transactions = None
+
+def supports_transactions(db):
+    """Transactions need a replica set or mongos (Atlas always is one); standalone servers don't."""
+    global _supports_transactions
+    if _supports_transactions is None:
+        hello = db.client.admin.command('hello')
+        _supports_transactions = bool(hello.get('setName')) or hello.get('msg') == 'isdbgrid'
+    return _supports_transactions
+
+def refresh_menu(db, date, dining_hall_id, items):
+    """Make the stored menu for (date, dining_hall_id) match freshly parsed items.
+
+    Only entries that were added, changed or removed are written. The writes are applied
+    in one transaction when the deployment supports it; otherwise upserts go before
+    deletes so readers never see the menu empty mid-refresh. Returns write counts.
+    """
+    fresh = {}
+    for item in items:
+        fresh[(item["rec_num"], item["meal_period"])] = {
+            "date": date,
+            "dining_hall_id": dining_hall_id,
+            "rec_num": item["rec_num"],
+            "meal_period": item["meal_period"],
+            "station": item["station"],
+            "dietary_icons": item["dietary_icons"],
+        }
+
+    stored = {
+        (doc["rec_num"], doc["meal_period"]): doc
+        for doc in db.menus.find({"date": date, "dining_hall_id": dining_hall_id}, {"_id": 0})
+    }
+
+    counts = {"inserted": 0, "updated": 0, "deleted": 0, "unchanged": 0}
+    ops = []
+    for key, doc in fresh.items():
+        if key not in stored:
+            counts["inserted"] += 1
+        elif stored[key] != doc:
+            counts["updated"] += 1
+        else:
+            counts["unchanged"] += 1
+            continue
+        ops.append(UpdateOne(
+            {"date": date, "dining_hall_id": dining_hall_id, "rec_num": key[0], "meal_period": key[1]},
+            {"$set": doc},
+            upsert=True
+        ))
+    for key in stored.keys() - fresh.keys():
+        counts["deleted"] += 1
+        ops.append(DeleteOne({"date": date, "dining_hall_id": dining_hall_id, "rec_num": key[0], "meal_period": key[1]}))
+
+    if ops:
+        if supports_transactions(db):
+            with db.client.start_session() as s:
+                s.with_transaction(lambda s: db.menus.bulk_write(ops, ordered=True, session=s))
+        else:
+            db.menus.bulk_write(ops, ordered=True)
+
+    return counts
+
+def ingest_items(db, date, items_by_hall, ordered=False):
+    """Write a scrape's parsed items for one date.
+
+    Items' rec_nums are first rewritten to canonical ones (see identity.py), then each hall's
+    stored menu is diffed against its fresh items (see refresh_menu), and food stubs are
+    upserted in batched bulk writes, one per rec_num seen in the run. Returns write counts per
+    collection, and the number of items aliased.
+    """
+    menu_counts = {"inserted": 0, "updated": 0, "deleted": 0, "unchanged": 0}
+    food_ops = {}
+    now = datetime.now(timezone.utc)
+    aliased = canonicalize(db, [item for items in items_by_hall.values() for item in items])
+    for dining_hall_id, items in items_by_hall.items():
+        for key, count in refresh_menu(db, date, dining_hall_id, items).items():
+            menu_counts[key] += count
+
+        # Add to foods collection if not already there
+        for item in items:
+            if item["rec_num"] not in food_ops:
+                food_ops[item["rec_num"]] = UpdateOne(
+                    {"rec_num": item["rec_num"]},
+                    {"$setOnInsert": {
+                        "rec_num": item["rec_num"],
+                        "name": item["name"],
+                        "name_key": name_key(item["name"]),
+                        "nutrition": {},
+                        "allergens": "",
+                        "ingredients": "",
+                        "nutrition_fetched": False,
+                        "updated_at": now
+                    }},
+                    upsert=True
+                )
+
+    food_counts = bulk_write(db.foods, list(food_ops.values()), ordered)
+
+    if food_counts["inserted"] or any(menu_counts[key] for key in ("inserted", "updated", "deleted")):
+        bump_menu_versions(db, [date])
+
+    return {"menus": menu_counts, "foods": food_counts, "aliased": aliased}
+
+def bump_menu_versions(db, dates):
+    """Invalidate cached /api/menu responses for these dates (and for queries across all dates),
+    and notify this process's /api/menu/events subscribers."""
+    dates = set(dates)
+    if not dates:
+        return
+    db.menu_versions.bulk_write(
+        [UpdateOne({"date": date}, {"$inc": {"version": 1}}, upsert=True) for date in dates | {ALL_DATES}],
+        ordered=False
+    )
+    menu_changes.publish(dates)
+
+def scrape_dining_hall(db, cache, location_num, date, force=False):
+    """Scrape a dining hall's menu for a date. Adds menu entries and food stubs (no nutrition fetch).
+
+    Returns None if the page hasn't changed since it was last written (unless force is set).
+    """
+    html = get_menu_page(location_num, date, cache, force)
+    if html is None:
+        return None
+    items = parse_menu(html, location_num, date)
+    ingest_items(db, date, {location_num: items})
+    cache.commit([menu_url(location_num, date)])
+    return items
+
+def apply_retention(db, retention_days=MENU_RETENTION_DAYS):
+    """Delete menus dated more than retention_days before today, and their snapshots. Returns the deleted dates.
+
+    retention_days=None keeps every date; 0 keeps only today onward.
+    """
+    if retention_days is None:
+        return []
+    cutoff = datetime.now().date() - timedelta(days=retention_days)
+    expired = []
+    for menu_date in db.menus.distinct("date"):
+        try:
+            if datetime.strptime(menu_date, '%m/%d/%Y').date() < cutoff:
+                expired.append(menu_date)
+        except ValueError:
+            pass
+    if expired:
+        db.menus.delete_many({"date": {"$in": expired}})
+        bump_menu_versions(db, expired)
+        snapshots.remove(expired)
+    return expired
+
+def scrape_all_dining_halls(db, cache, date, max_workers=None, prefetch=False, force=False, on_hall=None):
+    """Scrape all dining halls for a date. Applies menu retention, then refreshes the date's menus in place.
+
+    Halls are fetched concurrently (up to max_workers) and written in a single diff-based
+    ingest. Halls whose page is unchanged since the last scrape (per cache) are skipped
+    without parsing or writing, unless force is set. With prefetch=True, nutrition labels for
+    any scraped item not yet fetched are also pulled in parallel. on_hall(location_num, status,
+    items) is called as each hall is fetched ('fetched' / 'unchanged' / 'failed') and written
+    ('done'). A hall whose page can't be fetched or parsed keeps its stored menu and is listed
+    under failed_halls, while the other halls are still written; only if every hall fails is
+    the first error raised. Finally the date's /api/menu snapshots are rebuilt (see snapshots.py).
+    Returns (items, write counts).
+    """
+    on_hall = on_hall or (lambda location_num, status, items=0: None)
+    expired_dates = apply_retention(db)
+    errors = {}
+
+    def fetch(location_num):
+        try:
+            html = get_menu_page(location_num, date, cache, force)
+        except requests.RequestException as e:
+            errors[location_num] = e
+            on_hall(location_num, 'failed')
+            return None
+        on_hall(location_num, 'unchanged' if html is None else 'fetched')
+        return html
+
+    pages = run_concurrently(fetch, DINING_HALLS, max_workers)
+
+    items_by_hall = {}
+    for location_num, html in zip(DINING_HALLS, pages):
+        if html is None:
+            continue
+        try:
+            items_by_hall[location_num] = parse_menu(html, location_num, date)
+        except Exception as e:
+            errors[location_num] = e
+            on_hall(location_num, 'failed')
+    if len(errors) == len(DINING_HALLS):
+        raise next(iter(errors.values()))
+    for location_num, e in errors.items():
+        print(f"Scrape of hall {location_num} on {date} failed: {e}")
+    all_items = [item for items in items_by_hall.values() for item in items]
+
+    stats = ingest_items(db, date, items_by_hall)
+    for location_num, items in items_by_hall.items():
+        on_hall(location_num, 'done', len(items))
+    stats["expired_dates"] = expired_dates
+    stats["unchanged_halls"] = [
+        location_num for location_num in DINING_HALLS
+        if location_num not in items_by_hall and location_num not in errors
+    ]
+    stats["failed_halls"] = {location_num: str(e) for location_num, e in errors.items()}
+    cache.commit([menu_url(location_num, date) for location_num in items_by_hall])
+
+    if prefetch:
+        prefetch_nutrition(db, cache, {item["rec_num"] for item in all_items}, max_workers)
+
+    # A failed build only costs the first /api/menu requests a query, which rewrites it
+    try:
+        build_snapshots(db, date, DINING_HALLS)
+    except Exception as e:
+        print(f"Building menu snapshots for {date} failed: {e}")
+
+    return all_items, stats
+
+def fetch_and_cache_nutrition(db, cache, rec_num):
+    """Fetch nutrition for a food item and cache it permanently. Returns the food document."""
+    food = db.foods.find_one({"rec_num": rec_num})
+    if food and food.get("nutrition_fetched"):
+        return food
+
+    nutrition_data = get_nutrition_info(rec_num, cache, force=True)
+    return store_nutrition(db, cache, rec_num, nutrition_data)
+
+def store_nutrition(db, cache, rec_num, nutrition_data):
+    """Write a parsed label to its food, commit its fetch-cache entry and invalidate its menus.
+
+    Returns the food document, which is an older food's if this one was merged into it.
+    """
+    update = {
+        "nutrition_fetched": True,
+        "nutrition": {k: v for k, v in nutrition_data.items() if k not in ("ingredients", "allergens")},
+        "allergens": nutrition_data.get("allergens", ""),
+        "ingredients": nutrition_data.get("ingredients", ""),
+        "updated_at": datetime.now(timezone.utc),
+    }
+    update.update(parsed_fields(update["nutrition"], update["allergens"], update["ingredients"]))
+
+    db.foods.update_one(
+        {"rec_num": rec_num},
+        {"$set": update},
+        upsert=True
+    )
+    cache.commit([label_url(rec_num)])
+    dates = db.menus.distinct("date", {"rec_num": rec_num})
+    # The same dish and label under a new rec_num: keep the food it duplicates (see identity.py)
+    rec_num = merge_fetched(db, rec_num) or rec_num
+    bump_menu_versions(db, dates)
+
+    return db.foods.find_one({"rec_num": rec_num})
+
+def find_pending_nutrition(db, rec_nums=None):
+    """rec_nums of food stubs without nutrition, limited to rec_nums if given."""
+    query = {"nutrition_fetched": False}
+    if rec_nums is not None:
+        query["rec_num"] = {"$in": list(rec_nums)}
+    return [food["rec_num"] for food in db.foods.find(query, {"rec_num": 1})]
+
+def prefetch_nutrition(db, cache, rec_nums=None, max_workers=None):
+    """Fetch nutrition in parallel for food stubs that don't have it yet. Returns the number fetched.
+
+    If rec_nums is None, every unfetched food in the collection is backfilled.
+    """
+    def fetch(rec_num):
+        # A label that can't be fetched stays a stub for the backfill sweep to pick up
+        try:
+            fetch_and_cache_nutrition(db, cache, rec_num)
+            return True
+        except UpstreamUnavailable:
+            return False
+        except requests.RequestException as e:
+            print(f"Nutrition fetch for {rec_num} failed: {e}")
+            return False
+
+    return sum(run_concurrently(fetch, find_pending_nutrition(db, rec_nums), max_workers))
@@ -0,0 +1,120 @@
+"""Background scrape jobs.
+
+POST /api/scrape records a job in the scrape_jobs collection and returns its id right away.
+A small thread pool runs the job, writing per-date, per-hall progress to the job document,
+which GET /api/scrape/<job_id> reads back from any worker process. Each date is scraped
+under a MongoLock (see locks.py), so only one scrape of a date runs at a time across app
+workers, backfill.py and the Lambda; a date whose lock is held is reported as 'locked',
+with the lock's holder and expiry.
+
+A job whose worker died stops updating; once its updated_at is older than the lock TTL it
+is marked failed the next time it is read.
+"""
+
+import os
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+from locks import MongoLock, scrape_lock_name, SCRAPE_LOCK_TTL_SECONDS
+
+SCRAPE_JOB_WORKERS = int(os.getenv('SCRAPE_JOB_WORKERS', '2'))
+
+ACTIVE = ('queued', 'running')
+
+
+class ScrapeJobs:
+    def __init__(self, collection, locks, scrape, halls, max_workers=SCRAPE_JOB_WORKERS,
+                 stale_after=SCRAPE_LOCK_TTL_SECONDS):
+        """scrape(date, force, on_hall) scrapes one date and returns a result dict for the job.
+
+        locks is the collection holding the per-date MongoLocks; halls are the hall ids
+        progress is reported for.
+        """
+        self.collection = collection
+        self.locks = locks
+        self.scrape = scrape
+        self.halls = list(halls)
+        self.max_workers = max_workers
+        self.stale_after = stale_after
+        self.executor = None
+        self.lock = threading.Lock()
+
+    def start(self):
+        with self.lock:
+            if self.executor is None:
+                self.executor = ThreadPoolExecutor(self.max_workers, thread_name_prefix='scrape-job')
+
+    def submit(self, dates, force=False):
+        """Queue a scrape of dates. Returns (job, created).
+
+        An active job for the same dates is returned instead of queueing a duplicate.
+        """
+        now = datetime.now(timezone.utc)
+        existing = self.collection.find_one({
+            "dates": dates, "force": force, "status": {"$in": list(ACTIVE)},
+            "updated_at": {"$gte": now - timedelta(seconds=self.stale_after)},
+        })
+        if existing:
+            return existing, False
+
+        job = {
+            "_id": uuid.uuid4().hex,
+            "dates": dates,
+            "force": force,
+            "status": "queued",
+            "created_at": now,
+            "updated_at": now,
+            "progress": {date: {hall: {"status": "pending", "items": 0} for hall in self.halls} for date in dates},
+            "results": {},
+        }
+        self.collection.insert_one(job)
+        self.start()
+        self.executor.submit(self._run, job["_id"], dates, force)
+        return job, True
+
+    def get(self, job_id):
+        """The job document, or None. Abandoned jobs are marked failed first."""
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=self.stale_after)
+        self.collection.update_one(
+            {"_id": job_id, "status": {"$in": list(ACTIVE)}, "updated_at": {"$lt": cutoff}},
+            {"$set": {"status": "failed", "error": "Job stopped reporting progress"}}
+        )
+        return self.collection.find_one({"_id": job_id})
+
+    def _update(self, job_id, fields):
+        fields["updated_at"] = datetime.now(timezone.utc)
+        self.collection.update_one({"_id": job_id}, {"$set": fields})
+
+    def _run(self, job_id, dates, force):
+        self._update(job_id, {"status": "running", "started_at": datetime.now(timezone.utc)})
+        try:
+            for date in dates:
+                self._run_date(job_id, date, force)
+            self._update(job_id, {"status": "succeeded", "finished_at": datetime.now(timezone.utc)})
+        except Exception as e:
+            print(f"Scrape job {job_id} failed: {e}")
+            self._update(job_id, {"status": "failed", "error": str(e), "finished_at": datetime.now(timezone.utc)})
+
+    def _run_date(self, job_id, date, force):
+        lock = MongoLock(self.locks, scrape_lock_name(date))
+        if not lock.acquire():
+            # Who holds it and until when, unless it was released since
+            holder = lock.holder() or {}
+            self._update(job_id, {
+                f"results.{date}": {"status": "locked", "held_by": holder.get("owner"),
+                                    "expires_at": holder.get("expires_at")},
+                **{f"progress.{date}.{hall}.status": "locked" for hall in self.halls},
+            })
+            return
+
+        def on_hall(hall, status, items=0):
+            lock.renew()
+            self._update(job_id, {f"progress.{date}.{hall}": {"status": status, "items": items}})
+
+        try:
+            result = self.scrape(date, force, on_hall)
+        finally:
+            lock.release()
+        self._update(job_id, {f"results.{date}": {"status": "done", **result}})
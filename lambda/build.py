@@ -0,0 +1,95 @@
+"""Build function.zip for the scraper Lambda.
+
+The Lambda runs handler.py and scraper_core.py from this directory plus the app's own
+modules they import, taken from the repository root so there is one copy of each:
+
+    python lambda/build.py              # lambda/function.zip, dependencies left to a layer
+    python lambda/build.py --with-deps  # also pip install lambda/requirements.txt into the zip
+    python lambda/build.py --check      # exit non-zero if function.zip is out of date
+
+The zip is reproducible: entries are sorted and carry a fixed timestamp, so an unchanged
+tree builds an identical file. Modules are imported, never run, so their command lines
+(python identity.py, python nutrition.py) are inert in the Lambda.
+"""
+
+import argparse
+import filecmp
+import os
+import subprocess
+import sys
+import tempfile
+import zipfile
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+
+# The Lambda's own modules, in this directory
+HANDLER_MODULES = ('handler.py', 'scraper_core.py')
+
+# Modules shared with the app, at the repository root
+SHARED_MODULES = ('analytics.py', 'cache.py', 'catalog.py', 'database.py', 'events.py', 'fetch_cache.py',
+                  'filters.py', 'identity.py', 'ingest.py', 'locks.py', 'metrics.py', 'models.py', 'nutrition.py',
+                  'parsers.py', 'snapshots.py', 'upstream.py')
+
+# Timestamp of every entry, so rebuilding an unchanged tree gives the same bytes
+ZIP_DATE = (2026, 1, 1, 0, 0, 0)
+
+
+def sources():
+    """(archive name, path) of each module the Lambda needs."""
+    files = [(name, os.path.join(HERE, name)) for name in HANDLER_MODULES]
+    files += [(name, os.path.join(ROOT, name)) for name in SHARED_MODULES]
+    return files
+
+
+def dependencies(target):
+    """pip install lambda/requirements.txt into target; (archive name, path) of what it installed."""
+    subprocess.run([sys.executable, '-m', 'pip', 'install', '--quiet', '--target', target,
+                    '-r', os.path.join(HERE, 'requirements.txt')], check=True)
+    files = []
+    for directory, dirs, names in os.walk(target):
+        dirs[:] = [d for d in dirs if d != '__pycache__']
+        for name in names:
+            path = os.path.join(directory, name)
+            files.append((os.path.relpath(path, target), path))
+    return files
+
+
+def build(output, files):
+    with zipfile.ZipFile(output, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for name, path in sorted(files):
+            entry = zipfile.ZipInfo(name.replace(os.sep, '/'), ZIP_DATE)
+            entry.compress_type = zipfile.ZIP_DEFLATED
+            entry.external_attr = 0o644 << 16
+            with open(path, 'rb') as f:
+                archive.writestr(entry, f.read())
+    return len(files)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--output', default=os.path.join(HERE, 'function.zip'))
+    parser.add_argument('--with-deps', action='store_true', help='bundle lambda/requirements.txt')
+    parser.add_argument('--check', action='store_true', help='compare a fresh build with --output, write nothing')
+    args = parser.parse_args()
+
+    files = sources()
+    missing = [path for _, path in files if not os.path.exists(path)]
+    if missing:
+        sys.exit(f"missing modules: {', '.join(missing)}")
+    with tempfile.TemporaryDirectory() as target:
+        if args.with_deps:
+            files += dependencies(target)
+        if args.check:
+            fresh = os.path.join(target, 'function.zip')
+            build(fresh, files)
+            if not os.path.exists(args.output) or not filecmp.cmp(fresh, args.output, shallow=False):
+                sys.exit(f"{args.output} is out of date; run python lambda/build.py")
+            print(f"{args.output} is up to date")
+            return
+        count = build(args.output, files)
+    print(f"Wrote {count} files to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
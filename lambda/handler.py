@@ -2,30 +2,65 @@
 
 import os
 import json
-from datetime import datetime
+import time
+from datetime import datetime, timedelta
 from pymongo import MongoClient
 from scraper_core import scrape_all_dining_halls
+from locks import MongoLock, scrape_lock_name
+from metrics import REGISTRY, db_listener
 
 # Initialize MongoDB outside handler for connection reuse across warm starts
 mongo_uri = os.environ["MONGO_URI"]
-client = MongoClient(mongo_uri, serverSelectionTimeoutMS=10000)
+client = MongoClient(mongo_uri, serverSelectionTimeoutMS=10000, event_listeners=[db_listener])
 db = client.get_database()
 
 
 def lambda_handler(event, context):
     try:
-        date = (event or {}).get("date") or datetime.now().strftime("%-m/%-d/%Y")
-        print(f"Starting scrape for {date}")
+        event = event or {}
+        # Warm starts reuse the module, so metrics are cleared to cover just this invocation
+        REGISTRY.reset()
+        started = time.perf_counter()
+        date = event.get("date") or datetime.now().strftime("%-m/%-d/%Y")
+        # "days" scrapes that many consecutive dates from date, e.g. to prefetch the week ahead
+        start = datetime.strptime(date, "%m/%d/%Y")
+        dates = [(start + timedelta(days=i)).strftime("%-m/%-d/%Y") for i in range(int(event.get("days", 1)))]
+        print(f"Starting scrape for {', '.join(dates)}")
 
-        items = scrape_all_dining_halls(db, date)
+        items_scraped = 0
+        writes = {}
+        for scrape_date in dates:
+            # Shared with the app's scrape jobs and backfill.py: one scrape per date at a time
+            lock = MongoLock(db.scrape_locks, scrape_lock_name(scrape_date))
+            if not lock.acquire():
+                holder = lock.holder() or {}
+                print(f"Skipping {scrape_date}: {holder.get('owner', 'another scrape')} holds the lock")
+                writes[scrape_date] = {"locked": True, "held_by": holder.get("owner")}
+                continue
+            try:
+                items, stats = scrape_all_dining_halls(
+                    db,
+                    scrape_date,
+                    max_workers=event.get("max_workers"),
+                    prefetch=event.get("prefetch_nutrition", False),
+                    force=event.get("force", False),
+                )
+            finally:
+                lock.release()
+            items_scraped += len(items)
+            writes[scrape_date] = stats
 
-        print(f"Scrape complete: {len(items)} items")
+        print(f"Scrape complete: {items_scraped} items")
         return {
             "statusCode": 200,
             "body": json.dumps({
                 "success": True,
                 "date": date,
-                "items_scraped": len(items),
+                "dates": dates,
+                "items_scraped": items_scraped,
+                "writes": writes if len(dates) > 1 else writes[dates[0]],
+                "duration_seconds": round(time.perf_counter() - started, 3),
+                "metrics": REGISTRY.summary(),
             }),
         }
     except Exception as e:
@@ -0,0 +1,67 @@
+"""Lease locks stored in MongoDB, shared by every process that scrapes.
+
+A lock is a document whose _id is the lock name, holding its owner and an expiry time.
+acquire() takes a lock that is missing or expired with a single upsert: if another owner
+holds an unexpired lease, the upsert's insert collides with the existing _id and fails
+with a duplicate key error. A holder that dies simply lets the lease run out.
+
+    lock = MongoLock(db.scrape_locks, scrape_lock_name(date))
+    if lock.acquire():
+        try:
+            ...
+        finally:
+            lock.release()
+"""
+
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from pymongo.errors import DuplicateKeyError
+
+SCRAPE_LOCK_TTL_SECONDS = float(os.getenv('SCRAPE_LOCK_TTL_SECONDS', '600'))
+
+
+def scrape_lock_name(date):
+    return f"scrape:{date}"
+
+
+class MongoLock:
+    def __init__(self, collection, name, ttl=SCRAPE_LOCK_TTL_SECONDS, owner=None):
+        self.collection = collection
+        self.name = name
+        self.ttl = ttl
+        self.owner = owner or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+    def acquire(self):
+        """Take or extend the lease. Returns False if another owner holds it."""
+        now = datetime.now(timezone.utc)
+        try:
+            self.collection.update_one(
+                {"_id": self.name, "$or": [{"expires_at": {"$lt": now}}, {"owner": self.owner}]},
+                {"$set": {"owner": self.owner, "acquired_at": now, "expires_at": now + timedelta(seconds=self.ttl)}},
+                upsert=True
+            )
+            return True
+        except DuplicateKeyError:
+            return False
+
+    def renew(self):
+        """Push the expiry out by another ttl. Returns False if the lease was lost."""
+        now = datetime.now(timezone.utc)
+        result = self.collection.update_one(
+            {"_id": self.name, "owner": self.owner},
+            {"$set": {"expires_at": now + timedelta(seconds=self.ttl)}}
+        )
+        return result.matched_count == 1
+
+    def release(self):
+        self.collection.delete_one({"_id": self.name, "owner": self.owner})
+
+    def holder(self):
+        """The current lock document, or None if the lock is free."""
+        doc = self.collection.find_one({"_id": self.name})
+        if doc and doc["expires_at"].replace(tzinfo=timezone.utc) > datetime.now(timezone.utc):
+            return doc
+        return None
@@ -0,0 +1,190 @@
+"""In-process counters and histograms, exposed in the Prometheus text format.
+
+    with UPSTREAM_LATENCY.time(kind='menu'):
+        ...
+    ITEMS_PARSED.inc(len(items), dining_hall_id='19')
+
+GET /metrics renders REGISTRY; the Lambda returns REGISTRY.summary() for the invocation.
+MongoDB command counts and latencies come from a pymongo command listener (db_listener),
+which every MongoClient is created with.
+
+Values are per process: under gunicorn each worker exposes its own, so scrape every
+worker or sum over instances when comparing with request totals.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+
+from pymongo import monitoring
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+
+    def render(self):
+        """Every metric in the Prometheus text exposition format."""
+        lines = []
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{labels} {value}")
+        return '\n'.join(lines) + '\n'
+
+    def summary(self):
+        """{metric: {labels: value}} for metrics with data; histograms give count and sum."""
+        return {metric.name: metric.summary() for metric in self.metrics if metric.values}
+
+    def reset(self):
+        for metric in self.metrics:
+            metric.reset()
+
+
+REGISTRY = Registry()
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, help, labelnames=(), registry=REGISTRY):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.values = {}
+        self.lock = threading.Lock()
+        registry.register(self)
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, '')) for name in self.labelnames)
+
+    def _labels(self, key, extra=()):
+        pairs = list(zip(self.labelnames, key)) + list(extra)
+        if not pairs:
+            return ''
+        return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+    def _summary_key(self, key):
+        return ','.join(f"{name}={value}" for name, value in zip(self.labelnames, key))
+
+    def reset(self):
+        with self.lock:
+            self.values.clear()
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def samples(self):
+        with self.lock:
+            values = sorted(self.values.items())
+        for key, value in values:
+            yield self.name, self._labels(key), value
+
+    def summary(self):
+        with self.lock:
+            return {self._summary_key(key): value for key, value in sorted(self.values.items())}
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS, registry=REGISTRY):
+        super().__init__(name, help, labelnames, registry)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self.lock:
+            entry = self.values.get(key)
+            if entry is None:
+                entry = self.values[key] = {'buckets': [0] * len(self.buckets), 'count': 0, 'sum': 0.0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry['buckets'][i] += 1
+            entry['count'] += 1
+            entry['sum'] += value
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def samples(self):
+        with self.lock:
+            values = sorted((key, dict(entry, buckets=list(entry['buckets']))) for key, entry in self.values.items())
+        for key, entry in values:
+            # observe() counts a value in every bucket it fits, so the counts are already cumulative
+            for bound, count in zip(self.buckets, entry['buckets']):
+                yield f"{self.name}_bucket", self._labels(key, [('le', f"{bound:g}")]), count
+            yield f"{self.name}_bucket", self._labels(key, [('le', '+Inf')]), entry['count']
+            yield f"{self.name}_sum", self._labels(key), round(entry['sum'], 6)
+            yield f"{self.name}_count", self._labels(key), entry['count']
+
+    def summary(self):
+        with self.lock:
+            return {
+                self._summary_key(key): {'count': entry['count'], 'seconds': round(entry['sum'], 4)}
+                for key, entry in sorted(self.values.items())
+            }
+
+
+UPSTREAM_REQUESTS = Counter('upstream_requests_total', 'Requests to nutrition.umd.edu.', ('kind', 'status'))
+UPSTREAM_LATENCY = Histogram('upstream_request_seconds', 'Upstream request latency.', ('kind',))
+UPSTREAM_BYTES = Counter('upstream_bytes_total', 'Response bytes fetched from upstream.', ('kind',))
+UPSTREAM_RETRIES = Counter('upstream_retries_total', 'Upstream requests retried, by cause.', ('kind', 'reason'))
+UPSTREAM_BREAKER = Counter('upstream_breaker_transitions_total', 'Upstream circuit breaker state changes.',
+                           ('state',))
+PARSE_LATENCY = Histogram('parse_seconds', 'Time spent parsing upstream pages.', ('kind',))
+ITEMS_PARSED = Counter('menu_items_parsed_total', 'Menu items parsed from menu pages.', ('dining_hall_id',))
+DB_OPERATIONS = Counter('db_operations_total', 'MongoDB commands.', ('collection', 'operation', 'status'))
+DB_LATENCY = Histogram('db_operation_seconds', 'MongoDB command latency.', ('collection', 'operation'))
+CACHE_REQUESTS = Counter('cache_requests_total', 'Cache lookups by result.', ('cache', 'result'))
+HTTP_REQUESTS = Counter('http_requests_total', 'API requests.', ('route', 'method', 'status'))
+HTTP_LATENCY = Histogram('http_request_seconds', 'API request latency.', ('route', 'method'))
+
+
+class CommandTimer(monitoring.CommandListener):
+    """Counts and times every MongoDB command by collection and operation."""
+
+    def __init__(self):
+        self.collections = {}
+
+    def started(self, event):
+        if event.command_name == 'getMore':
+            collection = event.command.get('collection')
+        else:
+            collection = event.command.get(event.command_name)
+        self.collections[(event.connection_id, event.request_id)] = collection if isinstance(collection, str) else ''
+
+    def succeeded(self, event):
+        self._record(event, 'ok')
+
+    def failed(self, event):
+        self._record(event, 'error')
+
+    def _record(self, event, status):
+        collection = self.collections.pop((event.connection_id, event.request_id), '')
+        DB_OPERATIONS.inc(collection=collection, operation=event.command_name, status=status)
+        DB_LATENCY.observe(event.duration_micros / 1e6, collection=collection, operation=event.command_name)
+
+
+db_listener = CommandTimer()
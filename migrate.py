@@ -0,0 +1,32 @@
+"""One-shot migrations: seed the dining halls and create indexes.
+
+The web workers no longer do either at boot, so run this once per deploy (and against a
+fresh database) before sending them traffic:
+
+    python migrate.py
+"""
+
+from database import db
+from indexes import ensure_indexes
+from models import DiningHall
+from scraper import DINING_HALLS
+
+
+def seed_dining_halls(db):
+    for hall_id, info in DINING_HALLS.items():
+        db.dining_halls.update_one(
+            {"hall_id": hall_id},
+            {"$set": DiningHall(hall_id, info["name"], info["location"]).to_dict()},
+            upsert=True
+        )
+    return len(DINING_HALLS)
+
+
+def migrate(db):
+    print(f"Seeded {seed_dining_halls(db)} dining halls")
+    ensure_indexes(db)
+    print("Indexes up to date")
+
+
+if __name__ == '__main__':
+    migrate(db)
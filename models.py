@@ -1,45 +1,127 @@
-from datetime import datetime
+"""Compact records for menus and foods held in memory: the food catalog (catalog.py) and the
+menu entries /api/menu, the SSE feed and snapshot builds join with it (menu_records()).
 
-class DiningHall:
-    def __init__(self, name, hall_id, location=None):
+A dict per document repeats every key string and keeps its own copy of every value the
+driver decoded. These classes use __slots__ instead of a per-instance dict, and intern
+the strings that repeat across documents (halls, dates, meal periods, stations, icon
+names, nutrition label keys and units) so each distinct value is stored once per process,
+and items joined from records share them too.
+
+Records convert back with to_dict() and offer dict-style get(), so code that joins
+documents (filters.menu_item, routes.nutrition_data) takes either.
+"""
+
+import sys
+
+_tuples = {}
+
+
+def intern(value):
+    """value with repeated strings shared: str interned, lists as shared tuples of interned items."""
+    if isinstance(value, str):
+        return sys.intern(value)
+    if isinstance(value, (list, tuple)):
+        value = tuple(intern(item) for item in value)
+        return _tuples.setdefault(value, value)
+    return value
+
+
+def intern_keys(mapping):
+    """A copy of mapping with interned keys (and values, where they are strings)."""
+    return {sys.intern(key): intern(value) for key, value in mapping.items()}
+
+
+class Record:
+    """Base for slotted records. A field the document didn't have is None, and left out of to_dict()."""
+
+    __slots__ = ()
+
+    def get(self, key, default=None):
+        value = getattr(self, key) if key in self.__slots__ else None
+        return default if value is None else value
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def __getitem__(self, key):
+        value = self.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def to_dict(self):
+        return {field: getattr(self, field) for field in self.__slots__ if getattr(self, field) is not None}
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+
+class DiningHall(Record):
+    __slots__ = ('hall_id', 'name', 'location')
+
+    def __init__(self, hall_id, name, location=None):
+        self.hall_id = intern(hall_id)
         self.name = name
-        self.hall_id = hall_id
-        self.location = location
+        self.location = intern(location)
+
+
+class MenuEntry(Record):
+    """One food served at a hall, date and meal period (a menus document)."""
+
+    __slots__ = ('rec_num', 'dining_hall_id', 'date', 'meal_period', 'station', 'dietary_icons')
+
+    def __init__(self, rec_num, dining_hall_id, date, meal_period=None, station=None, dietary_icons=None):
+        self.rec_num = intern(rec_num)
+        self.dining_hall_id = intern(dining_hall_id)
+        self.date = intern(date)
+        self.meal_period = intern(meal_period)
+        self.station = intern(station)
+        self.dietary_icons = intern(dietary_icons)
+
+    @classmethod
+    def from_doc(cls, doc):
+        return cls(doc['rec_num'], doc['dining_hall_id'], doc['date'], doc.get('meal_period'), doc.get('station'),
+                   doc.get('dietary_icons'))
 
     def to_dict(self):
-        return {
-            'name': self.name,
-            'hall_id': self.hall_id,
-            'location': self.location
-        }
+        entry = super().to_dict()
+        if self.dietary_icons is not None:
+            entry['dietary_icons'] = list(self.dietary_icons)
+        return entry
+
 
+def menu_records(docs):
+    """MenuEntry records for menus documents, converted one at a time as a cursor yields them."""
+    return [MenuEntry.from_doc(doc) for doc in docs]
 
-class MenuItem:
 
-    def __init__(self, name, dining_hall_id, meal_period, date,
-                 station=None, is_entree=True, nutrition=None,
-                 allergens=None, ingredients=None):
+class Food(Record):
+    """A foods document: the label as scraped plus the fields parsed from it (see nutrition.py)."""
+
+    __slots__ = ('rec_num', 'name', 'nutrition_fetched', 'nutrition', 'allergens', 'ingredients', 'nutrients',
+                 'nutrient_units', 'allergen_list', 'ingredient_list', 'updated_at')
+
+    def __init__(self, rec_num, name=None, nutrition_fetched=None, nutrition=None, allergens=None, ingredients=None,
+                 nutrients=None, nutrient_units=None, allergen_list=None, ingredient_list=None, updated_at=None):
+        self.rec_num = intern(rec_num)
         self.name = name
-        self.dining_hall_id = dining_hall_id
-        self.meal_period = meal_period 
-        self.date = date
-        self.station = station
-        self.is_entree = is_entree
-        self.nutrition = nutrition or {}
-        self.allergens = allergens or []
-        self.ingredients = ingredients or []
-        self.created_at = datetime.now()
+        self.nutrition_fetched = nutrition_fetched
+        self.nutrition = intern_keys(nutrition) if nutrition is not None else None
+        self.allergens = allergens
+        self.ingredients = ingredients
+        self.nutrients = intern_keys(nutrients) if nutrients is not None else None
+        self.nutrient_units = intern_keys(nutrient_units) if nutrient_units is not None else None
+        self.allergen_list = intern(allergen_list)
+        self.ingredient_list = intern(ingredient_list)
+        self.updated_at = updated_at
+
+    @classmethod
+    def from_doc(cls, doc):
+        return cls(**{field: doc.get(field) for field in cls.__slots__})
 
     def to_dict(self):
-        return {
-            'name': self.name,
-            'dining_hall_id': self.dining_hall_id,
-            'meal_period': self.meal_period,
-            'date': self.date,
-            'station': self.station,
-            'is_entree': self.is_entree,
-            'nutrition': self.nutrition,
-            'allergens': self.allergens,
-            'ingredients': self.ingredients,
-            'created_at': self.created_at
-        }
+        food = super().to_dict()
+        for field in ('allergen_list', 'ingredient_list'):
+            if field in food:
+                food[field] = list(food[field])
+        return food
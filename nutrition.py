@@ -0,0 +1,142 @@
+"""Parsing of label strings into queryable fields.
+
+Labels store nutrients as display strings keyed by label text ({"Total Fat": "12g"}) and
+allergens as free text. At ingest we also store:
+
+    nutrients       {"calories": 310.0, "total_fat": 12.0, "sodium": 250.0, ...}  numbers in the label's unit
+    nutrient_units  {"calories": "kcal", "total_fat": "g", "sodium": "mg", ...}
+    allergen_list   ["milk", "soy"]
+    ingredient_list ["chicken thigh", "spices (cumin, paprika)", "salt"]
+    label_hash      hash of the label strings, equal for identical labels (see identity.py)
+    parsed_version  PARSED_VERSION
+
+so /api/menu and the analytics pipelines can filter and aggregate on them in the database.
+
+    python nutrition.py            # recompute parsed fields on foods stored by an older version
+    python nutrition.py refetch    # re-queue labels fetched before calories were scraped
+"""
+
+import hashlib
+import json
+import re
+from datetime import datetime, timezone
+
+from pymongo import UpdateOne
+
+AMOUNT = re.compile(r'(\d+(?:\.\d+)?)\s*([a-zA-Zµ%]*)')
+ALLERGEN_PREFIX = re.compile(r'^\s*(contains|allergens)\s*:?\s*', re.IGNORECASE)
+ALLERGEN_SPLIT = re.compile(r'\s*(?:,|;|/|\band\b)\s*', re.IGNORECASE)
+
+# Bump when parsed_fields changes so `python nutrition.py` recomputes stored foods
+PARSED_VERSION = 3
+
+# Units for nutrients the label prints as bare numbers
+DEFAULT_UNITS = {"calories": "kcal"}
+
+
+def nutrient_key(label):
+    """'Total Fat' -> 'total_fat'."""
+    return re.sub(r'[^a-z0-9]+', '_', label.lower()).strip('_')
+
+
+def parse_amount(text):
+    """'250mg' -> (250.0, 'mg'); None if there is no number."""
+    match = AMOUNT.search(text or '')
+    if not match:
+        return None
+    return float(match.group(1)), match.group(2).lower()
+
+
+def parse_nutrients(nutrition):
+    """Numeric values and units for a label's nutrient strings."""
+    values, units = {}, {}
+    for label, text in nutrition.items():
+        amount = parse_amount(text)
+        if amount:
+            key = nutrient_key(label)
+            values[key] = amount[0]
+            units[key] = amount[1] or DEFAULT_UNITS.get(key, '')
+    return values, units
+
+
+def parse_allergens(text):
+    """'Contains: Milk, Soy and Wheat' -> ['milk', 'soy', 'wheat']."""
+    text = ALLERGEN_PREFIX.sub('', text or '')
+    return sorted({part.strip().lower() for part in ALLERGEN_SPLIT.split(text) if part.strip()})
+
+
+def parse_ingredients(text):
+    """'Chicken, Spices (Cumin, Paprika), Salt.' -> ['chicken', 'spices (cumin, paprika)', 'salt'].
+
+    Splits on commas outside parentheses and keeps the label's order.
+    """
+    parts, current, depth = [], [], 0
+    for ch in text or '':
+        if ch in '([':
+            depth += 1
+        elif ch in ')]':
+            depth = max(depth - 1, 0)
+        if ch == ',' and depth == 0:
+            parts.append(''.join(current))
+            current = []
+        else:
+            current.append(ch)
+    parts.append(''.join(current))
+    return [part.strip().rstrip('.').lower() for part in parts if part.strip().rstrip('.')]
+
+
+def label_hash(nutrition, allergens, ingredients):
+    """Hex digest of a label's strings, independent of the order the label lists nutrients in."""
+    text = json.dumps([nutrition, allergens or '', ingredients or ''], sort_keys=True)
+    return hashlib.sha1(text.encode()).hexdigest()
+
+
+def parsed_fields(nutrition, allergens, ingredients):
+    """The parsed fields to $set on a food alongside its raw label strings."""
+    values, units = parse_nutrients(nutrition)
+    return {
+        "nutrients": values,
+        "nutrient_units": units,
+        "allergen_list": parse_allergens(allergens),
+        "ingredient_list": parse_ingredients(ingredients),
+        "label_hash": label_hash(nutrition, allergens, ingredients),
+        "parsed_version": PARSED_VERSION,
+    }
+
+
+def backfill_parsed_fields(db):
+    """Recompute parsed fields on fetched foods stored by an older PARSED_VERSION. Returns the number updated."""
+    now = datetime.now(timezone.utc)
+    ops = [
+        UpdateOne({"_id": food["_id"]}, {"$set": {**parsed_fields(
+            food.get("nutrition", {}), food.get("allergens", ""), food.get("ingredients", "")), "updated_at": now}})
+        for food in db.foods.find({"nutrition_fetched": True, "parsed_version": {"$ne": PARSED_VERSION}},
+                                  {"nutrition": 1, "allergens": 1, "ingredients": 1})
+    ]
+    for i in range(0, len(ops), 500):
+        db.foods.bulk_write(ops[i:i + 500], ordered=False)
+    return len(ops)
+
+
+def mark_for_refetch(db):
+    """Flag fetched foods without calories as unfetched so the backfill worker fetches them again.
+
+    Their stored nutrition is kept but hidden from /api/menu until the new fetch lands.
+    Returns the number flagged.
+    """
+    result = db.foods.update_many(
+        {"nutrition_fetched": True, "nutrients.calories": {"$exists": False}},
+        {"$set": {"nutrition_fetched": False, "updated_at": datetime.now(timezone.utc)}}
+    )
+    return result.modified_count
+
+
+if __name__ == '__main__':
+    import sys
+
+    from database import db
+
+    if sys.argv[1:] == ['refetch']:
+        print(f"Queued {mark_for_refetch(db)} foods for a new label fetch")
+    else:
+        print(f"Updated {backfill_parsed_fields(db)} foods")
@@ -0,0 +1,154 @@
+"""Background nutrition backfill.
+
+Food stubs are created by the scraper with nutrition_fetched: False. Instead of fetching a
+label inside the request that first asks for it, /api/nutrition and the scrape endpoint
+hand rec_nums to this worker, which fetches them on a small thread pool with a rate
+limit; retries, deadlines and the circuit breaker are upstream.py's. Concurrent
+submissions for the same rec_num share one fetch. A sweeper thread also picks up stubs
+left by scrapes that ran elsewhere (e.g. the Lambda) or whose fetch failed.
+
+The app starts the worker at startup (create_app, and the ASGI lifespan), so every process
+(each gunicorn worker) runs a sweeper, which sweeps once on start and then every
+NUTRITION_SWEEP_SECONDS. A sweep only runs in the process holding the nutrition-sweep lease
+in the scrape_locks collection (see locks.py). The holder renews it each sweep and releases
+it on stop(); if it dies, another process takes over once the lease runs out.
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from locks import MongoLock
+
+NUTRITION_WORKERS = int(os.getenv('NUTRITION_WORKERS', '4'))
+NUTRITION_RATE_PER_SEC = float(os.getenv('NUTRITION_RATE_PER_SEC', '5'))
+NUTRITION_SWEEP_SECONDS = float(os.getenv('NUTRITION_SWEEP_SECONDS', '300'))
+
+# Name of the lease a process holds while it is the one sweeping
+NUTRITION_SWEEP_LOCK = 'nutrition-sweep'
+
+
+class RateLimiter:
+    """Spaces calls to wait() at least 1/rate seconds apart across threads."""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self.next_at = 0.0
+        self.lock = threading.Lock()
+
+    def reserve(self):
+        """Claim the next slot. Returns the seconds to wait before using it."""
+        with self.lock:
+            now = time.monotonic()
+            start = max(now, self.next_at)
+            self.next_at = start + self.interval
+        return start - now
+
+    def wait(self):
+        delay = self.reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+
+class NutritionBackfill:
+    def __init__(self, fetch, find_pending, locks=None, max_workers=NUTRITION_WORKERS, rate=NUTRITION_RATE_PER_SEC,
+                 sweep_seconds=NUTRITION_SWEEP_SECONDS):
+        """fetch(rec_num) fetches and stores one label; find_pending(rec_nums) lists unfetched stubs.
+
+        locks is the collection holding the sweep's MongoLock; without it every process sweeps.
+        """
+        self.fetch = fetch
+        self.find_pending = find_pending
+        self.locks = locks
+        self.max_workers = max_workers
+        self.sweep_seconds = sweep_seconds
+        self.limiter = RateLimiter(rate)
+        self.in_flight = {}
+        # Reentrant: a future that is already done runs its callback inside submit()
+        self.lock = threading.RLock()
+        self.executor = None
+        self.sweeper = None
+        self.stopped = None
+        self.sweep_lock = None
+
+    def start(self):
+        """Start the sweeper thread (unless sweep_seconds is 0). Does nothing if it is running."""
+        with self.lock:
+            if self.sweeper is None and self.sweep_seconds > 0:
+                self.stopped = threading.Event()
+                self.sweeper = threading.Thread(target=self._sweep, args=(self.stopped,), name='nutrition-sweeper',
+                                                daemon=True)
+                self.sweeper.start()
+
+    def stop(self):
+        """Stop the sweeper, release the sweep lease and wait for queued fetches. start() starts it again."""
+        with self.lock:
+            sweeper, self.sweeper = self.sweeper, None
+        if sweeper is not None:
+            self.stopped.set()
+            sweeper.join()
+            if self.sweep_lock is not None:
+                self.sweep_lock.release()
+                self.sweep_lock = None
+        with self.lock:
+            executor, self.executor = self.executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def submit(self, rec_num):
+        """Queue a label fetch. Returns the Future, shared with any fetch already queued for rec_num."""
+        with self.lock:
+            if self.executor is None:
+                self.executor = ThreadPoolExecutor(self.max_workers, thread_name_prefix='nutrition')
+            future = self.in_flight.get(rec_num)
+            if future is None:
+                future = self.executor.submit(self._fetch, rec_num)
+                self.in_flight[rec_num] = future
+                future.add_done_callback(lambda _: self._done(rec_num))
+            return future
+
+    def submit_pending(self, rec_nums=None):
+        """Queue every unfetched stub (limited to rec_nums if given). Returns how many were queued."""
+        pending = self.find_pending(rec_nums)
+        for rec_num in pending:
+            self.submit(rec_num)
+        return len(pending)
+
+    def is_pending(self, rec_num):
+        with self.lock:
+            return rec_num in self.in_flight
+
+    def _done(self, rec_num):
+        with self.lock:
+            self.in_flight.pop(rec_num, None)
+
+    def _fetch(self, rec_num):
+        self.limiter.wait()
+        try:
+            return self.fetch(rec_num)
+        except requests.RequestException as e:
+            print(f"Nutrition fetch for {rec_num} failed: {e}")
+            raise
+
+    def sweep(self):
+        """Queue every unfetched stub if this process holds (or takes) the sweep lease.
+        Returns how many were queued, or None if another process holds the lease."""
+        if self.locks is not None:
+            if self.sweep_lock is None or self.sweep_lock.collection is not self.locks:
+                # The lease outlives a missed sweep or two, so a live holder keeps it
+                self.sweep_lock = MongoLock(self.locks, NUTRITION_SWEEP_LOCK, ttl=3 * self.sweep_seconds)
+            if not self.sweep_lock.acquire():
+                return None
+        return self.submit_pending()
+
+    def _sweep(self, stopped):
+        while True:
+            try:
+                self.sweep()
+            except Exception as e:
+                print(f"Nutrition sweep failed: {e}")
+            if stopped.wait(self.sweep_seconds):
+                return
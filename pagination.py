@@ -0,0 +1,91 @@
+"""Continuation tokens and NDJSON streaming for /api/menu and /api/search.
+
+A cursor token is base64url JSON holding the position to resume after plus a fingerprint
+of the request's other parameters, so a token can't be replayed against a different query:
+
+    /api/menu    the last entry's _id; pages are in _id order (menus date_id index)
+    /api/search  an offset into the ranking, which is computed in memory, not read from an index
+
+format=ndjson streams one JSON item per line as items come off the Mongo cursor.
+"""
+
+import base64
+import binascii
+import hashlib
+import json
+import os
+
+# Largest page a client may ask for with limit=
+MAX_PAGE_SIZE = int(os.getenv('MAX_PAGE_SIZE', '500'))
+
+# Page size when a cursor is given without a limit
+DEFAULT_PAGE_SIZE = 100
+
+# /api/search page size without a limit, and the largest it allows (each page is joined with its foods)
+SEARCH_PAGE_SIZE = 50
+MAX_SEARCH_PAGE_SIZE = 100
+
+# /api/search/autocomplete suggestions without a limit, and the most it allows
+SUGGESTIONS = 10
+MAX_SUGGESTIONS = 50
+
+# /api/analytics/protein-per-calorie rows without a limit, and the most it allows
+RANKED_FOODS = 20
+MAX_RANKED_FOODS = 100
+
+# Menu entries or search results joined with their foods per query while paging or streaming
+STREAM_BATCH_SIZE = 500
+
+NDJSON_MIMETYPE = 'application/x-ndjson'
+
+# Request parameters that move through the results rather than choose them
+PAGING_PARAMS = ('cursor', 'limit', 'format')
+
+
+def fingerprint(params):
+    """Short hash of the (name, value) request params that select the results."""
+    selected = sorted((name, value) for name, value in params if name not in PAGING_PARAMS)
+    return hashlib.sha1(json.dumps(selected).encode()).hexdigest()[:16]
+
+
+def encode_cursor(position, params):
+    token = json.dumps({'p': position, 'f': fingerprint(params)}, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(token).rstrip(b'=').decode()
+
+
+def decode_cursor(token, params):
+    """The position in a cursor token. Raises ValueError if it is malformed or from another query."""
+    try:
+        decoded = json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+        position, token_fingerprint = decoded['p'], decoded['f']
+    except (binascii.Error, ValueError, TypeError, KeyError):
+        raise ValueError("invalid cursor")
+    if token_fingerprint != fingerprint(params):
+        raise ValueError("cursor belongs to a different query")
+    return position
+
+
+def page_size(value, maximum=MAX_PAGE_SIZE):
+    """limit= as an int in 1..maximum, or None if absent. Raises ValueError."""
+    if value is None:
+        return None
+    try:
+        size = int(value)
+    except ValueError:
+        raise ValueError("limit must be an integer")
+    if not 1 <= size <= maximum:
+        raise ValueError(f"limit must be between 1 and {maximum}")
+    return size
+
+
+def wants_ndjson(value):
+    """Whether format= asks for NDJSON. Raises ValueError on an unknown format."""
+    if value in (None, 'json'):
+        return False
+    if value == 'ndjson':
+        return True
+    raise ValueError("format must be json or ndjson")
+
+
+def ndjson_line(item):
+    return json.dumps(item, sort_keys=True, separators=(',', ':')) + '\n'
@@ -0,0 +1,256 @@
+"""HTML extraction for nutrition.umd.edu menu and label pages.
+
+Three interchangeable engines produce identical output:
+
+- html.parser: full BeautifulSoup tree (the original implementation).
+- strainer:    BeautifulSoup restricted by SoupStrainer to the nav tabs and tab panes
+               (or label spans), so the rest of the page is never turned into a tree.
+- lxml:        libxml2 via lxml, with XPath class matching. Requires lxml to be installed.
+
+The default comes from the PARSER_ENGINE environment variable.
+"""
+
+import os
+import re
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+ENGINES = ('html.parser', 'strainer', 'lxml')
+
+PARSER_ENGINE = os.getenv('PARSER_ENGINE', 'html.parser')
+
+
+def _has_any_class(*names):
+    # The strainer sees the raw class attribute string, not BeautifulSoup's split list
+    names = set(names)
+    return lambda value: value is not None and not names.isdisjoint(value.split())
+
+
+MENU_STRAINER = SoupStrainer(class_=_has_any_class('nav-tabs', 'tab-pane'))
+LINK_STRAINER = SoupStrainer('a', href=True)
+LABEL_STRAINER = SoupStrainer(class_=_has_any_class('nutfactsservsize', 'strong', 'nutfactstopnutrient',
+                                                    'labelingredientsvalue', 'labelallergensvalue'))
+
+SERVING_SIZE_PREFIX = re.compile(r'^serving size\s*', re.IGNORECASE)
+
+
+def parse_menu_page(html, dining_hall_id, date, engine=None):
+    """Extract menu items (one dict per food per meal period and station) from a menu page."""
+    engine = engine or PARSER_ENGINE
+    if engine == 'lxml':
+        return _menu_items_lxml(html, dining_hall_id, date)
+    if engine in ('html.parser', 'strainer'):
+        return _menu_items_bs4(html, dining_hall_id, date, strain=engine == 'strainer')
+    raise ValueError(f"Unknown parser engine {engine!r}, expected one of {ENGINES}")
+
+
+def parse_nutrition_label(html, engine=None):
+    """Extract nutrient values, ingredients and allergens from a label.aspx page."""
+    engine = engine or PARSER_ENGINE
+    if engine == 'lxml':
+        return _label_lxml(html)
+    if engine in ('html.parser', 'strainer'):
+        return _label_bs4(html, strain=engine == 'strainer')
+    raise ValueError(f"Unknown parser engine {engine!r}, expected one of {ENGINES}")
+
+
+def _menu_item(name, href, dining_hall_id, date, meal_period, station, icons):
+    return {
+        "name": name,
+        "dining_hall_id": dining_hall_id,
+        "date": date,
+        "rec_num": href.split('RecNumAndPort=')[-1],
+        "meal_period": meal_period,
+        "station": station,
+        "dietary_icons": icons,
+    }
+
+
+def _label_header(serving_texts, strong_texts):
+    # "Serving size" and its value may be one div or two; calories are a "Calories per
+    # serving" paragraph followed by one holding the number
+    header = {}
+    serving = SERVING_SIZE_PREFIX.sub('', ' '.join(t for t in serving_texts if t)).strip()
+    if serving:
+        header['Serving Size'] = serving
+    for label, value in zip(strong_texts, strong_texts[1:]):
+        if label.lower().startswith('calories') and value:
+            header['Calories'] = value
+            break
+    return header
+
+
+def _menu_items_bs4(html, dining_hall_id, date, strain=False):
+    soup = BeautifulSoup(html, 'html.parser', parse_only=MENU_STRAINER if strain else None)
+    items = []
+
+    # Determine meal period labels from the tab nav
+    tab_labels = {}
+    tabs = soup.find('ul', class_='nav-tabs')
+    if tabs:
+        for tab_link in tabs.find_all('a', role='tab'):
+            pane_id = (tab_link.get('aria-controls') or '').strip()
+            label = tab_link.get_text(strip=True)
+            if pane_id and label:
+                tab_labels[pane_id] = label
+
+    # Parse food items from each tab pane, grouped by station (card)
+    panes = soup.find_all('div', class_='tab-pane')
+    for pane in panes:
+        pane_id = pane.get('id', '')
+        meal_period = tab_labels.get(pane_id, 'Unknown')
+
+        for card in pane.find_all('div', class_='card'):
+            title_el = card.find('h5', class_='card-title')
+            station = title_el.get_text(strip=True) if title_el else 'Unknown'
+
+            for row in card.find_all('div', class_='menu-item-row'):
+                link = row.find('a', class_='menu-item-name')
+                if not link:
+                    continue
+                href = link.get('href', '')
+                if 'label.aspx' not in href:
+                    continue
+
+                # Dietary icons (vegan, vegetarian, dairy, gluten, etc.)
+                icons = [img.get('alt', '') for img in row.find_all('img', class_='nutri-icon')]
+
+                items.append(_menu_item(link.get_text(strip=True), href, dining_hall_id, date, meal_period, station, icons))
+
+    # Fallback: if no tab panes found, grab all links
+    if not panes:
+        if strain:
+            soup = BeautifulSoup(html, 'html.parser', parse_only=LINK_STRAINER)
+        for link in soup.find_all('a', href=True):
+            href = link.get('href')
+            if 'label.aspx' not in href:
+                continue
+            items.append(_menu_item(link.get_text(strip=True), href, dining_hall_id, date, "Unknown", "Unknown", []))
+
+    return items
+
+
+def _label_bs4(html, strain=False):
+    soup = BeautifulSoup(html, 'html.parser', parse_only=LABEL_STRAINER if strain else None)
+
+    nutrition = _label_header(
+        [div.get_text(strip=True) for div in soup.find_all('div', class_='nutfactsservsize')],
+        [p.get_text(strip=True) for p in soup.find_all('p', class_='strong')],
+    )
+    for nutrient in soup.find_all('span', class_='nutfactstopnutrient'):
+        label = nutrient.find('b')
+        if label:
+            name = label.get_text(strip=True)
+            value = nutrient.get_text(strip=True).replace(name, '').strip()
+            if name and value:
+                nutrition[name] = value
+
+    ingredients = soup.find('span', class_='labelingredientsvalue')
+    if ingredients:
+        nutrition['ingredients'] = ingredients.get_text(strip=True)
+
+    allergens = soup.find('span', class_='labelallergensvalue')
+    if allergens:
+        nutrition['allergens'] = allergens.get_text(strip=True)
+
+    return nutrition
+
+
+# lxml engine. XPath equivalents of BeautifulSoup's class_= matching and get_text(strip=True).
+
+def _cls(name):
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+def _lxml_tree(html):
+    from lxml import html as lxml_html
+
+    if not html or not html.strip():
+        return None
+    return lxml_html.fromstring(html.encode('utf-8'), parser=lxml_html.HTMLParser(encoding='utf-8'))
+
+
+def _text(el):
+    # Like get_text(strip=True): every text node stripped and concatenated, skipping comments,
+    # scripts and styles, which BeautifulSoup doesn't count as text
+    parts = []
+    for node in el.iter():
+        if isinstance(node.tag, str) and node.tag not in ('script', 'style'):
+            if node.text:
+                parts.append(node.text.strip())
+        if node is not el and node.tail:
+            parts.append(node.tail.strip())
+    return ''.join(parts)
+
+
+def _menu_items_lxml(html, dining_hall_id, date):
+    root = _lxml_tree(html)
+    if root is None:
+        return []
+    items = []
+
+    tab_labels = {}
+    tabs = root.xpath(f"(//ul[{_cls('nav-tabs')}])[1]")
+    if tabs:
+        for tab_link in tabs[0].xpath(".//a[@role='tab']"):
+            pane_id = (tab_link.get('aria-controls') or '').strip()
+            label = _text(tab_link)
+            if pane_id and label:
+                tab_labels[pane_id] = label
+
+    panes = root.xpath(f"//div[{_cls('tab-pane')}]")
+    for pane in panes:
+        meal_period = tab_labels.get(pane.get('id', ''), 'Unknown')
+
+        for card in pane.xpath(f".//div[{_cls('card')}]"):
+            title_el = card.xpath(f"(.//h5[{_cls('card-title')}])[1]")
+            station = _text(title_el[0]) if title_el else 'Unknown'
+
+            for row in card.xpath(f".//div[{_cls('menu-item-row')}]"):
+                link = row.xpath(f"(.//a[{_cls('menu-item-name')}])[1]")
+                if not link:
+                    continue
+                href = link[0].get('href', '')
+                if 'label.aspx' not in href:
+                    continue
+
+                icons = [img.get('alt', '') for img in row.xpath(f".//img[{_cls('nutri-icon')}]")]
+
+                items.append(_menu_item(_text(link[0]), href, dining_hall_id, date, meal_period, station, icons))
+
+    if not panes:
+        for link in root.xpath("//a[@href]"):
+            href = link.get('href')
+            if 'label.aspx' not in href:
+                continue
+            items.append(_menu_item(_text(link), href, dining_hall_id, date, "Unknown", "Unknown", []))
+
+    return items
+
+
+def _label_lxml(html):
+    root = _lxml_tree(html)
+    if root is None:
+        return {}
+
+    nutrition = _label_header(
+        [_text(div) for div in root.xpath(f"//div[{_cls('nutfactsservsize')}]")],
+        [_text(p) for p in root.xpath(f"//p[{_cls('strong')}]")],
+    )
+    for nutrient in root.xpath(f"//span[{_cls('nutfactstopnutrient')}]"):
+        label = nutrient.xpath("(.//b)[1]")
+        if label:
+            name = _text(label[0])
+            value = _text(nutrient).replace(name, '').strip()
+            if name and value:
+                nutrition[name] = value
+
+    ingredients = root.xpath(f"(//span[{_cls('labelingredientsvalue')}])[1]")
+    if ingredients:
+        nutrition['ingredients'] = _text(ingredients[0])
+
+    allergens = root.xpath(f"(//span[{_cls('labelallergensvalue')}])[1]")
+    if allergens:
+        nutrition['allergens'] = _text(allergens[0])
+
+    return nutrition
@@ -1,23 +1,190 @@
-from flask import jsonify, request
-from app import app, db
-from datetime import datetime
-from scraper import scrape_all_dining_halls, fetch_and_cache_nutrition
+from flask import Blueprint, current_app, g, jsonify, request, send_file
+from database import db, check_health
+from concurrent.futures import wait as wait_for_futures
+from contextlib import nullcontext
+from datetime import datetime, timedelta
+from itertools import islice
+import time
+import pymongo
+from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo.errors import PyMongoError
+from scraper import DINING_HALLS, nutrition_backfill, scrape_jobs
+from cache import menu_cache, get_version, ALL_DATES
+from http_cache import cacheable, gzip_response
+from search import get_index
+from catalog import get_catalog
+from identity import resolve
+from metrics import REGISTRY, HTTP_REQUESTS, HTTP_LATENCY
+from models import menu_records
+from filters import parse_menu_filters, food_projection, menu_item, menu_items, split_list
+from analytics import date_range, parse_date, totals, protein_per_calorie, GROUP_FIELDS
+from pagination import (
+    DEFAULT_PAGE_SIZE, MAX_RANKED_FOODS, MAX_SEARCH_PAGE_SIZE, MAX_SUGGESTIONS, NDJSON_MIMETYPE, RANKED_FOODS,
+    SEARCH_PAGE_SIZE, STREAM_BATCH_SIZE, SUGGESTIONS, decode_cursor, encode_cursor, ndjson_line, page_size,
+    wants_ndjson,
+)
+from snapshots import SNAPSHOT_DB_TIMEOUT_SECONDS, snapshot_key, snapshots
 
-@app.route('/')
+api = Blueprint('api', __name__)
+
+api.after_app_request(gzip_response)
+
+@api.before_app_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+@api.after_app_request
+def record_request_metrics(response):
+    route = request.url_rule.rule if request.url_rule else 'unmatched'
+    HTTP_REQUESTS.inc(route=route, method=request.method, status=response.status_code)
+    HTTP_LATENCY.observe(time.perf_counter() - g.get('request_started', time.perf_counter()), route=route,
+                         method=request.method)
+    return response
+
+# Most days one POST /api/scrape may cover; longer ranges belong to backfill.py
+SCRAPE_MAX_DAYS = 14
+
+# Most rec_nums one POST /api/nutrition/batch may ask for, and the longest it waits on label fetches
+NUTRITION_BATCH_MAX = 200
+NUTRITION_BATCH_MAX_WAIT = 30
+
+def cached_response(key, version):
+    """A response rebuilt from menu_cache, or None on a miss."""
+    cached = menu_cache.get(key, version)
+    if cached is None:
+        return None
+    body, etag = cached
+    response = current_app.response_class(body, mimetype='application/json')
+    response.set_etag(etag, weak=True)
+    return response
+
+def cache_response(key, version, response):
+    response.add_etag(weak=True)
+    menu_cache.set(key, version, (response.get_data(), response.get_etag()[0]))
+    return response
+
+def snapshot_response(snapshot, stale=False):
+    """A file response for a menu snapshot, from its gzipped copy if the client accepts gzip."""
+    gzipped = 'gzip' in request.headers.get('Accept-Encoding', '').lower()
+    response = send_file(snapshot.gzip_path if gzipped else snapshot.path, mimetype='application/json',
+                         conditional=False, etag=False)
+    # The same validator and caching as the rendered response; @cacheable sets max-age
+    response.cache_control.no_cache = None
+    response.set_etag(snapshot.etag, weak=True)
+    if gzipped:
+        response.headers['Content-Encoding'] = 'gzip'
+    if stale:
+        response.headers['Warning'] = '110 - "Response is Stale"'
+    return response
+
+def menu_foods(catalog, rec_nums, food_query, fields):
+    """rec_num -> food for the given rec_nums, leaving out foods that don't match food_query.
+
+    Without food filters this is a lookup in the catalog (see catalog.py); with them, or
+    without a catalog, it's a foods query.
+    """
+    if catalog is not None and not food_query:
+        return catalog.lookup(rec_nums)
+    return {f['rec_num']: f for f in db.foods.find({'rec_num': {'$in': list(rec_nums)}, **food_query},
+                                                   food_projection(fields))}
+
+def menu_cursor(token, params):
+    """The menu entry _id a /api/menu cursor token resumes after. Raises ValueError."""
+    try:
+        return ObjectId(decode_cursor(token, params))
+    except (InvalidId, TypeError):
+        raise ValueError("invalid cursor")
+
+def iter_menu_items(query, food_query, fields, after=None):
+    """(entry _id, item) for matching menu entries in _id order, after the given _id.
+
+    Reads the cursor and joins foods STREAM_BATCH_SIZE entries at a time, so memory stays
+    flat however many entries match.
+    """
+    if after is not None:
+        query = {**query, '_id': {'$gt': after}}
+    catalog = None if food_query else get_catalog(db)
+    cursor = db.menus.find(query).sort('_id', 1).batch_size(STREAM_BATCH_SIZE)
+    while entries := list(islice(cursor, STREAM_BATCH_SIZE)):
+        foods = menu_foods(catalog, {entry['rec_num'] for entry in entries}, food_query, fields)
+        for entry in entries:
+            if not food_query or entry['rec_num'] in foods:
+                yield entry['_id'], menu_item(entry, foods.get(entry['rec_num'], {}), fields)
+
+def search_cursor(token, params):
+    """The ranking offset a /api/search cursor token resumes from. Raises ValueError."""
+    offset = decode_cursor(token, params)
+    if not isinstance(offset, int) or offset < 0:
+        raise ValueError("invalid cursor")
+    return offset
+
+def iter_foods(rec_nums):
+    """Food documents for rec_nums in that order, read STREAM_BATCH_SIZE at a time."""
+    for i in range(0, len(rec_nums), STREAM_BATCH_SIZE):
+        batch = rec_nums[i:i + STREAM_BATCH_SIZE]
+        foods = {f['rec_num']: f for f in db.foods.find({'rec_num': {'$in': batch}}, food_projection(None))}
+        yield from (foods[rec_num] for rec_num in batch if rec_num in foods)
+
+def nutrition_data(food, rec_num=None):
+    """/api/nutrition data for a fetched food, under rec_num if it was requested by an alias."""
+    return {
+        'rec_num': rec_num or food['rec_num'],
+        'name': food.get('name', ''),
+        'nutrition': food.get('nutrition', {}),
+        'allergens': food.get('allergens', ''),
+        'ingredients': food.get('ingredients', ''),
+    }
+
+def search_filters(args):
+    """Menu filters for /api/search from its date, dining_hall_id and icon params."""
+    filters = {}
+    for param, field in (('date', 'date'), ('dining_hall_id', 'dining_hall_id'), ('icon', 'dietary_icons')):
+        if args.get(param):
+            filters[field] = args.get(param)
+    return filters
+
+@api.route('/')
 def home():
     return jsonify({
         'message': 'UMD Dining API is running!',
         'version': '2.0',
         'endpoints': {
             'dining_halls': '/api/dining-halls',
-            'menu': '/api/menu?date=...&dining_hall_id=...',
+            'menu': '/api/menu?date=...&dining_hall_id=...&meal_period=...&station=...&icons=...&exclude_icons=...'
+                    '&exclude_allergens=...&min_<nutrient>=...&max_<nutrient>=...&fields=...&limit=...&cursor=...'
+                    '&format=ndjson',
             'nutrition': '/api/nutrition?rec_num=...',
-            'search': '/api/search?q=...',
-            'scrape': 'POST /api/scrape'
+            'nutrition_batch': 'POST /api/nutrition/batch {"rec_nums": [...], "partial": true, "wait": 30}',
+            'search': '/api/search?q=...&date=...&dining_hall_id=...&icon=...&limit=...&cursor=...&format=ndjson',
+            'autocomplete': '/api/search/autocomplete?q=...',
+            'analytics_totals': '/api/analytics/totals?start=...&end=...&group_by=date,dining_hall_id,meal_period',
+            'analytics_protein': '/api/analytics/protein-per-calorie?start=...&end=...',
+            'scrape': 'POST /api/scrape?date=...&days=...&force=...',
+            'scrape_status': '/api/scrape/<job_id>',
+            'metrics': '/metrics',
+            'health': '/health',
+            'ready': '/ready'
         }
     })
 
-@app.get('/api/dining-halls')
+@api.get('/health')
+def health():
+    # Liveness: answers as soon as the worker is up, without touching MongoDB
+    return jsonify({'status': 'ok'})
+
+@api.get('/ready')
+def ready():
+    # Readiness: 503 until MongoDB answers a ping within READY_TIMEOUT_SECONDS
+    mongo = check_health()
+    return jsonify({'status': 'ready' if mongo['ok'] else 'unavailable', 'mongo': mongo}), 200 if mongo['ok'] else 503
+
+@api.get('/metrics')
+def metrics():
+    return current_app.response_class(REGISTRY.render(), mimetype='text/plain; version=0.0.4')
+
+@api.get('/api/dining-halls')
+@cacheable(max_age=3600)
 def get_dining_halls():
     try:
         halls = list(db.dining_halls.find({}, {'_id': 0}))
@@ -29,81 +196,175 @@ def get_dining_halls():
     except Exception as e:
         return jsonify({'success': False,'error': str(e)}), 500
 
-@app.get('/api/menu')
+@api.get('/api/menu')
+@cacheable(max_age=60)
 def get_menu():
     try:
-        query = {}
+        try:
+            query, food_query, fields = parse_menu_filters(request.args)
+            params = list(request.args.items(multi=True))
+            limit = page_size(request.args.get('limit'))
+            after = menu_cursor(request.args['cursor'], params) if request.args.get('cursor') else None
+            stream = wants_ndjson(request.args.get('format'))
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
 
-        dining_hall_id = request.args.get('dining_hall_id')
-        date = request.args.get('date')
+        # NDJSON: items are written as they come off the cursor, so nothing is cached
+        if stream:
+            items = (item for _, item in iter_menu_items(query, food_query, fields, after))
+            return current_app.response_class(map(ndjson_line, islice(items, limit)), mimetype=NDJSON_MIMETYPE)
 
-        if dining_hall_id:
-            query['dining_hall_id'] = dining_hall_id
+        date = query.get('date')
 
-        if date:
-            query['date'] = date
+        # The version must be read before the data so a concurrent scrape can't be cached as current.
+        # A request for a whole date or hall is answered from its snapshot file if that is current.
+        snapshot_at = snapshot_key(request.args, DINING_HALLS)
+        last_good = snapshots.get(*snapshot_at) if snapshot_at else None
+        try:
+            # Don't let a slow MongoDB hold up a request the snapshot can answer
+            with pymongo.timeout(SNAPSHOT_DB_TIMEOUT_SECONDS) if last_good else nullcontext():
+                version = get_version(db, date)
+        except PyMongoError:
+            if not last_good:
+                raise
+            return snapshot_response(last_good, stale=True)
+        current = snapshots.get(*snapshot_at, version=version) if snapshot_at else None
+        if current:
+            return snapshot_response(current)
 
-        # Get menu entries
-        menu_entries = list(db.menus.find(query, {'_id': 0}))
+        # Serve the serialized response if nothing was written for this date since it was built
+        cache_key = (date, tuple(sorted(params)))
+        cached = cached_response(cache_key, version)
+        if cached is not None:
+            return cached
 
-        # Join with foods collection
-        rec_nums = [entry['rec_num'] for entry in menu_entries]
-        foods = {f['rec_num']: f for f in db.foods.find({'rec_num': {'$in': rec_nums}}, {'_id': 0})}
+        body = {'success': True}
+        if limit or after:
+            # One page in _id order, plus one entry to tell whether there is another
+            limit = limit or DEFAULT_PAGE_SIZE
+            page = list(islice(iter_menu_items(query, food_query, fields, after), limit + 1))
+            items = [item for _, item in page[:limit]]
+            body['next_cursor'] = encode_cursor(str(page[limit - 1][0]), params) if len(page) > limit else None
+        else:
+            # Get menu entries
+            menu_entries = menu_records(db.menus.find(query, {'_id': 0}))
 
-        items = []
-        for entry in menu_entries:
-            food = foods.get(entry['rec_num'], {})
-            item = {
-                'name': food.get('name', ''),
-                'rec_num': entry['rec_num'],
-                'dining_hall_id': entry['dining_hall_id'],
-                'date': entry['date'],
-                'meal_period': entry.get('meal_period', 'Unknown'),
-                'station': entry.get('station', 'Unknown'),
-                'dietary_icons': entry.get('dietary_icons', []),
-                'nutrition_fetched': food.get('nutrition_fetched', False),
-            }
-            if food.get('nutrition_fetched'):
-                item['nutrition'] = food.get('nutrition', {})
-                item['allergens'] = food.get('allergens', '')
-                item['ingredients'] = food.get('ingredients', '')
-            items.append(item)
+            # Join with foods, from the catalog unless food-level filters drop entries whose food doesn't match
+            catalog = None if food_query else get_catalog(db)
+            foods = menu_foods(catalog, {entry['rec_num'] for entry in menu_entries}, food_query, fields)
 
-        return jsonify({
-            'success': True,
+            items = menu_items(menu_entries, foods, food_query, fields)
+
+        response = jsonify({
+            **body,
             'count': len(items),
-            'filters': query,
+            'filters': {**query, **food_query},
             'data': items
         })
+        if snapshot_at:
+            # The snapshot was missing or out of date; this response replaces it
+            try:
+                snapshots.write(*snapshot_at, version, response.get_data(), menu_entries, foods)
+            except OSError as e:
+                print(f"Writing the menu snapshot for {snapshot_at} failed: {e}")
+        return cache_response(cache_key, version, response)
     except Exception as e:
         return jsonify({'success': False,'error': str(e)}), 500
 
-@app.get('/api/nutrition')
+@api.get('/api/nutrition')
+@cacheable(max_age=3600)
 def get_nutrition():
     try:
         rec_num = request.args.get('rec_num')
         if not rec_num:
             return jsonify({'success': False, 'error': 'rec_num parameter required'}), 400
 
-        food = fetch_and_cache_nutrition(rec_num)
-
+        canonical = rec_num
+        food = db.foods.find_one({'rec_num': rec_num}, {'_id': 0})
         if not food:
-            return jsonify({'success': False, 'error': 'Food not found'}), 404
+            # A rec_num merged into another food is answered with that food (see identity.py)
+            canonical = resolve(db, [rec_num]).get(rec_num, rec_num)
+            if canonical != rec_num:
+                food = db.foods.find_one({'rec_num': canonical}, {'_id': 0})
+
+        # Not fetched yet: queue it (shared with any fetch already running) and answer right away
+        if not food or not food.get('nutrition_fetched'):
+            nutrition_backfill.submit(canonical)
+            return jsonify({
+                'success': True,
+                'status': 'pending',
+                'data': {'rec_num': rec_num, 'name': food.get('name', '') if food else ''}
+            }), 202
 
         return jsonify({
             'success': True,
-            'data': {
-                'rec_num': food['rec_num'],
-                'name': food.get('name', ''),
-                'nutrition': food.get('nutrition', {}),
-                'allergens': food.get('allergens', ''),
-                'ingredients': food.get('ingredients', ''),
-            }
+            'status': 'ready',
+            'data': nutrition_data(food, rec_num)
         })
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
-@app.get('/api/search')
+@api.post('/api/nutrition/batch')
+def get_nutrition_batch():
+    try:
+        body = request.get_json(silent=True) or {}
+        rec_nums = body.get('rec_nums')
+        if not isinstance(rec_nums, list) or not rec_nums or not all(isinstance(r, str) and r for r in rec_nums):
+            return jsonify({'success': False, 'error': 'rec_nums must be a non-empty list of strings'}), 400
+        rec_nums = list(dict.fromkeys(rec_nums))
+        if len(rec_nums) > NUTRITION_BATCH_MAX:
+            return jsonify({'success': False, 'error': f'at most {NUTRITION_BATCH_MAX} rec_nums per batch'}), 400
+
+        partial = body.get('partial', True)
+        if not isinstance(partial, bool):
+            return jsonify({'success': False, 'error': 'partial must be true or false'}), 400
+        try:
+            wait = min(max(float(body.get('wait', NUTRITION_BATCH_MAX_WAIT)), 0.0), NUTRITION_BATCH_MAX_WAIT)
+        except (TypeError, ValueError):
+            return jsonify({'success': False, 'error': 'wait must be a number of seconds'}), 400
+
+        def fetched(rec_num):
+            return foods.get(canonical[rec_num], {}).get('nutrition_fetched', False)
+
+        foods = {f['rec_num']: f for f in db.foods.find({'rec_num': {'$in': rec_nums}}, {'_id': 0})}
+
+        # rec_nums merged into another food are answered with that food (see identity.py)
+        canonical = {rec_num: rec_num for rec_num in rec_nums}
+        aliases = resolve(db, [rec_num for rec_num in rec_nums if rec_num not in foods])
+        if aliases:
+            canonical.update(aliases)
+            foods.update((f['rec_num'], f) for f in db.foods.find({'rec_num': {'$in': list(set(aliases.values()))}},
+                                                                  {'_id': 0}))
+
+        # Queue the rest; each shares any fetch already running for the same rec_num
+        pending = [rec_num for rec_num in rec_nums if not fetched(rec_num)]
+        futures = {rec_num: nutrition_backfill.submit(canonical[rec_num]) for rec_num in pending}
+
+        # partial=false: wait (up to wait seconds) for the fetches, then pick up what they stored
+        failed = []
+        if pending and not partial:
+            wait_for_futures(futures.values(), timeout=wait)
+            failed = [rec_num for rec_num, future in futures.items() if future.done() and future.exception()]
+            # A fetched label may have been merged into an older food (see identity.merge_fetched)
+            merged = resolve(db, {canonical[rec_num] for rec_num in pending})
+            canonical.update((rec_num, merged[canonical[rec_num]]) for rec_num in pending if canonical[rec_num] in merged)
+            foods.update((f['rec_num'], f) for f in db.foods.find({'rec_num': {'$in': [canonical[r] for r in pending]}},
+                                                                  {'_id': 0}))
+            pending = [rec_num for rec_num in pending if rec_num not in failed and not fetched(rec_num)]
+
+        data = [nutrition_data(foods[canonical[rec_num]], rec_num) for rec_num in rec_nums if fetched(rec_num)]
+        return jsonify({
+            'success': True,
+            'count': len(data),
+            'data': data,
+            'pending': pending,
+            'failed': failed
+        }), 202 if pending else 200
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@api.get('/api/search')
+@cacheable(max_age=60)
 def search_menu():
     try:
         search_query = request.args.get('q', '')
@@ -111,30 +372,172 @@ def search_menu():
         if not search_query:
             return jsonify({'success': False,'error': 'Search query required'}), 400
 
-        # Search in foods collection by name
-        foods = list(db.foods.find(
-            {'name': {'$regex': search_query, '$options': 'i'}},
-            {'_id': 0}
-        ).limit(50))
+        try:
+            params = list(request.args.items(multi=True))
+            offset = search_cursor(request.args['cursor'], params) if request.args.get('cursor') else 0
+            stream = wants_ndjson(request.args.get('format'))
+            limit = page_size(request.args.get('limit'), MAX_SEARCH_PAGE_SIZE)
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+
+        filters = search_filters(request.args)
+
+        ranked = get_index(db).search(search_query)
+
+        # Keep only foods served on the requested date / hall / with the icon
+        if filters:
+            served = set(db.menus.distinct('rec_num', {'rec_num': {'$in': ranked}, **filters}))
+            ranked = [rec_num for rec_num in ranked if rec_num in served]
+
+        # NDJSON: every match from the cursor on (or limit of them), in rank order
+        if stream:
+            end = offset + limit if limit else None
+            return current_app.response_class(map(ndjson_line, iter_foods(ranked[offset:end])),
+                                              mimetype=NDJSON_MIMETYPE)
+
+        limit = limit or SEARCH_PAGE_SIZE
+        page = ranked[offset:offset + limit]
+        foods = {f['rec_num']: f for f in db.foods.find({'rec_num': {'$in': page}}, food_projection(None))}
+        data = [foods[rec_num] for rec_num in page if rec_num in foods]
 
         return jsonify({
             'success': True,
             'query': search_query,
-            'count': len(foods),
-            'data': foods
+            'filters': filters,
+            'count': len(data),
+            'next_cursor': encode_cursor(offset + limit, params) if len(ranked) > offset + limit else None,
+            'data': data
         })
     except Exception as e:
         return jsonify({'success': False,'error': str(e)}), 500
 
-@app.post('/api/scrape')
+@api.get('/api/search/autocomplete')
+@cacheable(max_age=300)
+def autocomplete():
+    try:
+        prefix = request.args.get('q', '')
+        if not prefix:
+            return jsonify({'success': False, 'error': 'Search query required'}), 400
+
+        try:
+            limit = page_size(request.args.get('limit'), MAX_SUGGESTIONS) or SUGGESTIONS
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+
+        index = get_index(db)
+        suggestions = [{'rec_num': rec_num, 'name': index.names[rec_num]} for rec_num in index.search(prefix)[:limit]]
+
+        return jsonify({
+            'success': True,
+            'query': prefix,
+            'count': len(suggestions),
+            'data': suggestions
+        })
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+def analytics_args():
+    """(dates, dining_hall_id, meal_period) for an analytics request; end defaults to start."""
+    start = request.args.get('start')
+    if not start:
+        raise ValueError('start parameter required')
+    dates = date_range(start, request.args.get('end', start))
+    return dates, request.args.get('dining_hall_id'), request.args.get('meal_period')
+
+@api.get('/api/analytics/totals')
+@cacheable(max_age=300)
+def analytics_totals():
+    try:
+        try:
+            dates, dining_hall_id, meal_period = analytics_args()
+            group_by = split_list(request.args.get('group_by', ','.join(GROUP_FIELDS)))
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+
+        # Spans many dates, so keyed on the all-dates version bumped by every write
+        cache_key = ('analytics_totals', tuple(sorted(request.args.items(multi=True))))
+        version = get_version(db, ALL_DATES)
+        cached = cached_response(cache_key, version)
+        if cached is not None:
+            return cached
+
+        try:
+            rows = totals(db, dates, group_by, dining_hall_id, meal_period)
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+
+        return cache_response(cache_key, version, jsonify({
+            'success': True,
+            'start': dates[0],
+            'end': dates[-1],
+            'group_by': group_by,
+            'count': len(rows),
+            'data': rows
+        }))
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@api.get('/api/analytics/protein-per-calorie')
+@cacheable(max_age=300)
+def analytics_protein_per_calorie():
+    try:
+        try:
+            dates, dining_hall_id, meal_period = analytics_args()
+            min_calories = float(request.args.get('min_calories', 50))
+            limit = page_size(request.args.get('limit'), MAX_RANKED_FOODS) or RANKED_FOODS
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+
+        cache_key = ('analytics_protein', tuple(sorted(request.args.items(multi=True))))
+        version = get_version(db, ALL_DATES)
+        cached = cached_response(cache_key, version)
+        if cached is not None:
+            return cached
+
+        ranked = protein_per_calorie(db, dates, dining_hall_id, meal_period, min_calories, limit)
+        return cache_response(cache_key, version, jsonify({
+            'success': True,
+            'start': dates[0],
+            'end': dates[-1],
+            'count': len(ranked),
+            'data': ranked
+        }))
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@api.post('/api/scrape')
 def scrape():
     try:
         date = request.args.get('date', datetime.now().strftime('%-m/%-d/%Y'))
-        items = scrape_all_dining_halls(date)
+        force = request.args.get('force', '').lower() == 'true'
+        try:
+            days = int(request.args.get('days', 1))
+            dates = date_range(date, (parse_date(date) + timedelta(days=days - 1)).strftime('%-m/%-d/%Y'))
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+        if len(dates) > SCRAPE_MAX_DAYS:
+            return jsonify({'success': False, 'error': f'days is limited to {SCRAPE_MAX_DAYS}'}), 400
+
+        # Runs in the background; an identical scrape already queued or running is reused
+        job, created = scrape_jobs.submit(dates, force)
         return jsonify({
             'success': True,
-            'date': date,
-            'items_scraped': len(items)
-        })
+            'job_id': job['_id'],
+            'status': job['status'],
+            'created': created,
+            'dates': dates,
+            'status_url': f"/api/scrape/{job['_id']}"
+        }), 202
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@api.get('/api/scrape/<job_id>')
+def scrape_status(job_id):
+    try:
+        job = scrape_jobs.get(job_id)
+        if job is None:
+            return jsonify({'success': False, 'error': 'Job not found'}), 404
+        job['job_id'] = job.pop('_id')
+        return jsonify({'success': True, 'data': job})
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
@@ -1,210 +1,74 @@
-import requests
-from bs4 import BeautifulSoup
-from pymongo import MongoClient
-from datetime import datetime
-import os
-from dotenv import load_dotenv
-
-load_dotenv()
-
-# MongoDB connection
-mongo_uri = os.getenv('MONGO_URI')
-client = MongoClient(mongo_uri)
-db = client.get_database()
-
-# Base URL
-BASE_URL = "https://nutrition.umd.edu"
-
-# Known dining halls (locationNum -> name)
-DINING_HALLS = {
-    "19": {"name": "Yahentamitsi Dining Hall", "location": "South Campus"},
-    "51": {"name": "251 North", "location": "North Campus"},
-    "16": {"name": "South Campus Diner", "location": "South Campus"},
-}
-
-def get_menu_page(location_num, date):
-    url = f"{BASE_URL}/?locationNum={location_num}&dtdate={date}"
-    response = requests.get(url)
-    response.raise_for_status()
-
-    return response.text
-
-def parse_menu_page(html, dining_hall_id, date):
-    soup = BeautifulSoup(html, 'html.parser')
-    items = []
-
-    # Determine meal period labels from the tab nav
-    tab_labels = {}
-    tabs = soup.find('ul', class_='nav-tabs')
-    if tabs:
-        for tab_link in tabs.find_all('a', role='tab'):
-            pane_id = (tab_link.get('aria-controls') or '').strip()
-            label = tab_link.get_text(strip=True)
-            if pane_id and label:
-                tab_labels[pane_id] = label
-
-    # Parse food items from each tab pane, grouped by station (card)
-    panes = soup.find_all('div', class_='tab-pane')
-    for pane in panes:
-        pane_id = pane.get('id', '')
-        meal_period = tab_labels.get(pane_id, 'Unknown')
-
-        for card in pane.find_all('div', class_='card'):
-            title_el = card.find('h5', class_='card-title')
-            station = title_el.get_text(strip=True) if title_el else 'Unknown'
-
-            for row in card.find_all('div', class_='menu-item-row'):
-                link = row.find('a', class_='menu-item-name')
-                if not link:
-                    continue
-                href = link.get('href', '')
-                if 'label.aspx' not in href:
-                    continue
-
-                name = link.get_text(strip=True)
-                rec_num = href.split('RecNumAndPort=')[-1]
-
-                # Dietary icons (vegan, vegetarian, dairy, gluten, etc.)
-                icons = [img.get('alt', '') for img in row.find_all('img', class_='nutri-icon')]
-
-                items.append({
-                    "name": name,
-                    "dining_hall_id": dining_hall_id,
-                    "date": date,
-                    "rec_num": rec_num,
-                    "meal_period": meal_period,
-                    "station": station,
-                    "dietary_icons": icons,
-                })
-
-    # Fallback: if no tab panes found, grab all links
-    if not panes:
-        for link in soup.find_all('a', href=True):
-            href = link.get('href')
-            if 'label.aspx' not in href:
-                continue
-            name = link.get_text(strip=True)
-            rec_num = href.split('RecNumAndPort=')[-1]
-            items.append({
-                "name": name,
-                "dining_hall_id": dining_hall_id,
-                "date": date,
-                "rec_num": rec_num,
-                "meal_period": "Unknown",
-                "station": "Unknown",
-                "dietary_icons": [],
-            })
-
-    return items
-
-def get_nutrition_info(rec_num):
-    url = f"{BASE_URL}/label.aspx?RecNumAndPort={rec_num}"
-    response = requests.get(url)
-    response.raise_for_status()
-
-    soup = BeautifulSoup(response.text, 'html.parser')
-
-    nutrition = {}
-    nutrients = soup.find_all('span', class_='nutfactstopnutrient')
-
-    for nutrient in nutrients:
-        label = nutrient.find('b')
-        if label:
-            name = label.get_text(strip=True)
-            value = nutrient.get_text(strip=True).replace(name, '').strip()
-            if name and value:
-                nutrition[name] = value
-
-    ingredients = soup.find('span', class_='labelingredientsvalue')
-    if ingredients:
-        nutrition['ingredients'] = ingredients.get_text(strip=True)
-
-    allergens = soup.find('span', class_='labelallergensvalue')
-    if allergens:
-        nutrition['allergens'] = allergens.get_text(strip=True)
-
-    return nutrition
-
-def scrape_dining_hall(location_num, date):
-    """Scrape a dining hall's menu for a date. Adds menu entries and food stubs (no nutrition fetch)."""
-    items = parse_menu_page(get_menu_page(location_num, date), location_num, date)
-
-    for item in items:
-        # Add to menus collection
-        menu_doc = {
-            "date": date,
-            "dining_hall_id": location_num,
-            "rec_num": item["rec_num"],
-            "meal_period": item["meal_period"],
-            "station": item["station"],
-            "dietary_icons": item["dietary_icons"],
-        }
-        db.menus.update_one(
-            {"date": date, "dining_hall_id": location_num, "rec_num": item["rec_num"], "meal_period": item["meal_period"]},
-            {"$set": menu_doc},
-            upsert=True
-        )
-
-        # Add to foods collection if not already there
-        db.foods.update_one(
-            {"rec_num": item["rec_num"]},
-            {"$setOnInsert": {
-                "rec_num": item["rec_num"],
-                "name": item["name"],
-                "nutrition": {},
-                "allergens": "",
-                "ingredients": "",
-                "nutrition_fetched": False
-            }},
-            upsert=True
-        )
-
-    return items
-
-def scrape_all_dining_halls(date):
-    """Scrape all dining halls for a date. Cleans old menus, then scrapes fresh."""
-    today = datetime.now().strftime('%-m/%-d/%Y')
-
-    # Delete old menus (dates before today)
-    all_menus = db.menus.distinct("date")
-    for menu_date in all_menus:
-        try:
-            parsed = datetime.strptime(menu_date, '%m/%d/%Y')
-            if parsed.date() < datetime.now().date():
-                db.menus.delete_many({"date": menu_date})
-        except ValueError:
-            pass
-
-    # Delete today's menus for a fresh scrape
-    db.menus.delete_many({"date": date})
-
-    all_items = []
-    for location_num in DINING_HALLS:
-        items = scrape_dining_hall(location_num, date)
-        all_items.extend(items)
-
-    return all_items
+"""The app's scraper: the shared scrape and write code in ingest.py, bound to the app's database.
+
+Menu and label writes go to database.db and record page validators in fetch_cache, so
+every caller here (routes, scrape jobs, backfill.py, the nutrition worker) shares them.
+The Lambda binds the same functions to its own client (lambda/scraper_core.py).
+"""
+
+import ingest
+from fetch_cache import FetchCache
+from ingest import (
+    DINING_HALLS, SCRAPE_MAX_WORKERS, MENU_RETENTION_DAYS, run_concurrently, menu_url, label_url, fetch_page,
+    get_menu_page, parse_label, parse_menu,
+)
+from nutrition_worker import NutritionBackfill
+from jobs import ScrapeJobs
+from database import db
+
+# ETag/Last-Modified and body hash of every page whose data has been written
+fetch_cache = FetchCache(db.fetch_cache)
+
+def refresh_menu(date, dining_hall_id, items):
+    """Make the stored menu for (date, dining_hall_id) match freshly parsed items (see ingest.refresh_menu)."""
+    return ingest.refresh_menu(db, date, dining_hall_id, items)
+
+def ingest_items(date, items_by_hall, ordered=False):
+    """Write a scrape's parsed items for one date (see ingest.ingest_items)."""
+    return ingest.ingest_items(db, date, items_by_hall, ordered)
+
+def bump_menu_versions(dates):
+    """Invalidate cached /api/menu responses for these dates and notify subscribers (see ingest.bump_menu_versions)."""
+    ingest.bump_menu_versions(db, dates)
+
+def scrape_dining_hall(location_num, date, force=False):
+    """Scrape one dining hall's menu for a date (see ingest.scrape_dining_hall)."""
+    return ingest.scrape_dining_hall(db, fetch_cache, location_num, date, force)
+
+def apply_retention(retention_days=MENU_RETENTION_DAYS):
+    """Delete menus (and snapshots) older than retention_days. Returns the deleted dates."""
+    return ingest.apply_retention(db, retention_days)
+
+def scrape_all_dining_halls(date, max_workers=None, prefetch=False, force=False, on_hall=None):
+    """Scrape all dining halls for a date (see ingest.scrape_all_dining_halls). Returns (items, write counts)."""
+    return ingest.scrape_all_dining_halls(db, fetch_cache, date, max_workers, prefetch, force, on_hall)
 
 def fetch_and_cache_nutrition(rec_num):
     """Fetch nutrition for a food item and cache it permanently. Returns the food document."""
-    food = db.foods.find_one({"rec_num": rec_num})
-
-    if food and food.get("nutrition_fetched"):
-        return food
-
-    nutrition_data = get_nutrition_info(rec_num)
-
-    update = {
-        "nutrition_fetched": True,
-        "nutrition": {k: v for k, v in nutrition_data.items() if k not in ("ingredients", "allergens")},
-        "allergens": nutrition_data.get("allergens", ""),
-        "ingredients": nutrition_data.get("ingredients", ""),
+    return ingest.fetch_and_cache_nutrition(db, fetch_cache, rec_num)
+
+def store_nutrition(rec_num, nutrition_data):
+    """Write a parsed label to its food (see ingest.store_nutrition). Returns the food document."""
+    return ingest.store_nutrition(db, fetch_cache, rec_num, nutrition_data)
+
+def find_pending_nutrition(rec_nums=None):
+    """rec_nums of food stubs without nutrition, limited to rec_nums if given."""
+    return ingest.find_pending_nutrition(db, rec_nums)
+
+def prefetch_nutrition(rec_nums=None, max_workers=None):
+    """Fetch nutrition in parallel for food stubs that don't have it yet. Returns the number fetched."""
+    return ingest.prefetch_nutrition(db, fetch_cache, rec_nums, max_workers)
+
+# Background label fetching for the API (see nutrition_worker.py)
+nutrition_backfill = NutritionBackfill(fetch_and_cache_nutrition, find_pending_nutrition, db.scrape_locks)
+
+def run_scrape_job(date, force, on_hall):
+    """One date of a background scrape job: scrape it and queue nutrition for new foods."""
+    items, stats = scrape_all_dining_halls(date, force=force, on_hall=on_hall)
+    return {
+        "items_scraped": len(items),
+        "writes": stats,
+        "nutrition_queued": nutrition_backfill.submit_pending({item["rec_num"] for item in items}),
     }
 
-    db.foods.update_one(
-        {"rec_num": rec_num},
-        {"$set": update},
-        upsert=True
-    )
-
-    return db.foods.find_one({"rec_num": rec_num})
+# Non-blocking POST /api/scrape (see jobs.py)
+scrape_jobs = ScrapeJobs(db.scrape_jobs, db.scrape_locks, run_scrape_job, DINING_HALLS)
@@ -0,0 +1,134 @@
+"""In-memory search index over food names.
+
+Names are normalized (accents folded, lowercased, split on non-alphanumerics) into tokens
+with a posting list per token. A query term matches a token exactly, as a prefix (the
+last term only, for autocomplete), or with one typo via a symmetric-delete map. Results
+are ranked by how well each term matched, with a bonus for names that start with the
+query.
+
+Food names never change once a stub is inserted, so the index catches up by loading
+foods with an _id above the last one it saw; a full rebuild every
+SEARCH_INDEX_REBUILD_SECONDS picks up deletions.
+"""
+
+import os
+import re
+import threading
+import time
+import unicodedata
+from bisect import bisect_left
+from collections import defaultdict
+
+SEARCH_INDEX_REBUILD_SECONDS = float(os.getenv('SEARCH_INDEX_REBUILD_SECONDS', '3600'))
+
+# Weights for how a query term matched a name token
+EXACT, PREFIX, TYPO = 1.0, 0.7, 0.5
+
+# Tokens shorter than this must match exactly or by prefix
+MIN_TYPO_LENGTH = 4
+
+
+def normalize(text):
+    """Lowercase ASCII tokens of text, with accents removed."""
+    text = unicodedata.normalize('NFKD', text or '').encode('ascii', 'ignore').decode('ascii')
+    return re.findall(r'[a-z0-9]+', text.lower())
+
+
+def _deletes(token):
+    return {token[:i] + token[i + 1:] for i in range(len(token))}
+
+
+class SearchIndex:
+    def __init__(self):
+        self.names = {}
+        self.normalized = {}
+        self.postings = defaultdict(set)
+        self.sorted_tokens = []
+        self.typo_map = defaultdict(set)
+        self.last_id = None
+        self.built_at = 0.0
+        self.lock = threading.Lock()
+
+    def add(self, rec_num, name):
+        tokens = normalize(name)
+        self.names[rec_num] = name
+        self.normalized[rec_num] = ' '.join(tokens)
+        for token in tokens:
+            if token not in self.postings:
+                self.sorted_tokens.insert(bisect_left(self.sorted_tokens, token), token)
+                if len(token) >= MIN_TYPO_LENGTH:
+                    for variant in _deletes(token) | {token}:
+                        self.typo_map[variant].add(token)
+            self.postings[token].add(rec_num)
+
+    def load(self, db):
+        """Index foods inserted since the last load."""
+        with self.lock:
+            query = {'_id': {'$gt': self.last_id}} if self.last_id is not None else {}
+            for food in db.foods.find(query, {'rec_num': 1, 'name': 1}).sort('_id', 1):
+                self.add(food['rec_num'], food.get('name', ''))
+                self.last_id = food['_id']
+
+    def expand(self, term, prefix=False):
+        """Index tokens matching a query term, with the weight of the best way each matched."""
+        matches = {}
+        if prefix:
+            i = bisect_left(self.sorted_tokens, term)
+            while i < len(self.sorted_tokens) and self.sorted_tokens[i].startswith(term):
+                matches[self.sorted_tokens[i]] = PREFIX
+                i += 1
+        if len(term) >= MIN_TYPO_LENGTH:
+            for variant in _deletes(term) | {term}:
+                for token in self.typo_map.get(variant, ()):
+                    matches.setdefault(token, TYPO)
+        if term in self.postings:
+            matches[term] = EXACT
+        return matches
+
+    def search(self, query):
+        """rec_nums whose names match every query term, best first."""
+        terms = normalize(query)
+        if not terms:
+            return []
+        with self.lock:
+            return self._search(terms)
+
+    def _search(self, terms):
+        scores = None
+        for i, term in enumerate(terms):
+            term_scores = {}
+            for token, weight in self.expand(term, prefix=i == len(terms) - 1).items():
+                for rec_num in self.postings[token]:
+                    if weight > term_scores.get(rec_num, 0):
+                        term_scores[rec_num] = weight
+            if scores is None:
+                scores = term_scores
+            else:
+                scores = {rec_num: score + term_scores[rec_num] for rec_num, score in scores.items() if rec_num in term_scores}
+            if not scores:
+                return []
+
+        phrase = ' '.join(terms)
+
+        def rank(rec_num):
+            normalized = self.normalized[rec_num]
+            # Higher score first, then names starting with the query, then shorter names
+            return (-scores[rec_num], not normalized.startswith(phrase), len(normalized), self.names[rec_num])
+
+        return sorted(scores, key=rank)
+
+
+_index = SearchIndex()
+_index_lock = threading.Lock()
+
+
+def get_index(db):
+    """The process-wide index, caught up with the foods collection."""
+    global _index
+    with _index_lock:
+        if time.monotonic() - _index.built_at > SEARCH_INDEX_REBUILD_SECONDS:
+            _index = SearchIndex()
+            _index.built_at = time.monotonic()
+        index = _index
+    index.load(db)
+    return index
@@ -0,0 +1,258 @@
+"""Precomputed /api/menu snapshots per (date, hall), served straight from disk.
+
+A date's menu only changes when a scrape or a label fetch writes to it (and bumps its
+menu version), so after each scrape the menu is materialized per hall, plus one file for
+the whole date, under SNAPSHOT_DIR/<database>/<YYYY-MM-DD>/:
+
+    19.json        the exact /api/menu?date=...&dining_hall_id=19 response body
+    19.json.gz     the same, gzipped, for clients that accept it
+    19.cols        the items as columns (see write_columns) for analytics
+    19.meta.json   menu version, ETag and item count; written last, so it marks a complete snapshot
+
+all.* is the date without a hall filter. Files are replaced atomically. Menu versions are
+per-database counters, hence the database name in the path.
+
+/api/menu serves a snapshot whose version matches the date's current menu version as a
+file response (sendfile under gunicorn). If MongoDB doesn't answer the version lookup
+within SNAPSHOT_DB_TIMEOUT_SECONDS, the last good snapshot is served anyway, marked stale.
+A version mismatch falls through to the normal query and the response it renders becomes
+the new snapshot.
+"""
+
+import gzip
+import json
+import math
+import mmap
+import os
+import shutil
+import struct
+import tempfile
+import threading
+from array import array
+from datetime import datetime
+
+from werkzeug.http import generate_etag
+
+from analytics import parse_date
+from database import db
+from filters import menu_items
+from models import menu_records
+
+SNAPSHOT_DIR = os.getenv('SNAPSHOT_DIR') or os.path.join(tempfile.gettempdir(), 'umd-dining-snapshots')
+
+# Set to 0 to answer every /api/menu request from MongoDB (the benchmarks' --no-cache)
+MENU_SNAPSHOTS = os.getenv('MENU_SNAPSHOTS', '1') != '0'
+
+# How long /api/menu waits on the version lookup before serving a snapshot it can't confirm
+SNAPSHOT_DB_TIMEOUT_SECONDS = float(os.getenv('SNAPSHOT_DB_TIMEOUT_SECONDS', '0.5'))
+
+ALL_HALLS = 'all'
+COLUMNS_MAGIC = b'UMDC'
+STRING_COLUMNS = ('rec_num', 'name', 'dining_hall_id', 'meal_period', 'station')
+
+
+def render_json(payload):
+    """Response bytes identical to Flask's jsonify, so snapshot and live ETags agree."""
+    return (json.dumps(payload, sort_keys=True, separators=(',', ':')) + '\n').encode()
+
+
+def canonical_date(date):
+    """date if it is a menu date spelled as the scraper stores it ('1/5/2026', not '01/05/2026'), else None."""
+    try:
+        day = parse_date(date)
+    except (TypeError, ValueError):
+        return None
+    return date if date == f'{day.month}/{day.day}/{day.year}' else None
+
+
+def snapshot_key(args, halls):
+    """(date, hall or None) if a /api/menu request is exactly what a snapshot holds, else None.
+
+    Only canonical dates and halls in halls are snapshotted: another spelling of a date
+    would share its files but not its menu version, and arbitrary values would create files.
+    """
+    if not snapshots.enabled or set(args.keys()) - {'date', 'dining_hall_id'}:
+        return None
+    date, hall = canonical_date(args.get('date')), args.get('dining_hall_id') or None
+    if date is None or (hall is not None and hall not in halls):
+        return None
+    return date, hall
+
+
+def date_slug(date):
+    """'1/5/2026' -> '2026-01-05'. Raises ValueError if date isn't a menu date."""
+    return parse_date(date).strftime('%Y-%m-%d')
+
+
+def write_columns(f, entries, foods):
+    """Write menu entries joined with their foods' parsed nutrients to binary file f as columns.
+
+    Layout: magic, uint32 header length, JSON header, then each column's bytes at the
+    offset the header gives. String columns are UTF-8 joined with newlines; nutrient
+    columns are float64 arrays with NaN where a food has no value.
+    """
+    nutrient_keys = sorted({key for food in foods.values() for key in food.get('nutrients', {})})
+    blocks = []
+    for name in STRING_COLUMNS:
+        values = [entry.get(name) if name in entry else foods.get(entry['rec_num'], {}).get(name, '') for entry in entries]
+        blocks.append((name, 'str', '\n'.join(str(value or '') for value in values).encode()))
+    for key in nutrient_keys:
+        values = array('d', (foods.get(entry['rec_num'], {}).get('nutrients', {}).get(key, math.nan) for entry in entries))
+        blocks.append((key, 'f8', values.tobytes()))
+
+    columns, offset = [], 0
+    for name, kind, data in blocks:
+        offset += -offset % 8  # keep float64 columns aligned for zero-copy casts
+        columns.append({'name': name, 'type': kind, 'offset': offset, 'length': len(data)})
+        offset += len(data)
+    header = json.dumps({'rows': len(entries), 'columns': columns}).encode()
+    start = len(COLUMNS_MAGIC) + 4 + len(header)
+    start += -start % 8
+
+    f.write(COLUMNS_MAGIC + struct.pack('<I', len(header)) + header)
+    f.write(b'\0' * (start - f.tell()))
+    for (_, _, data), column in zip(blocks, columns):
+        f.write(b'\0' * (start + column['offset'] - f.tell()))
+        f.write(data)
+
+
+def read_columns(path):
+    """Memory-map a columnar snapshot. Returns (rows, {name: column}).
+
+    Nutrient columns are float64 memoryviews over the map (no copy); string columns are lists.
+    The map stays open as long as any column refers to it.
+    """
+    with open(path, 'rb') as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    if mapped[:4] != COLUMNS_MAGIC:
+        raise ValueError(f"{path} is not a columnar snapshot")
+    (header_length,) = struct.unpack('<I', mapped[4:8])
+    header = json.loads(mapped[8:8 + header_length])
+    start = 8 + header_length
+    start += -start % 8
+
+    view = memoryview(mapped)
+    columns = {}
+    for column in header['columns']:
+        data = view[start + column['offset']:start + column['offset'] + column['length']]
+        if column['type'] == 'f8':
+            columns[column['name']] = data.cast('d')
+        else:
+            columns[column['name']] = bytes(data).decode().split('\n') if header['rows'] else []
+    return header['rows'], columns
+
+
+class Snapshot:
+    def __init__(self, directory, hall, meta):
+        self.path = os.path.join(directory, f'{hall}.json')
+        self.gzip_path = self.path + '.gz'
+        self.columns_path = os.path.join(directory, f'{hall}.cols')
+        self.version = meta['version']
+        self.etag = meta['etag']
+        self.count = meta['count']
+
+
+class SnapshotStore:
+    """Snapshot files plus an in-process index of their metadata, keyed by (date, hall)."""
+
+    def __init__(self, root=SNAPSHOT_DIR, enabled=MENU_SNAPSHOTS):
+        self.root = root
+        self.enabled = enabled
+        self.index = {}
+        self.lock = threading.Lock()
+
+    def directory(self, date):
+        """The directory of date's snapshots, named from the parsed date. Raises ValueError."""
+        return os.path.join(self.root, db.name, date_slug(date))
+
+    def get(self, date, hall=None, version=None):
+        """The snapshot for (date, hall), or None. With version, only a snapshot built from it.
+
+        A miss re-reads the metadata from disk, which another worker process may have written.
+        """
+        key = (date, hall or ALL_HALLS)
+        snapshot = self.index.get(key)
+        if snapshot is None or (version is not None and snapshot.version != version):
+            snapshot = self._load(*key)
+        if snapshot is None or (version is not None and snapshot.version != version):
+            return None
+        return snapshot
+
+    def _load(self, date, hall):
+        try:
+            directory = self.directory(date)
+            with open(os.path.join(directory, f'{hall}.meta.json'), encoding='utf-8') as f:
+                snapshot = Snapshot(directory, hall, json.load(f))
+        except (OSError, ValueError, KeyError):
+            return None
+        with self.lock:
+            self.index[(date, hall)] = snapshot
+        return snapshot
+
+    def write(self, date, hall, version, body, entries, foods):
+        """Store a rendered /api/menu body (and its items as columns) for (date, hall)."""
+        hall = hall or ALL_HALLS
+        directory = self.directory(date)
+        os.makedirs(directory, exist_ok=True)
+        meta = {'version': version, 'etag': generate_etag(body), 'count': len(entries),
+                'built_at': datetime.now().isoformat(timespec='seconds')}
+
+        def replace(name, write):
+            fd, tmp = tempfile.mkstemp(dir=directory, prefix=f'.{name}.')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    write(f)
+                os.replace(tmp, os.path.join(directory, name))
+            except BaseException:
+                os.unlink(tmp)
+                raise
+
+        replace(f'{hall}.json', lambda f: f.write(body))
+        replace(f'{hall}.json.gz', lambda f: f.write(gzip.compress(body, compresslevel=9)))
+        replace(f'{hall}.cols', lambda f: write_columns(f, entries, foods))
+        replace(f'{hall}.meta.json', lambda f: f.write(json.dumps(meta).encode()))
+
+        snapshot = Snapshot(directory, hall, meta)
+        with self.lock:
+            self.index[(date, hall)] = snapshot
+        return snapshot
+
+    def remove(self, dates):
+        """Drop the snapshots of dates (expired by menu retention)."""
+        for date in dates:
+            try:
+                shutil.rmtree(self.directory(date), ignore_errors=True)
+            except ValueError:
+                pass
+            with self.lock:
+                for key in [key for key in self.index if key[0] == date]:
+                    del self.index[key]
+
+
+snapshots = SnapshotStore()
+
+
+def menu_body(date, hall, items):
+    """The /api/menu response body for date (and hall) without other filters."""
+    filters = {'date': date, **({'dining_hall_id': hall} if hall else {})}
+    return render_json({'success': True, 'count': len(items), 'filters': filters, 'data': items})
+
+
+def build_snapshots(db, date, halls):
+    """Materialize the snapshots of a date: one per hall and one for all halls. Returns how many."""
+    if not snapshots.enabled or canonical_date(date) is None:
+        return 0
+    from cache import get_version
+    from catalog import get_catalog
+
+    # Version first, so a write racing the build leaves the snapshot behind rather than mislabeled
+    version = get_version(db, date)
+    # The same queries /api/menu runs, so items come back in the same order
+    entries = {hall: menu_records(db.menus.find({'dining_hall_id': hall, 'date': date}, {'_id': 0})) for hall in halls}
+    entries[None] = menu_records(db.menus.find({'date': date}, {'_id': 0}))
+    foods = get_catalog(db).lookup({entry['rec_num'] for entry in entries[None]})
+
+    for hall, hall_entries in entries.items():
+        items = menu_items(hall_entries, foods, {}, None)
+        snapshots.write(date, hall, version, menu_body(date, hall, items), hall_entries, foods)
+    return len(entries)
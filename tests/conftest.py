@@ -0,0 +1,41 @@
+"""Tests run against mongomock through the benchmarks' stand-in (benchmarks/mongo_standin.py)."""
+
+import itertools
+import os
+import sys
+
+import pytest
+
+# No background label sweeps unless a test starts one (see tests/test_nutrition_worker.py)
+os.environ.setdefault("NUTRITION_SWEEP_SECONDS", "0")
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+from mongo_standin import load_app  # noqa: E402
+
+_databases = itertools.count()
+
+
+@pytest.fixture
+def app_db():
+    """(Flask app, db) on a fresh, migrated database with its own snapshot directory.
+
+    The app's nutrition worker is stopped afterwards, so no sweeper or fetch threads outlive the test.
+    """
+    from scraper import nutrition_backfill
+
+    yield load_app(f"test_{next(_databases)}")
+    nutrition_backfill.stop()
+
+
+@pytest.fixture
+def client(app_db):
+    return app_db[0].test_client()
+
+
+@pytest.fixture
+def db(app_db):
+    return app_db[1]
+
@@ -0,0 +1,34 @@
+import pytest
+
+import scraper
+
+
+def item(rec_num, meal_period):
+    return {"rec_num": rec_num, "name": f"Dish {rec_num}", "meal_period": meal_period, "station": "Grill",
+            "dietary_icons": []}
+
+
+@pytest.mark.parametrize("limit", ["0", "-5", "101", "ten"])
+def test_protein_per_calorie_rejects_bad_limits(client, limit):
+    response = client.get(f"/api/analytics/protein-per-calorie?start=1/15/2026&limit={limit}")
+
+    assert response.status_code == 400
+    assert "limit" in response.get_json()["error"]
+
+
+def test_protein_per_calorie_accepts_limits_in_range(client):
+    for limit in ("1", "100"):
+        assert client.get(f"/api/analytics/protein-per-calorie?start=1/15/2026&limit={limit}").status_code == 200
+
+
+def test_totals_sort_groups_missing_a_field_last(client, db):
+    scraper.ingest_items("1/15/2026", {"19": [item("1*1", "Lunch"), item("2*1", "Dinner")]})
+    # Written before meal periods were parsed
+    db.menus.insert_one({"date": "1/15/2026", "dining_hall_id": "19", "rec_num": "1*1", "station": "Grill",
+                         "dietary_icons": []})
+    db.foods.update_many({}, {"$set": {"nutrition_fetched": True, "nutrients": {"calories": 100}}})
+
+    response = client.get("/api/analytics/totals?start=1/15/2026&group_by=meal_period")
+
+    assert response.status_code == 200
+    assert [row.get("meal_period") for row in response.get_json()["data"]] == ["Dinner", "Lunch", None]
@@ -0,0 +1,72 @@
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+
+import pytest
+
+import backfill
+from locks import MongoLock, scrape_lock_name
+
+
+@pytest.fixture
+def scrapes(db):
+    """(date, hall) of each menu page the backfill fetches; every page is a closed hall."""
+    fetched = []
+
+    def get_menu_page(hall, date, cache=None, force=False):
+        fetched.append((date, hall))
+        return "<html></html>"
+
+    with mock.patch.object(backfill, "db", db), mock.patch.object(backfill, "get_menu_page", get_menu_page):
+        yield fetched
+
+
+def test_rerun_resumes_from_checkpoints(scrapes, db):
+    first = backfill.scrape_range(["1/20/2026"], rate=0)
+    second = backfill.scrape_range(["1/20/2026"], rate=0)
+
+    assert first["checkpointed"] == 0
+    assert second["checkpointed"] == len(backfill.DINING_HALLS)
+    assert len(scrapes) == len(backfill.DINING_HALLS)
+
+
+def test_expired_checkpoints_are_scraped_again(scrapes, db):
+    backfill.scrape_range(["1/20/2026"], rate=0)
+    db.scrape_checkpoints.update_many({}, {"$set": {"expires_at": datetime.now(timezone.utc) - timedelta(seconds=1)}})
+
+    rerun = backfill.scrape_range(["1/20/2026"], rate=0)
+
+    assert rerun["checkpointed"] == 0
+    assert len(scrapes) == 2 * len(backfill.DINING_HALLS)
+
+
+def test_checkpoints_expire_after_the_ttl(scrapes, db):
+    backfill.scrape_range(["1/20/2026"], rate=0, checkpoint_ttl_hours=2)
+
+    for checkpoint in db.scrape_checkpoints.find():
+        assert checkpoint["expires_at"] - checkpoint["finished_at"] == timedelta(hours=2)
+
+
+def test_a_date_is_locked_only_while_it_is_scraped(db):
+    # Scrape locks held as each page is fetched
+    held = []
+
+    def get_menu_page(hall, date, cache=None, force=False):
+        held.append((date, {doc["_id"] for doc in db.scrape_locks.find()}))
+        return "<html></html>"
+
+    with mock.patch.object(backfill, "db", db), mock.patch.object(backfill, "get_menu_page", get_menu_page):
+        backfill.scrape_range(["1/20/2026", "1/21/2026"], max_workers=1, rate=0)
+
+    assert all(scrape_lock_name(date) in locks for date, locks in held)
+    assert all(scrape_lock_name("1/21/2026") not in locks for date, locks in held if date == "1/20/2026")
+    assert db.scrape_locks.count_documents({}) == 0
+
+
+def test_dates_another_scrape_holds_are_skipped(scrapes, db):
+    MongoLock(db.scrape_locks, scrape_lock_name("1/21/2026")).acquire()
+
+    summary = backfill.scrape_range(["1/20/2026", "1/21/2026"], rate=0)
+
+    assert summary["locked_dates"] == ["1/21/2026"]
+    assert {date for date, _ in scrapes} == {"1/20/2026"}
+    assert db.scrape_checkpoints.count_documents({"date": "1/21/2026"}) == 0
@@ -0,0 +1,28 @@
+import asyncio
+
+import httpx
+import pytest
+
+from feed import MenuFeed
+
+
+@pytest.mark.parametrize("date", ["", "tomorrow", "01/15/2026", "1/05/2026", "2026-01-15"])
+def test_events_reject_dates_not_spelled_as_stored(app_db, date):
+    import asgi
+
+    async def get():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=asgi.app), base_url="http://test") as client:
+            return await client.get("/api/menu/events", params={"date": date})
+
+    response = asyncio.run(get())
+
+    assert response.status_code == 400
+    assert "M/D/YYYY" in response.json()["error"]
+
+
+def test_subscribe_rejects_dates_not_spelled_as_stored():
+    feed = MenuFeed()
+
+    with pytest.raises(ValueError):
+        asyncio.run(feed.subscribe("01/15/2026", None))
+    assert not feed.topics
@@ -0,0 +1,29 @@
+from types import SimpleNamespace
+
+from fetch_cache import FetchCache
+
+URL = "https://nutrition.umd.edu/?locationNum=19&dtdate=1/15/2026"
+
+
+def response(body, etag):
+    return SimpleNamespace(content=body, headers={"ETag": etag})
+
+
+def test_entries_committed_by_another_process_are_used(db):
+    ours, theirs = FetchCache(db.fetch_cache), FetchCache(db.fetch_cache)
+    ours.lookup(URL)
+
+    theirs.lookup(URL)
+    assert theirs.is_changed(URL, response(b"menu", '"v1"'))
+    theirs.commit([URL])
+
+    ours.lookup(URL)
+    assert ours.conditional_headers(URL) == {"If-None-Match": '"v1"'}
+    assert not ours.is_changed(URL, response(b"menu", '"v1"'))
+
+
+def test_uncommitted_entries_are_not_persisted(db):
+    cache = FetchCache(db.fetch_cache)
+    cache.is_changed(URL, response(b"menu", '"v1"'))
+
+    assert FetchCache(db.fetch_cache).lookup(URL) is None
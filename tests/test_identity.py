@@ -0,0 +1,106 @@
+from unittest import mock
+
+import identity
+import ingest
+import scraper
+
+EGG_BOWL = {"Calories": "100", "allergens": "Contains: milk", "ingredients": "egg"}
+EGG_BOWL_WITH_SOY = {"Calories": "100", "allergens": "Contains: milk, soy", "ingredients": "egg, soy"}
+
+
+def item(rec_num, name):
+    return {"rec_num": rec_num, "name": name, "meal_period": "Lunch", "station": "Grill", "dietary_icons": []}
+
+
+def served(db, date):
+    return sorted(entry["rec_num"] for entry in db.menus.find({"date": date}))
+
+
+def test_name_key():
+    assert identity.name_key("Grilled Chicken  Breast (GF)") == "grilled chicken breast gf"
+    assert identity.name_key("Jalapeño Poppers") == "jalapeno poppers"
+    assert identity.name_key(None) == ""
+
+
+def test_rekeyed_dish_with_the_same_label_is_merged(db):
+    scraper.ingest_items("1/15/2026", {"19": [item("1*1", "Egg Bowl")]})
+    scraper.store_nutrition("1*1", EGG_BOWL)
+
+    scraper.ingest_items("1/16/2026", {"19": [item("9*4", "Egg Bowl")]})
+    food = scraper.store_nutrition("9*4", EGG_BOWL)
+
+    assert food["rec_num"] == "1*1"
+    assert db.foods.distinct("rec_num") == ["1*1"]
+    assert identity.resolve(db, ["9*4"]) == {"9*4": "1*1"}
+    assert served(db, "1/16/2026") == ["1*1"]
+
+    # Later scrapes map the alias at ingest, with no stub left to fetch
+    stats = scraper.ingest_items("1/17/2026", {"19": [item("9*4", "Egg Bowl")]})
+    assert stats["aliased"] == 1
+    assert served(db, "1/17/2026") == ["1*1"]
+    assert scraper.find_pending_nutrition() == []
+
+
+def test_rekeyed_dish_with_a_new_label_keeps_its_own_food(db):
+    scraper.ingest_items("1/15/2026", {"19": [item("1*1", "Egg Bowl")]})
+    scraper.store_nutrition("1*1", EGG_BOWL)
+
+    scraper.ingest_items("1/18/2026", {"19": [item("10*1", "Egg Bowl")]})
+    food = scraper.store_nutrition("10*1", EGG_BOWL_WITH_SOY)
+
+    assert food["rec_num"] == "10*1"
+    assert sorted(db.foods.distinct("rec_num")) == ["1*1", "10*1"]
+    assert identity.resolve(db, ["10*1"]) == {}
+    assert served(db, "1/18/2026") == ["10*1"]
+
+
+def test_new_rec_nums_are_not_aliased_by_name_by_default(db):
+    assert not identity.FOOD_ALIAS_BY_NAME
+    scraper.ingest_items("1/15/2026", {"19": [item("1*1", "Egg Bowl")]})
+    scraper.store_nutrition("1*1", EGG_BOWL)
+
+    stats = scraper.ingest_items("1/16/2026", {"19": [item("9*4", "Egg Bowl")]})
+
+    assert stats["aliased"] == 0
+    assert scraper.find_pending_nutrition() == ["9*4"]
+
+
+def test_alias_by_name_maps_new_rec_nums_at_ingest(db):
+    scraper.ingest_items("1/15/2026", {"19": [item("1*1", "Egg Bowl")]})
+    scraper.store_nutrition("1*1", EGG_BOWL)
+
+    with mock.patch.object(identity, "FOOD_ALIAS_BY_NAME", True):
+        stats = scraper.ingest_items("1/16/2026", {"19": [item("9*4", "Egg Bowl")]})
+
+    assert stats["aliased"] == 1
+    assert served(db, "1/16/2026") == ["1*1"]
+    assert scraper.find_pending_nutrition() == []
+
+
+def test_nutrition_of_an_alias_is_its_food(client, db):
+    scraper.ingest_items("1/15/2026", {"19": [item("1*1", "Egg Bowl")]})
+    scraper.store_nutrition("1*1", EGG_BOWL)
+    scraper.ingest_items("1/16/2026", {"19": [item("9*4", "Egg Bowl")]})
+    scraper.store_nutrition("9*4", EGG_BOWL)
+
+    data = client.get("/api/nutrition?rec_num=9*4").get_json()["data"]
+
+    assert data["rec_num"] == "9*4"
+    assert data["allergens"] == "Contains: milk"
+
+
+def test_compact_merges_only_matching_labels(db):
+    # Stored by a scraper that didn't merge: two rec_nums with one label, one with another
+    with mock.patch.object(ingest, "merge_fetched", lambda db, rec_num: None):
+        scraper.ingest_items("1/15/2026", {"19": [item("1*1", "Egg Bowl")]})
+        scraper.store_nutrition("1*1", EGG_BOWL)
+        scraper.ingest_items("1/16/2026", {"19": [item("9*4", "Egg Bowl")]})
+        scraper.store_nutrition("9*4", EGG_BOWL)
+        scraper.ingest_items("1/17/2026", {"19": [item("10*1", "Egg Bowl")]})
+        scraper.store_nutrition("10*1", EGG_BOWL_WITH_SOY)
+
+    result = identity.compact(db)
+
+    assert result == {"merged": 1, "dates": ["1/16/2026"]}
+    assert sorted(db.foods.distinct("rec_num")) == ["1*1", "10*1"]
+    assert served(db, "1/16/2026") == ["1*1"]
@@ -0,0 +1,18 @@
+from jobs import ScrapeJobs
+from locks import MongoLock, scrape_lock_name
+
+
+def test_a_locked_date_reports_its_holder(db):
+    MongoLock(db.scrape_locks, scrape_lock_name("1/15/2026"), owner="elsewhere:1:abc").acquire()
+    scraped = []
+    jobs = ScrapeJobs(db.scrape_jobs, db.scrape_locks, lambda date, force, on_hall: scraped.append(date) or {},
+                      ["19"])
+
+    job, _ = jobs.submit(["1/15/2026"])
+    jobs.executor.shutdown(wait=True)
+
+    result = jobs.get(job["_id"])["results"]["1/15/2026"]
+    assert result["status"] == "locked"
+    assert result["held_by"] == "elsewhere:1:abc"
+    assert result["expires_at"]
+    assert not scraped
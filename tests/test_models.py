@@ -0,0 +1,22 @@
+from filters import menu_item
+from models import Food, MenuEntry, menu_records
+
+ENTRY = {"rec_num": "1*1", "dining_hall_id": "19", "date": "1/5/2026", "meal_period": "Lunch", "station": "Grill",
+         "dietary_icons": ["vegan", "Contains soy"]}
+
+
+def test_menu_entry_round_trip():
+    assert MenuEntry.from_doc(ENTRY).to_dict() == ENTRY
+
+
+def test_menu_records_share_repeated_strings():
+    first, second = menu_records([dict(ENTRY), {**ENTRY, "rec_num": "2*1", "date": "/".join(["1", "5", "2026"])}])
+    assert first.date is second.date
+    assert first.station is second.station
+    assert first.dietary_icons is second.dietary_icons
+
+
+def test_menu_item_joins_records_like_dicts():
+    food = {"rec_num": "1*1", "name": "Tofu Bowl", "nutrition_fetched": True, "nutrition": {"Calories": "300"},
+            "allergens": "Soy", "ingredients": "Tofu"}
+    assert menu_item(MenuEntry.from_doc(ENTRY), Food.from_doc(food), None) == menu_item(ENTRY, food, None)
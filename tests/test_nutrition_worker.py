@@ -0,0 +1,78 @@
+import threading
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+
+import pytest
+
+import scraper
+from app import create_app
+from nutrition_worker import NUTRITION_SWEEP_LOCK, NutritionBackfill
+
+
+@pytest.fixture
+def sweepers(db):
+    """Make NutritionBackfills sharing db's sweep lease; each is stopped after the test."""
+    made = []
+
+    def make(find_pending=lambda rec_nums=None: [], sweep_seconds=60):
+        backfill = NutritionBackfill(lambda rec_num: None, find_pending, db.scrape_locks,
+                                     sweep_seconds=sweep_seconds)
+        made.append(backfill)
+        return backfill
+
+    yield make
+    for backfill in made:
+        backfill.stop()
+
+
+def test_one_process_sweeps(sweepers):
+    first, second = sweepers(), sweepers()
+
+    assert first.sweep() == 0
+    assert second.sweep() is None
+    assert first.sweep() == 0
+
+
+def test_sweep_waits_for_another_holders_lease(sweepers, db):
+    now = datetime.now(timezone.utc)
+    db.scrape_locks.insert_one({"_id": NUTRITION_SWEEP_LOCK, "owner": "elsewhere",
+                                "expires_at": now + timedelta(minutes=5)})
+    backfill = sweepers()
+
+    assert backfill.sweep() is None
+    # The other holder stops renewing and its lease runs out
+    db.scrape_locks.update_one({"_id": NUTRITION_SWEEP_LOCK}, {"$set": {"expires_at": now - timedelta(seconds=1)}})
+    assert backfill.sweep() == 0
+
+
+def test_stop_ends_the_sweeper_and_releases_the_lease(sweepers, db):
+    swept = threading.Event()
+
+    def find_pending(rec_nums=None):
+        swept.set()
+        return []
+
+    backfill = sweepers(find_pending)
+    backfill.start()
+    assert swept.wait(5)
+    sweeper = backfill.sweeper
+    backfill.stop()
+
+    assert not sweeper.is_alive()
+    assert db.scrape_locks.count_documents({"_id": NUTRITION_SWEEP_LOCK}) == 0
+    assert sweepers().sweep() == 0
+
+
+def test_a_fresh_app_sweeps_stubs_nobody_requested(db):
+    scraper.ingest_items("1/15/2026", {"19": [{"rec_num": "1*1", "name": "Egg Bowl", "meal_period": "Lunch",
+                                               "station": "Grill", "dietary_icons": []}]})
+    fetched = threading.Event()
+    backfill = scraper.nutrition_backfill
+
+    with mock.patch.object(backfill, "fetch", lambda rec_num: fetched.set()), \
+            mock.patch.object(backfill, "sweep_seconds", 60):
+        create_app()
+        try:
+            assert fetched.wait(5)
+        finally:
+            backfill.stop()
@@ -0,0 +1,105 @@
+import pytest
+
+import scraper
+from pagination import MAX_PAGE_SIZE, decode_cursor, encode_cursor, page_size, wants_ndjson
+from routes import search_cursor
+
+PARAMS = [("date", "1/5/2026"), ("dining_hall_id", "19")]
+
+
+def test_cursor_round_trip_ignores_paging_params():
+    token = encode_cursor(42, PARAMS + [("limit", "10")])
+    assert decode_cursor(token, PARAMS + [("limit", "20"), ("format", "ndjson")]) == 42
+
+
+@pytest.mark.parametrize("params", [[("date", "1/6/2026"), ("dining_hall_id", "19")], PARAMS[:1]])
+def test_cursor_from_another_query_is_rejected(params):
+    with pytest.raises(ValueError, match="different query"):
+        decode_cursor(encode_cursor(42, PARAMS), params)
+
+
+@pytest.mark.parametrize("token", ["", "not base64!", "e30", encode_cursor(1, PARAMS)[:-3]])
+def test_malformed_cursor_is_rejected(token):
+    with pytest.raises(ValueError):
+        decode_cursor(token, PARAMS)
+
+
+@pytest.mark.parametrize("offset", [-1, "3", None])
+def test_search_cursor_must_hold_an_offset(offset):
+    with pytest.raises(ValueError, match="invalid cursor"):
+        search_cursor(encode_cursor(offset, PARAMS), PARAMS)
+
+
+@pytest.mark.parametrize("value,maximum,expected", [
+    (None, MAX_PAGE_SIZE, None),
+    ("1", MAX_PAGE_SIZE, 1),
+    (str(MAX_PAGE_SIZE), MAX_PAGE_SIZE, MAX_PAGE_SIZE),
+    ("100", 100, 100),
+])
+def test_page_size(value, maximum, expected):
+    assert page_size(value, maximum) == expected
+
+
+@pytest.mark.parametrize("value,maximum", [("abc", 100), ("", 100), ("0", 100), ("-3", 100), ("101", 100),
+                                           (str(MAX_PAGE_SIZE + 1), MAX_PAGE_SIZE)])
+def test_page_size_out_of_range(value, maximum):
+    with pytest.raises(ValueError):
+        page_size(value, maximum)
+
+
+def test_wants_ndjson():
+    assert wants_ndjson(None) is False
+    assert wants_ndjson("json") is False
+    assert wants_ndjson("ndjson") is True
+    with pytest.raises(ValueError):
+        wants_ndjson("xml")
+
+
+@pytest.fixture
+def foods(db):
+    db.foods.insert_many([{"rec_num": f"{i}*1", "name": f"chicken dish {i}", "nutrition_fetched": True,
+                           "nutrition": {}} for i in range(130)])
+
+
+@pytest.mark.parametrize("query", ["limit=abc", "limit=0", "limit=-3", "limit=101",
+                                   "format=ndjson&limit=101", "cursor=abc"])
+def test_search_rejects_bad_paging(client, foods, query):
+    response = client.get(f"/api/search?q=chicken&{query}")
+    assert response.status_code == 400
+    assert response.get_json()["success"] is False
+
+
+def test_search_pages_follow_the_cursor(client, foods):
+    first = client.get("/api/search?q=chicken").get_json()
+    assert first["count"] == 50
+
+    seen = [food["rec_num"] for food in first["data"]]
+    cursor = first["next_cursor"]
+    while cursor:
+        page = client.get(f"/api/search?q=chicken&limit=100&cursor={cursor}").get_json()
+        seen += [food["rec_num"] for food in page["data"]]
+        cursor = page["next_cursor"]
+    assert sorted(seen) == sorted(f"{i}*1" for i in range(130))
+
+
+def test_search_ndjson_applies_the_limit(client, foods):
+    assert len(client.get("/api/search?q=chicken&format=ndjson&limit=5").data.splitlines()) == 5
+    assert len(client.get("/api/search?q=chicken&format=ndjson").data.splitlines()) == 130
+
+
+def test_menu_pages_follow_the_cursor(client, db):
+    items = [{"rec_num": f"{i}*1", "name": f"Dish {i}", "meal_period": "Lunch", "station": "Grill",
+              "dietary_icons": []} for i in range(25)]
+    scraper.ingest_items("1/5/2026", {"19": items})
+
+    first = client.get("/api/menu?date=1/5/2026&limit=10").get_json()
+    seen, cursor = [item["rec_num"] for item in first["data"]], first["next_cursor"]
+    while cursor:
+        page = client.get(f"/api/menu?date=1/5/2026&limit=10&cursor={cursor}").get_json()
+        seen += [item["rec_num"] for item in page["data"]]
+        cursor = page["next_cursor"]
+    assert sorted(seen) == sorted(item["rec_num"] for item in items)
+
+    # A cursor only resumes the query it was issued for
+    other = client.get(f"/api/menu?date=1/6/2026&limit=10&cursor={first['next_cursor']}")
+    assert other.status_code == 400
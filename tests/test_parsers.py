@@ -0,0 +1,95 @@
+import glob
+import json
+import os
+
+import pytest
+
+import parsers
+from fake_upstream import generate_label_html, generate_menu_html
+
+FIXTURES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks", "fixtures")
+
+try:
+    import lxml  # noqa: F401
+    ENGINES = parsers.ENGINES
+except ImportError:
+    ENGINES = tuple(engine for engine in parsers.ENGINES if engine != "lxml")
+
+
+def fixture(name):
+    with open(os.path.join(FIXTURES, name), encoding="utf-8") as f:
+        return f.read()
+
+
+def pages():
+    """(name, html) of every fixture page, including recorded ones."""
+    return [(os.path.basename(path), fixture(os.path.basename(path)))
+            for path in sorted(glob.glob(os.path.join(FIXTURES, "*.html")))]
+
+
+def parse(name, html, engine, dining_hall_id="19", date="1/15/2026"):
+    if name.startswith("label"):
+        return parsers.parse_nutrition_label(html, engine)
+    return parsers.parse_menu_page(html, dining_hall_id, date, engine)
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+@pytest.mark.parametrize("name,html", pages() + [
+    ("menu generated", generate_menu_html("19", "1/15/2026")),
+    ("label generated", generate_label_html("190001*3")),
+])
+def test_engines_agree_with_html_parser(name, html, engine):
+    # Compared as JSON so key order counts too
+    assert json.dumps(parse(name, html, engine)) == json.dumps(parse(name, html, "html.parser"))
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+@pytest.mark.parametrize("path", sorted(glob.glob(os.path.join(FIXTURES, "*_recorded_*.json"))))
+def test_recorded_pages_parse_as_recorded(path, engine):
+    with open(path, encoding="utf-8") as f:
+        expected = json.load(f)
+    name = os.path.basename(path)[:-len(".json")]
+    html = fixture(f"{name}.html")
+    if name.startswith("menu"):
+        assert parsers.parse_menu_page(html, expected["dining_hall_id"], expected["date"], engine) == expected["items"]
+    else:
+        assert parsers.parse_nutrition_label(html, engine) == expected
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_menu_with_tabs(engine):
+    items = parsers.parse_menu_page(fixture("menu_tabs.html"), "19", "1/15/2026", engine)
+    assert len(items) == 11
+    assert items[0] == {
+        "name": "Scrambled Eggs", "dining_hall_id": "19", "date": "1/15/2026", "rec_num": "113001*3",
+        "meal_period": "Breakfast", "station": "Breakfast Grill", "dietary_icons": ["vegetarian", "Contains egg"],
+    }
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_menu_without_tabs_falls_back_to_label_links(engine):
+    items = parsers.parse_menu_page(fixture("menu_no_tabs.html"), "19", "1/15/2026", engine)
+    assert [item["rec_num"] for item in items][:2] == ["150100*1", "150101*2"]
+    assert {(item["meal_period"], item["station"]) for item in items} == {("Unknown", "Unknown")}
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_closed_hall_has_no_items(engine):
+    assert parsers.parse_menu_page(fixture("menu_closed.html"), "51", "1/15/2026", engine) == []
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_full_label(engine):
+    label = parsers.parse_nutrition_label(fixture("label_full.html"), engine)
+    assert label["Serving Size"] == "4 oz"
+    assert label["Calories"] == "310"
+    assert label["Saturated Fat"] == "3.5g"
+    assert label["allergens"] == "Milk"
+    assert "Added Sugars" not in label
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_label_without_header(engine):
+    assert parsers.parse_nutrition_label(fixture("label_minimal.html"), engine) == {
+        "Total Fat": "0.5g", "Sodium": "0mg", "Protein": "4g", "ingredients": "Basmati Rice, Water", "allergens": "",
+    }
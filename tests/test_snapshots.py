@@ -0,0 +1,137 @@
+import math
+import os
+from unittest import mock
+
+import pytest
+
+import scraper
+from models import Food, menu_records
+from snapshots import (
+    STRING_COLUMNS, build_snapshots, canonical_date, date_slug, read_columns, snapshot_key, snapshots, write_columns,
+)
+
+HALLS = scraper.DINING_HALLS
+
+
+def snapshot_files():
+    return sorted(os.path.relpath(os.path.join(directory, name), snapshots.root)
+                  for directory, _, names in os.walk(snapshots.root) for name in names)
+
+
+@pytest.mark.parametrize("date,expected", [
+    ("1/5/2026", "1/5/2026"),
+    ("12/31/2026", "12/31/2026"),
+    ("01/05/2026", None),
+    ("1/05/2026", None),
+    ("2026-01-05", None),
+    ("2/30/2026", None),
+    ("..", None),
+    ("", None),
+    (None, None),
+])
+def test_canonical_date(date, expected):
+    assert canonical_date(date) == expected
+
+
+def test_date_slug():
+    assert date_slug("1/5/2026") == "2026-01-05"
+    with pytest.raises(ValueError):
+        date_slug("../1/5/2026")
+
+
+@pytest.mark.parametrize("args,expected", [
+    ({"date": "1/5/2026"}, ("1/5/2026", None)),
+    ({"date": "1/5/2026", "dining_hall_id": "19"}, ("1/5/2026", "19")),
+    ({"date": "1/5/2026", "dining_hall_id": ""}, ("1/5/2026", None)),
+    ({"date": "01/05/2026"}, None),
+    ({"date": "bogus"}, None),
+    ({"date": ".."}, None),
+    ({"date": "1/5/2026", "dining_hall_id": "zzz"}, None),
+    ({"date": "1/5/2026", "meal_period": "Lunch"}, None),
+    ({}, None),
+])
+def test_snapshot_key(args, expected):
+    with mock.patch.object(snapshots, "enabled", True):
+        assert snapshot_key(args, HALLS) == expected
+
+
+def test_snapshot_key_when_disabled():
+    with mock.patch.object(snapshots, "enabled", False):
+        assert snapshot_key({"date": "1/5/2026"}, HALLS) is None
+
+
+def test_only_canonical_requests_write_snapshots(client, db):
+    item = {"rec_num": "1*1", "name": "Egg Bowl", "meal_period": "Lunch", "station": "Grill", "dietary_icons": []}
+    scraper.ingest_items("1/5/2026", {"19": [item]})
+
+    with mock.patch.object(snapshots, "enabled", True):
+        for query in ("date=01/05/2026", "date=bogus", "date=..", "date=1/5/2026&dining_hall_id=zzz"):
+            assert client.get(f"/api/menu?{query}").status_code == 200
+        assert snapshot_files() == []
+
+        canonical = client.get("/api/menu?date=1/5/2026").get_json()
+        padded = client.get("/api/menu?date=01/05/2026").get_json()
+
+    assert canonical["count"] == 1
+    assert padded["count"] == 0
+    assert snapshot_files()
+    assert all(path.startswith(os.path.join(db.name, "2026-01-05") + os.sep) for path in snapshot_files())
+
+
+def test_columns_round_trip(tmp_path):
+    entries = menu_records([
+        {"rec_num": "1*1", "dining_hall_id": "19", "date": "1/5/2026", "meal_period": "Lunch", "station": "Grill",
+         "dietary_icons": ["vegan"]},
+        {"rec_num": "2*1", "dining_hall_id": "51", "date": "1/5/2026", "meal_period": "Dinner", "station": "Deli",
+         "dietary_icons": []},
+        {"rec_num": "3*1", "dining_hall_id": "16", "date": "1/5/2026", "meal_period": "Dinner", "station": "Pizza",
+         "dietary_icons": []},
+    ])
+    foods = {
+        "1*1": Food.from_doc({"rec_num": "1*1", "name": "Egg Bowl", "nutrition_fetched": True,
+                              "nutrients": {"calories": 250.0, "protein": 14.5}}),
+        "2*1": Food.from_doc({"rec_num": "2*1", "name": "Turkey Club", "nutrition_fetched": True,
+                              "nutrients": {"calories": 480.0}}),
+        # A stub whose label hasn't been fetched
+        "3*1": Food.from_doc({"rec_num": "3*1", "name": "Cheese Pizza", "nutrition_fetched": False}),
+    }
+    path = tmp_path / "all.cols"
+    with open(path, "wb") as f:
+        write_columns(f, entries, foods)
+
+    rows, columns = read_columns(str(path))
+
+    assert rows == 3
+    assert columns["rec_num"] == ["1*1", "2*1", "3*1"]
+    assert columns["name"] == ["Egg Bowl", "Turkey Club", "Cheese Pizza"]
+    assert columns["dining_hall_id"] == ["19", "51", "16"]
+    assert columns["meal_period"] == ["Lunch", "Dinner", "Dinner"]
+    assert columns["station"] == ["Grill", "Deli", "Pizza"]
+    assert list(columns["calories"][:2]) == [250.0, 480.0]
+    assert columns["protein"][0] == 14.5
+    assert all(math.isnan(value) for value in (columns["calories"][2], columns["protein"][1], columns["protein"][2]))
+
+
+def test_columns_of_an_empty_menu(tmp_path):
+    path = tmp_path / "all.cols"
+    with open(path, "wb") as f:
+        write_columns(f, [], {})
+
+    assert read_columns(str(path)) == (0, {name: [] for name in STRING_COLUMNS})
+
+
+def test_snapshot_columns_match_the_menu(client, db):
+    items = [{"rec_num": f"{n}*1", "name": f"Dish {n}", "meal_period": "Lunch", "station": "Grill",
+              "dietary_icons": []} for n in range(1, 4)]
+    scraper.ingest_items("1/5/2026", {"19": items})
+    scraper.store_nutrition("1*1", {"calories": "250", "protein": "14g"})
+
+    with mock.patch.object(snapshots, "enabled", True):
+        build_snapshots(db, "1/5/2026", HALLS)
+        rows, columns = read_columns(snapshots.get("1/5/2026", "19").columns_path)
+    served = client.get("/api/menu?date=1/5/2026&dining_hall_id=19").get_json()["data"]
+
+    assert rows == len(served) == 3
+    assert columns["rec_num"] == [item["rec_num"] for item in served]
+    assert columns["name"] == [item["name"] for item in served]
+    assert columns["calories"][columns["rec_num"].index("1*1")] == 250.0
@@ -0,0 +1,214 @@
+"""Shared HTTP client for nutrition.umd.edu: rate limit, retries, deadlines and a circuit breaker.
+
+Every menu page and label the scraper, backfill and nutrition worker fetch goes through
+upstream.get():
+
+- a token bucket shared by all threads (UPSTREAM_RATE_PER_SEC, bursts of UPSTREAM_BURST)
+- connect and read timeouts on every attempt, and a deadline across all attempts
+  (UPSTREAM_DEADLINE_SECONDS), so a hung upstream can't hold a worker indefinitely
+- retries of connection errors, timeouts, 429 and 5xx with jittered exponential backoff,
+  honoring Retry-After, up to UPSTREAM_MAX_RETRIES
+- a circuit breaker: after UPSTREAM_BREAKER_FAILURES consecutive failed attempts, requests
+  fail at once with UpstreamUnavailable for UPSTREAM_BREAKER_RESET_SECONDS; then a single
+  trial request is let through, and its success closes the breaker again
+
+While the breaker is open, scrapes leave stored menus as they are (the API keeps serving
+them, and their snapshots) and pending labels stay pending until the next sweep.
+"""
+
+import os
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from metrics import UPSTREAM_REQUESTS, UPSTREAM_LATENCY, UPSTREAM_BYTES, UPSTREAM_RETRIES, UPSTREAM_BREAKER
+
+# Requests per second to nutrition.umd.edu across all threads (0 = unlimited), and the burst allowed
+UPSTREAM_RATE_PER_SEC = float(os.getenv('UPSTREAM_RATE_PER_SEC', '10'))
+UPSTREAM_BURST = int(os.getenv('UPSTREAM_BURST', '10'))
+
+# Per attempt: seconds to connect, and seconds to wait on each read of the response
+UPSTREAM_CONNECT_TIMEOUT_SECONDS = float(os.getenv('UPSTREAM_CONNECT_TIMEOUT_SECONDS', '5'))
+UPSTREAM_READ_TIMEOUT_SECONDS = float(os.getenv('UPSTREAM_READ_TIMEOUT_SECONDS', '20'))
+
+# Seconds one get() may take including retries, backoff and rate-limit waits
+UPSTREAM_DEADLINE_SECONDS = float(os.getenv('UPSTREAM_DEADLINE_SECONDS', '60'))
+
+# Retries after the first attempt; backoff doubles from UPSTREAM_BACKOFF_SECONDS up to the max
+UPSTREAM_MAX_RETRIES = int(os.getenv('UPSTREAM_MAX_RETRIES', '3'))
+UPSTREAM_BACKOFF_SECONDS = float(os.getenv('UPSTREAM_BACKOFF_SECONDS', '0.5'))
+UPSTREAM_BACKOFF_MAX_SECONDS = float(os.getenv('UPSTREAM_BACKOFF_MAX_SECONDS', '10'))
+
+# Consecutive failed attempts that open the breaker, and how long it stays open
+UPSTREAM_BREAKER_FAILURES = int(os.getenv('UPSTREAM_BREAKER_FAILURES', '5'))
+UPSTREAM_BREAKER_RESET_SECONDS = float(os.getenv('UPSTREAM_BREAKER_RESET_SECONDS', '30'))
+
+# Pooled keep-alive connections, one per concurrent scrape worker (ingest.SCRAPE_MAX_WORKERS)
+UPSTREAM_POOL_SIZE = int(os.getenv('SCRAPE_MAX_WORKERS', '8'))
+
+# Responses worth another attempt; any other status is returned to the caller as is
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+RETRY_EXCEPTIONS = (requests.ConnectionError, requests.Timeout)
+
+
+class UpstreamUnavailable(requests.ConnectionError):
+    """The circuit breaker is open: the request was not sent."""
+
+
+class DeadlineExceeded(requests.Timeout):
+    """The request's deadline passed before an attempt could be made."""
+
+
+def backoff(attempt, retry_after=None):
+    """Seconds to sleep before retrying after attempt (0-based): Retry-After if the server sent
+    one in seconds, else full-jitter exponential backoff. Either is capped at the max."""
+    if retry_after and retry_after.strip().isdigit():
+        return min(float(retry_after), UPSTREAM_BACKOFF_MAX_SECONDS)
+    return random.uniform(0, min(UPSTREAM_BACKOFF_MAX_SECONDS, UPSTREAM_BACKOFF_SECONDS * 2 ** attempt))
+
+
+class TokenBucket:
+    """Allows rate calls per second on average, in bursts of up to capacity, across threads."""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = max(1, capacity)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def reserve(self):
+        """Take a token. Returns the seconds to wait before using it (0 if one was available).
+
+        The balance may go negative, which queues callers behind each other in order.
+        """
+        if self.rate <= 0:
+            return 0.0
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            return max(0.0, -self.tokens / self.rate)
+
+    def wait(self):
+        delay = self.reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+
+class CircuitBreaker:
+    CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+    def __init__(self, failure_threshold=UPSTREAM_BREAKER_FAILURES, reset_seconds=UPSTREAM_BREAKER_RESET_SECONDS):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.lock = threading.Lock()
+
+    def allow(self):
+        """Whether an attempt may be sent now. Once open for reset_seconds, allows one trial."""
+        with self.lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_seconds:
+                self._set(self.HALF_OPEN)
+                return True
+            return False
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            if self.state != self.CLOSED:
+                self._set(self.CLOSED)
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or (self.state == self.CLOSED and self.failures >= self.failure_threshold):
+                self.opened_at = time.monotonic()
+                self._set(self.OPEN)
+
+    def _set(self, state):
+        self.state = state
+        UPSTREAM_BREAKER.inc(state=state)
+
+
+class UpstreamClient:
+    def __init__(self, rate=UPSTREAM_RATE_PER_SEC, burst=UPSTREAM_BURST, retries=UPSTREAM_MAX_RETRIES,
+                 deadline=UPSTREAM_DEADLINE_SECONDS, connect_timeout=UPSTREAM_CONNECT_TIMEOUT_SECONDS,
+                 read_timeout=UPSTREAM_READ_TIMEOUT_SECONDS, breaker=None, pool_size=UPSTREAM_POOL_SIZE):
+        self.bucket = TokenBucket(rate, burst)
+        self.breaker = breaker or CircuitBreaker()
+        self.retries = retries
+        self.deadline = deadline
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        # Shared keep-alive session so concurrent fetches reuse TCP/TLS connections
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def get(self, url, headers=None, kind='page', deadline=None):
+        """GET url within deadline seconds (default: the client's). Returns the last response.
+
+        A response with a status outside RETRY_STATUSES is returned right away (callers
+        decide what a 304 or 404 means); one still failing after the last retry is returned
+        too. Raises UpstreamUnavailable while the breaker is open, DeadlineExceeded if no
+        attempt could start in time, or the last attempt's requests exception.
+        """
+        deadline_at = time.monotonic() + (self.deadline if deadline is None else deadline)
+        response = error = None
+        for attempt in range(self.retries + 1):
+            delay = self.bucket.reserve()
+            if time.monotonic() + delay >= deadline_at:
+                break
+            if delay > 0:
+                time.sleep(delay)
+            if not self.breaker.allow():
+                UPSTREAM_REQUESTS.inc(kind=kind, status='breaker_open')
+                raise UpstreamUnavailable(f"{urlsplit(url).netloc} is unavailable (circuit breaker open)")
+
+            remaining = deadline_at - time.monotonic()
+            timeout = (min(self.connect_timeout, remaining), min(self.read_timeout, remaining))
+            try:
+                with UPSTREAM_LATENCY.time(kind=kind):
+                    response = self.session.get(url, headers=headers, timeout=timeout)
+            except requests.RequestException as e:
+                UPSTREAM_REQUESTS.inc(kind=kind, status='error')
+                self.breaker.record_failure()
+                if not isinstance(e, RETRY_EXCEPTIONS):
+                    raise
+                response, error, reason = None, e, type(e).__name__
+            else:
+                UPSTREAM_REQUESTS.inc(kind=kind, status=response.status_code)
+                UPSTREAM_BYTES.inc(len(response.content), kind=kind)
+                if response.status_code not in RETRY_STATUSES:
+                    self.breaker.record_success()
+                    return response
+                self.breaker.record_failure()
+                error, reason = None, response.status_code
+
+            if attempt == self.retries:
+                break
+            pause = backoff(attempt, response.headers.get('Retry-After') if response is not None else None)
+            if time.monotonic() + pause >= deadline_at:
+                break
+            UPSTREAM_RETRIES.inc(kind=kind, reason=reason)
+            time.sleep(pause)
+
+        if response is not None:
+            return response
+        if error is not None:
+            raise error
+        raise DeadlineExceeded(f"GET {url} didn't start within its deadline")
+
+
+upstream = UpstreamClient()